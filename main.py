@@ -1,1404 +1,310 @@
 import os
+import re
+import sys
+import json
 import logging
 import asyncio
 import random
+import math
+import bisect
+import mmap
+import struct
+import zlib
+import pickle
+import sqlite3
+import threading
+import heapq
+import time
+import datetime
+import itertools
+import functools
+import collections
+import contextvars
+from array import array
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton, BotCommand
 from telegram.ext import (
     Application,
     ApplicationBuilder,
     CommandHandler,
+    TypeHandler,
     ContextTypes,
     ConversationHandler,
     CallbackQueryHandler,
+    BaseRateLimiter,
+    BaseUpdateProcessor,
+    BasePersistence,
+    PersistenceInput,
 )
-from telegram.constants import ParseMode
+from telegram.constants import MessageLimit, ParseMode
+from telegram.helpers import escape_markdown
+from telegram.error import BadRequest, RetryAfter
 from dotenv import load_dotenv
+import numpy as np
+
+try:
+    import redis
+except ImportError:  # Only needed for SESSION_STORE=redis
+    redis = None
 
 # --- Setup ---
 load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+BOT_MODE = os.getenv("BOT_MODE", "polling")  # "polling" or "webhook"
+# Webhook mode: Telegram pushes updates to WEBHOOK_URL/WEBHOOK_PATH, served by PTB's built-in server.
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # Public HTTPS base URL, e.g. https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("PORT", os.getenv("WEBHOOK_PORT", "8443")))
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN")
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))  # Concurrent deliveries from Telegram
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
 )
 logger = logging.getLogger(__name__)
 
-# --- Question Bank (Your 210 questions) ---
-ALL_QUESTIONS = [
-    # --- 70 Easy GMP Questions ---
-    {"difficulty": "easy", "question": "What does 'GMP' primarily focus on?",
-     "options": ["Marketing strategies", "Product quality and safety", "Employee salaries", "Office cleanliness"],
-     "answer": "Product quality and safety",
-     "explanation": "GMP (Good Manufacturing Practice) is a system to ensure products are consistently produced and controlled to quality standards.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is a 'SOP'?",
-     "options": ["Standard Office Procedure", "Standard Operating Protocol", "Standard Operating Procedure",
-                 "Systematic Operational Plan"], "answer": "Standard Operating Procedure",
-     "explanation": "An SOP provides detailed, written instructions to achieve uniformity of the performance of a specific function.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "Why is personal hygiene important in GMP?",
-     "options": ["To look good for visitors", "To prevent product contamination", "It's a company tradition",
-                 "To save on cleaning supplies"], "answer": "To prevent product contamination",
-     "explanation": "Good personal hygiene practices by personnel help prevent contamination of the product.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What should be done with expired raw materials?",
-     "options": ["Use them quickly", "Sell them at a discount", "Properly dispose of or reject them",
-                 "Mix them with new materials"], "answer": "Properly dispose of or reject them",
-     "explanation": "Expired materials may not meet quality standards and should not be used in manufacturing.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is the purpose of a 'Batch Number' or 'Lot Number'?",
-     "options": ["To count products", "For employee identification", "To uniquely identify a batch of product",
-                 "For marketing purposes"], "answer": "To uniquely identify a batch of product",
-     "explanation": "It allows for traceability throughout the manufacturing process and distribution.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What does 'Quarantine' mean for materials in GMP?",
-     "options": ["Ready for use", "Rejected materials", "Held separately until quality tests are complete",
-                 "Materials for sale"], "answer": "Held separately until quality tests are complete",
-     "explanation": "Quarantined materials are isolated until they are tested and approved for use or rejected.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "Why must equipment be regularly cleaned?",
-     "options": ["To make it look new", "To prevent cross-contamination and residue buildup", "Only if a manager asks",
-                 "Once a year is enough"], "answer": "To prevent cross-contamination and residue buildup",
-     "explanation": "Regular cleaning is essential to maintain product quality and prevent contamination.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is a 'Deviation' in GMP?",
-     "options": ["A planned change", "An unexpected departure from approved procedures", "A lunch break",
-                 "A marketing campaign"], "answer": "An unexpected departure from approved procedures",
-     "explanation": "Deviations must be documented, investigated, and their impact assessed.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "Who is responsible for following GMP guidelines in a manufacturing facility?",
-     "options": ["Only managers", "Only quality assurance staff", "Every employee involved in manufacturing",
-                 "Only new employees"], "answer": "Every employee involved in manufacturing",
-     "explanation": "GMP is a collective responsibility involving everyone in the manufacturing process.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is the importance of 'Training' in GMP?", "options": ["It's a formality",
-                                                                                                   "To ensure personnel have the skills and knowledge to perform their jobs correctly",
-                                                                                                   "Only for new hires",
-                                                                                                   "To fill time"],
-     "answer": "To ensure personnel have the skills and knowledge to perform their jobs correctly",
-     "explanation": "Proper training is crucial for maintaining quality and compliance.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What should be recorded in a 'Logbook'?",
-     "options": ["Personal notes", "Gossip about colleagues", "Activities related to equipment, rooms, or processes",
-                 "Lunch orders"], "answer": "Activities related to equipment, rooms, or processes",
-     "explanation": "Logbooks provide a chronological record of operations and events.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "Why are records important in GMP?",
-     "options": ["To create more paperwork", "To provide evidence of compliance and traceability",
-                 "To impress auditors", "They are not very important"],
-     "answer": "To provide evidence of compliance and traceability",
-     "explanation": "GMP relies heavily on accurate and complete records; 'if it wasn't documented, it didn't happen.'",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What does 'Calibration' mean for equipment?",
-     "options": ["Cleaning the equipment", "Ensuring the equipment provides accurate readings",
-                 "Painting the equipment", "Buying new equipment"],
-     "answer": "Ensuring the equipment provides accurate readings",
-     "explanation": "Calibration compares equipment readings to a known standard to ensure accuracy.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is a 'Cleanroom'?",
-     "options": ["A room that is cleaned daily", "A room with controlled levels of contaminants",
-                 "A storage room for cleaning supplies", "An office room"],
-     "answer": "A room with controlled levels of contaminants",
-     "explanation": "Cleanrooms are designed to minimize particulate and microbial contamination.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What should you do if you make a mistake in a GMP document?",
-     "options": ["Use white-out to correct it", "Tear out the page",
-                 "Cross it out with a single line, correct it, initial, and date it", "Ignore it"],
-     "answer": "Cross it out with a single line, correct it, initial, and date it",
-     "explanation": "This ensures the original entry is still legible and the correction is traceable.",
-     "source": "Good Documentation Practices (GDP)"},
-    {"difficulty": "easy", "question": "What is 'Cross-contamination'?",
-     "options": ["Contamination from a different country",
-                 "Contamination of a starting material or product with another material or product",
-                 "Cleaning with a cross-shaped brush", "A type of approved contamination"],
-     "answer": "Contamination of a starting material or product with another material or product",
-     "explanation": "Preventing cross-contamination is a key objective of GMP.", "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is the role of Quality Assurance (QA) in GMP?",
-     "options": ["To perform all manufacturing steps", "To ensure that quality systems are in place and being followed",
-                 "To sell the product", "To design the product packaging"],
-     "answer": "To ensure that quality systems are in place and being followed",
-     "explanation": "QA oversees the overall quality management system.", "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is 'Validation' in GMP?", "options": ["A type of cleaning",
-                                                                                   "Documented evidence that a process or system consistently does what it is supposed to do",
-                                                                                   "Guessing the outcome",
-                                                                                   "A marketing term"],
-     "answer": "Documented evidence that a process or system consistently does what it is supposed to do",
-     "explanation": "Validation provides a high degree of assurance for processes and systems.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What should be done with 'Rejected' materials?",
-     "options": ["Use them anyway if you are careful", "Clearly identify and segregate them to prevent use",
-                 "Hide them", "Repackage and sell them"],
-     "answer": "Clearly identify and segregate them to prevent use",
-     "explanation": "Rejected materials must be controlled to prevent their inadvertent use in manufacturing.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "Why is 'Traceability' important in GMP?",
-     "options": ["It's a fun game", "To be able to track the history of a product or material",
-                 "Only for expensive products", "It's not important"],
-     "answer": "To be able to track the history of a product or material",
-     "explanation": "Traceability is crucial for investigations, recalls, and ensuring product history is known.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is a 'Master Batch Record' (MBR)?",
-     "options": ["A record of all master's degrees in the company",
-                 "A recipe or set of instructions for manufacturing a specific product", "A list of all batches made",
-                 "A record of cleaning activities"],
-     "answer": "A recipe or set of instructions for manufacturing a specific product",
-     "explanation": "The MBR contains all necessary information to produce a batch of a specific product.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is a 'Batch Manufacturing Record' (BMR)?",
-     "options": ["The same as an MBR", "A record of the actual manufacturing steps and data for a specific batch",
-                 "A marketing report for a batch", "A list of customer complaints for a batch"],
-     "answer": "A record of the actual manufacturing steps and data for a specific batch",
-     "explanation": "The BMR is completed during manufacturing and shows what actually happened.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is the purpose of wearing gloves in a GMP area?",
-     "options": ["To keep hands warm",
-                 "To protect the product from contamination from hands, and sometimes to protect hands",
-                 "Fashion statement", "Only if your hands are dirty"],
-     "answer": "To protect the product from contamination from hands, and sometimes to protect hands",
-     "explanation": "Gloves act as a barrier between personnel and the product or critical surfaces.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is an 'Audit' in the context of GMP?",
-     "options": ["A financial check", "A systematic and independent examination to determine GMP compliance",
-                 "A company party", "A performance review for an employee"],
-     "answer": "A systematic and independent examination to determine GMP compliance",
-     "explanation": "Audits help verify that GMP principles are being followed correctly.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What does 'Segregation' mean in GMP?", "options": ["Mixing everything together",
-                                                                                           "Keeping different materials or products separate to prevent mix-ups or contamination",
-                                                                                           "A type of company meeting",
-                                                                                           "A cleaning chemical"],
-     "answer": "Keeping different materials or products separate to prevent mix-ups or contamination",
-     "explanation": "Proper segregation is key to preventing errors and contamination.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is the 'Shelf Life' of a product?",
-     "options": ["How long it sits on a shelf before being sold",
-                 "The period during which a product is expected to remain within approved specifications",
-                 "How long the packaging lasts", "The time it takes to manufacture the product"],
-     "answer": "The period during which a product is expected to remain within approved specifications",
-     "explanation": "Shelf life is determined by stability studies and indicates how long a product maintains its quality.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "Why is environmental monitoring important in cleanrooms?",
-     "options": ["To check the weather", "To monitor and control microbial and particulate levels",
-                 "To see if employees are comfortable", "It's not very important"],
-     "answer": "To monitor and control microbial and particulate levels",
-     "explanation": "Environmental monitoring ensures the cleanroom maintains its required level of cleanliness.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is a 'Recall'?", "options": ["Remembering something",
-                                                                          "The process of retrieving a defective or potentially harmful product from the market",
-                                                                          "A type of company holiday",
-                                                                          "A new product launch"],
-     "answer": "The process of retrieving a defective or potentially harmful product from the market",
-     "explanation": "Recalls are initiated to protect public health.", "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What should be done before using a piece of equipment?",
-     "options": ["Assume it's ready", "Check if it's clean, calibrated, and suitable for use",
-                 "Start using it immediately", "Ask a colleague if it's okay"],
-     "answer": "Check if it's clean, calibrated, and suitable for use",
-     "explanation": "Pre-use checks are essential to ensure equipment operates correctly and doesn't compromise product quality.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is 'Pest Control' in GMP?",
-     "options": ["Keeping pets in the facility", "Measures to prevent and control pests like insects and rodents",
-                 "A type of software", "A cleaning schedule"],
-     "answer": "Measures to prevent and control pests like insects and rodents",
-     "explanation": "Pests can be a source of contamination and must be controlled in a GMP facility.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is the significance of 'Line Clearance'?",
-     "options": ["Clearing a path for people to walk",
-                 "Ensuring a production line is free of previous products/materials before starting a new batch",
-                 "The end of the production line", "A type of employee break"],
-     "answer": "Ensuring a production line is free of previous products/materials before starting a new batch",
-     "explanation": "Line clearance prevents mix-ups and cross-contamination between different batches or products.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is 'Data Integrity'?",
-     "options": ["How strong your computer is", "The completeness, consistency, and accuracy of data",
-                 "A type of data backup", "How fast data is processed"],
-     "answer": "The completeness, consistency, and accuracy of data",
-     "explanation": "Data integrity is crucial for making informed decisions and ensuring product quality.",
-     "source": "Basic GMP Principles, ALCOA+"},
-    {"difficulty": "easy", "question": "What is a 'Complaint' in GMP?",
-     "options": ["An employee complaining about work",
-                 "Any report from a customer or user about a product defect or issue", "A suggestion for improvement",
-                 "A type of compliment"],
-     "answer": "Any report from a customer or user about a product defect or issue",
-     "explanation": "Complaints must be documented, investigated, and addressed.", "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is the role of 'Management Review' in a quality system?",
-     "options": ["Reviewing manager salaries",
-                 "A formal evaluation by top management of the quality system's effectiveness", "A weekly team meeting",
-                 "Reviewing marketing campaigns"],
-     "answer": "A formal evaluation by top management of the quality system's effectiveness",
-     "explanation": "Management review ensures the continued suitability and effectiveness of the quality system.",
-     "source": "ICH Q10"},
-    {"difficulty": "easy", "question": "What does 'Aseptic' mean?",
-     "options": ["Very clean", "Free from disease-causing microorganisms", "A type of packaging",
-                 "Related to aesthetics"], "answer": "Free from disease-causing microorganisms",
-     "explanation": "Aseptic processing is used for sterile products to prevent microbial contamination.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "Why are 'Labels' important in GMP?",
-     "options": ["For decoration", "To clearly identify materials, products, and equipment status", "Only for shipping",
-                 "To use up extra paper"], "answer": "To clearly identify materials, products, and equipment status",
-     "explanation": "Proper labeling prevents mix-ups and ensures correct use and identification.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is 'Water for Injection' (WFI)?",
-     "options": ["Any tap water", "Highly purified water used for manufacturing injectable products",
-                 "Bottled mineral water", "Water used for cleaning"],
-     "answer": "Highly purified water used for manufacturing injectable products",
-     "explanation": "WFI must meet strict purity standards to be safe for parenteral use.",
-     "source": "Pharmacopoeias (USP, EP)"},
-    {"difficulty": "easy", "question": "What is 'Quality Control' (QC)?", "options": ["The same as Quality Assurance",
-                                                                                      "The department responsible for testing materials and products against specifications",
-                                                                                      "Controlling the number of products made",
-                                                                                      "A customer service department"],
-     "answer": "The department responsible for testing materials and products against specifications",
-     "explanation": "QC performs testing to ensure products meet their quality standards before release.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is a 'Retained Sample'?",
-     "options": ["A sample that was forgotten", "A sample of a batch of product kept for future reference or testing",
-                 "A sample given to employees", "A rejected sample"],
-     "answer": "A sample of a batch of product kept for future reference or testing",
-     "explanation": "Retained samples are important for complaint investigations or re-testing if needed.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is the basic principle of 'Risk Management' in GMP?",
-     "options": ["Avoiding all risks", "Identifying, evaluating, and controlling potential risks to quality",
-                 "Only for financial risks", "Ignoring minor risks"],
-     "answer": "Identifying, evaluating, and controlling potential risks to quality",
-     "explanation": "A risk-based approach helps focus efforts on what is most critical to product quality.",
-     "source": "ICH Q9"},
-    {"difficulty": "easy", "question": "What is the purpose of an 'Expiry Date' on a product?",
-     "options": ["A suggestion for when to use it",
-                 "The date after which the product should not be used as its quality may be compromised",
-                 "The date it was manufactured", "A marketing trick"],
-     "answer": "The date after which the product should not be used as its quality may be compromised",
-     "explanation": "The expiry date is based on stability testing and ensures product safety and efficacy.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is a 'Sanitization' process?",
-     "options": ["Making something look nice", "Reducing the number of microorganisms to a safe level",
-                 "Sterilizing completely", "A type of mental exercise"],
-     "answer": "Reducing the number of microorganisms to a safe level",
-     "explanation": "Sanitization is a common cleaning step to control microbial contamination on surfaces.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is a 'Certificate of Analysis' (CoA)?",
-     "options": ["A certificate for good analysis skills",
-                 "A document confirming that a batch of material meets its specifications",
-                 "A list of all possible analyses", "A financial report"],
-     "answer": "A document confirming that a batch of material meets its specifications",
-     "explanation": "A CoA provides test results and confirms the quality of a material or product.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is 'Good Documentation Practice' (GDP)?",
-     "options": ["Writing well", "Principles for ensuring data is accurate, legible, and traceable",
-                 "A type of software", "Documenting only good results"],
-     "answer": "Principles for ensuring data is accurate, legible, and traceable",
-     "explanation": "GDP is essential for maintaining data integrity and reliable records.", "source": "WHO, ISPE"},
-    {"difficulty": "easy", "question": "What is an 'Active Pharmaceutical Ingredient' (API)?",
-     "options": ["Any ingredient in a drug", "The biologically active component of a drug product",
-                 "A packaging material", "A cleaning agent"],
-     "answer": "The biologically active component of a drug product",
-     "explanation": "The API is the substance responsible for the therapeutic effect of the drug.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is an 'Excipient'?",
-     "options": ["The main active drug", "An inactive substance formulated alongside the API", "A type of contaminant",
-                 "A piece of equipment"], "answer": "An inactive substance formulated alongside the API",
-     "explanation": "Excipients are used to help deliver the drug, improve stability, or aid manufacturing.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is 'Process Flow' in manufacturing?",
-     "options": ["How water flows in pipes", "The sequence of steps or operations in a manufacturing process",
-                 "Employee movement in the facility", "A type of electrical current"],
-     "answer": "The sequence of steps or operations in a manufacturing process",
-     "explanation": "Understanding the process flow is important for process control and improvement.",
-     "source": "Manufacturing Principles"},
-    {"difficulty": "easy", "question": "Why is 'Temperature Control' important for some products?",
-     "options": ["To make the room comfortable", "To maintain product stability and quality", "Only for hot products",
-                 "It's not usually important"], "answer": "To maintain product stability and quality",
-     "explanation": "Many pharmaceutical products are sensitive to temperature and require controlled storage and transport.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is 'Material Safety Data Sheet' (MSDS) or 'Safety Data Sheet' (SDS)?",
-     "options": ["A list of safe materials",
-                 "A document providing information on the hazards and safe handling of a chemical", "A GMP procedure",
-                 "A product advertisement"],
-     "answer": "A document providing information on the hazards and safe handling of a chemical",
-     "explanation": "SDS is crucial for worker safety when handling chemicals.",
-     "source": "Occupational Safety Regulations"},
-    {"difficulty": "easy", "question": "What does 'Yield' refer to in manufacturing?",
-     "options": ["Giving way to traffic", "The amount of product obtained from a specific amount of starting material",
-                 "Employee salary", "The speed of production"],
-     "answer": "The amount of product obtained from a specific amount of starting material",
-     "explanation": "Yield is a measure of process efficiency and is often monitored.",
-     "source": "Manufacturing Principles"},
-    {"difficulty": "easy", "question": "What is a 'Non-Conformance'?",
-     "options": ["A type of uniform", "A failure to meet a specified requirement", "A successful outcome",
-                 "A company policy"], "answer": "A failure to meet a specified requirement",
-     "explanation": "Non-conformances must be investigated and addressed through the CAPA system.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is the purpose of 'Air Locks' in a cleanroom facility?",
-     "options": ["To lock the air inside",
-                 "To maintain pressure differentials and prevent contaminant ingress between rooms of different cleanliness",
-                 "A place to store air tanks", "A security feature to lock doors"],
-     "answer": "To maintain pressure differentials and prevent contaminant ingress between rooms of different cleanliness",
-     "explanation": "Air locks are critical for maintaining the integrity of cleanroom environments.",
-     "source": "GMP Annex 1, ISO 14644"},
-    {"difficulty": "easy", "question": "What does 'Approved Supplier' mean?",
-     "options": ["Any supplier who is friendly",
-                 "A supplier that has been evaluated and confirmed to meet quality requirements",
-                 "The cheapest supplier", "A supplier located nearby"],
-     "answer": "A supplier that has been evaluated and confirmed to meet quality requirements",
-     "explanation": "Using approved suppliers is important for ensuring the quality of incoming materials.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is 'Preventive Maintenance'?",
-     "options": ["Maintenance done only after equipment breaks", "Scheduled maintenance to prevent equipment failures",
-                 "Preventing employees from doing maintenance", "A type of cleaning"],
-     "answer": "Scheduled maintenance to prevent equipment failures",
-     "explanation": "Preventive maintenance helps ensure equipment reliability and reduces unplanned downtime.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is a 'Finished Product'?", "options": ["A product that is almost ready",
-                                                                                    "A product that has completed all stages of manufacturing, including packaging",
-                                                                                    "Raw materials",
-                                                                                    "A product that has been sold"],
-     "answer": "A product that has completed all stages of manufacturing, including packaging",
-     "explanation": "The finished product is what is ultimately released for distribution and sale.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is the role of 'Sampling Plans' in QC?",
-     "options": ["Plans for taking employee holidays",
-                 "A defined procedure for taking a representative sample of material for testing",
-                 "A map of the facility", "A list of all samples ever taken"],
-     "answer": "A defined procedure for taking a representative sample of material for testing",
-     "explanation": "Proper sampling is crucial to ensure that test results accurately reflect the quality of the entire batch.",
-     "source": "Basic GMP Principles, Statistical Sampling Standards"},
-    {"difficulty": "easy", "question": "What is 'Stability Testing'?", "options": ["Testing how stable an employee is",
-                                                                                   "Testing a product over time under defined conditions to determine its shelf life",
-                                                                                   "Testing the stability of a building",
-                                                                                   "A quick test done once"],
-     "answer": "Testing a product over time under defined conditions to determine its shelf life",
-     "explanation": "Stability studies provide data to support the assigned expiry date of a product.",
-     "source": "ICH Q1A"},
-    {"difficulty": "easy", "question": "What is 'First-Pass Yield'?",
-     "options": ["Yield after the first employee passes by",
-                 "The percentage of units that complete a process and meet quality standards without rework",
-                 "The yield of the first batch ever made", "A type of fishing yield"],
-     "answer": "The percentage of units that complete a process and meet quality standards without rework",
-     "explanation": "It's a common metric for process efficiency and quality.", "source": "Manufacturing Metrics"},
-    {"difficulty": "easy", "question": "What is the primary goal of 'Good Housekeeping' in GMP?",
-     "options": ["To make the facility look nice for auditors",
-                 "To maintain a clean, tidy, and orderly environment to prevent contamination and accidents",
-                 "A specific cleaning company", "A weekly deep clean only"],
-     "answer": "To maintain a clean, tidy, and orderly environment to prevent contamination and accidents",
-     "explanation": "Good housekeeping is a fundamental aspect of maintaining a GMP-compliant facility.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is a 'Controlled Document'?", "options": ["A document that is kept secret",
-                                                                                       "A document that is managed under a formal system for issuance, revision, and distribution",
-                                                                                       "Any document written on a computer",
-                                                                                       "A document that is easy to control"],
-     "answer": "A document that is managed under a formal system for issuance, revision, and distribution",
-     "explanation": "Controlled documents (like SOPs, MBRs) ensure that only current, approved versions are in use.",
-     "source": "Good Documentation Practices (GDP)"},
-    {"difficulty": "easy", "question": "What does 'Work Order' typically mean in a maintenance context?",
-     "options": ["An order to work harder", "A formal document authorizing and detailing specific maintenance tasks",
-                 "A list of all work done in a day", "An employee's job description"],
-     "answer": "A formal document authorizing and detailing specific maintenance tasks",
-     "explanation": "Work orders help plan, track, and document maintenance activities.",
-     "source": "Maintenance Management"},
-    {"difficulty": "easy", "question": "What is an 'Investigation' in GMP often triggered by?",
-     "options": ["Curiosity", "A deviation, OOS result, or complaint", "A new employee starting", "A successful batch"],
-     "answer": "A deviation, OOS result, or complaint",
-     "explanation": "Investigations aim to find the root cause of issues and implement corrective actions.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy",
-     "question": "What is the purpose of 'Status Labeling' (e.g., 'Quarantine', 'Approved', 'Rejected')?",
-     "options": ["To add color to the facility",
-                 "To clearly indicate the current quality status of materials or equipment",
-                 "A system for employee status", "Only used for new materials"],
-     "answer": "To clearly indicate the current quality status of materials or equipment",
-     "explanation": "Status labeling is crucial for preventing the use of incorrect or unapproved materials/equipment.",
-     "source": "Basic GMP Principles"},
-    {"difficulty": "easy", "question": "What is 'Annual Product Review' (APR) or 'Product Quality Review' (PQR)?",
-     "options": ["A review of product marketing",
-                 "A periodic review of a product's manufacturing and quality data to identify trends and areas for improvement",
-                 "A customer satisfaction survey", "A review of the product's price"],
-     "answer": "A periodic review of a product's manufacturing and quality data to identify trends and areas for improvement",
-     "explanation": "APR/PQR helps ensure the consistency of the manufacturing process and the quality of the product.",
-     "source": "FDA 21 CFR 211.180(e), EU GMP Chapter 1"},
-    {"difficulty": "easy", "question": "What is 'Bioburden'?", "options": ["The weight of biological materials",
-                                                                           "The number of microorganisms present on a surface or in a product before sterilization",
-                                                                           "A type of cleaning agent",
-                                                                           "A heavy burden for biologists"],
-     "answer": "The number of microorganisms present on a surface or in a product before sterilization",
-     "explanation": "Monitoring and controlling bioburden is critical, especially for sterile products.",
-     "source": "Microbiology in GMP"},
-    {"difficulty": "easy", "question": "What is the 'Design Qualification' (DQ) stage of validation?",
-     "options": ["Qualifying the designer",
-                 "Documented verification that the proposed design of facilities, systems, and equipment is suitable for the intended purpose",
-                 "The final qualification step", "Designing a qualification plan"],
-     "answer": "Documented verification that the proposed design of facilities, systems, and equipment is suitable for the intended purpose",
-     "explanation": "DQ is typically the first step in the validation lifecycle for new systems/equipment.",
-     "source": "GAMP 5, Validation Principles"},
-    {"difficulty": "easy", "question": "What is 'Installation Qualification' (IQ)?",
-     "options": ["Qualifying the installer",
-                 "Documented verification that equipment or systems, as installed, comply with approved design and manufacturer's recommendations",
-                 "Testing the equipment's operation", "Installing new software"],
-     "answer": "Documented verification that equipment or systems, as installed, comply with approved design and manufacturer's recommendations",
-     "explanation": "IQ confirms that the equipment is installed correctly and safely.",
-     "source": "GAMP 5, Validation Principles"},
-    {"difficulty": "easy", "question": "What is 'Operational Qualification' (OQ)?",
-     "options": ["Qualifying the operator",
-                 "Documented verification that equipment or systems operate as intended throughout anticipated operating ranges",
-                 "The first qualification step", "Checking if the equipment is turned on"],
-     "answer": "Documented verification that equipment or systems operate as intended throughout anticipated operating ranges",
-     "explanation": "OQ tests the functionality of the equipment.", "source": "GAMP 5, Validation Principles"},
-    {"difficulty": "easy", "question": "What is 'Performance Qualification' (PQ)?",
-     "options": ["Reviewing employee performance",
-                 "Documented verification that equipment or systems perform effectively and reproducibly based on the approved process method and specifications",
-                 "The easiest qualification", "Checking if the equipment looks good"],
-     "answer": "Documented verification that equipment or systems perform effectively and reproducibly based on the approved process method and specifications",
-     "explanation": "PQ demonstrates that the equipment consistently produces quality product under normal operating conditions.",
-     "source": "GAMP 5, Validation Principles"},
-
-    # --- 70 Medium GMP Questions ---
-    {"difficulty": "medium", "question": "What is the primary objective of a 'Change Control' system?",
-     "options": ["To prevent all changes",
-                 "To ensure changes are documented, evaluated, approved, and implemented in a controlled manner",
-                 "To speed up changes", "To only document changes after they are made"],
-     "answer": "To ensure changes are documented, evaluated, approved, and implemented in a controlled manner",
-     "explanation": "A robust change control system prevents unintended consequences on product quality or validated systems.",
-     "source": "ICH Q7, ICH Q10"},
-    {"difficulty": "medium", "question": "What does 'ALCOA+' stand for in the context of data integrity?",
-     "options": ["Accurate, Legible, Clear, Original, Attributable + Complete, Consistent, Enduring, Available",
-                 "Attributable, Legible, Contemporaneous, Original, Accurate + Complete, Consistent, Enduring, Available",
-                 "All Labs Must Comply, Otherwise Audit + Critical, Consistent, Enduring, Available",
-                 "Authentic, Logical, Current, Official, Approved + Complete, Corroborated, Enduring, Accessible"],
-     "answer": "Attributable, Legible, Contemporaneous, Original, Accurate + Complete, Consistent, Enduring, Available",
-     "explanation": "ALCOA+ principles are fundamental to ensuring data integrity in GMP environments.",
-     "source": "FDA Data Integrity Guidance, MHRA GxP Data Integrity Guidance"},
-    {"difficulty": "medium", "question": "What is an 'Out of Specification' (OOS) result?",
-     "options": ["A result that is better than expected",
-                 "A test result that falls outside the established acceptance criteria or specifications",
-                 "A result obtained using uncalibrated equipment", "Any result generated by the QC lab"],
-     "answer": "A test result that falls outside the established acceptance criteria or specifications",
-     "explanation": "OOS results require a thorough investigation to determine the cause and impact on the batch.",
-     "source": "FDA Guidance for Industry - Investigating OOS Test Results"},
-    {"difficulty": "medium", "question": "What is the main purpose of 'Process Validation'?",
-     "options": ["To test the final product extensively",
-                 "To establish documented evidence that a process will consistently produce a product meeting its pre-determined specifications and quality attributes",
-                 "To train operators on a new process", "To reduce manufacturing costs"],
-     "answer": "To establish documented evidence that a process will consistently produce a product meeting its pre-determined specifications and quality attributes",
-     "explanation": "Process validation provides assurance that the manufacturing process is reliable and reproducible.",
-     "source": "FDA Process Validation: General Principles and Practices"},
-    {"difficulty": "medium",
-     "question": "What is a 'Corrective Action and Preventive Action' (CAPA) system designed to do?",
-     "options": ["Only punish employees for mistakes", "To collect customer feedback",
-                 "To investigate deviations/non-conformances, identify root causes, implement corrective actions, and prevent recurrence",
-                 "To manage company finances"],
-     "answer": "To investigate deviations/non-conformances, identify root causes, implement corrective actions, and prevent recurrence",
-     "explanation": "An effective CAPA system is a cornerstone of a GMP quality system and drives continuous improvement.",
-     "source": "ICH Q10, FDA 21 CFR 820.100"},
-    {"difficulty": "medium", "question": "What is the significance of 'Data Review' in a QC laboratory?",
-     "options": ["A quick glance at the numbers",
-                 "A thorough check of test data for accuracy, completeness, and compliance before results are approved",
-                 "Only done if there is an OOS", "Performed by the person who generated the data only"],
-     "answer": "A thorough check of test data for accuracy, completeness, and compliance before results are approved",
-     "explanation": "Data review, often by a second person, is critical to ensure the reliability of QC results.",
-     "source": "Laboratory Controls, GDP"},
-    {"difficulty": "medium",
-     "question": "What is meant by 'Worst-Case' conditions in validation studies (e.g., cleaning validation)?",
-     "options": ["The easiest conditions to validate",
-                 "Conditions that represent the most challenging scenario under which a process is still expected to work",
-                 "Conditions that always cause failure", "Randomly selected conditions"],
-     "answer": "Conditions that represent the most challenging scenario under which a process is still expected to work",
-     "explanation": "Validating under worst-case conditions provides confidence that the process will be effective under normal operating ranges.",
-     "source": "Validation Principles"},
-    {"difficulty": "medium",
-     "question": "What is the purpose of an 'Annual Product Review' (APR) or 'Product Quality Review' (PQR)?",
-     "options": ["To decide if a product should be discontinued",
-                 "To verify the consistency of the manufacturing process, assess trends, and identify potential improvements for a product",
-                 "A marketing review of product sales", "A review of employee performance related to a product"],
-     "answer": "To verify the consistency of the manufacturing process, assess trends, and identify potential improvements for a product",
-     "explanation": "APR/PQR is a regulatory requirement and a tool for continuous improvement.",
-     "source": "FDA 21 CFR 211.180(e), EU GMP Chapter 1"},
-    {"difficulty": "medium", "question": "What is 'Qualification of Equipment'?",
-     "options": ["Buying qualified equipment",
-                 "A formal process of documented verification that equipment performs as intended and is suitable for its proposed use",
-                 "Training employees on how to use equipment", "Cleaning equipment before use"],
-     "answer": "A formal process of documented verification that equipment performs as intended and is suitable for its proposed use",
-     "explanation": "Qualification typically involves DQ, IQ, OQ, and PQ stages.",
-     "source": "GAMP 5, Validation Principles"},
-    {"difficulty": "medium", "question": "What is the difference between 'Cleaning' and 'Sanitization'?",
-     "options": ["They are the same thing",
-                 "Cleaning removes visible dirt; sanitization reduces microorganisms to a safe level",
-                 "Sanitization is only for food", "Cleaning is done with water, sanitization with chemicals"],
-     "answer": "Cleaning removes visible dirt; sanitization reduces microorganisms to a safe level",
-     "explanation": "Cleaning is usually a prerequisite for effective sanitization or disinfection.",
-     "source": "GMP Cleaning Principles"},
-    {"difficulty": "medium", "question": "What is a 'Stability Indicating Method' in analytical testing?",
-     "options": ["A method that is very stable to perform",
-                 "An analytical method that can accurately detect changes in the drug substance or drug product over time (e.g., degradation products)",
-                 "A method used only for stability studies", "A quick and easy analytical method"],
-     "answer": "An analytical method that can accurately detect changes in the drug substance or drug product over time (e.g., degradation products)",
-     "explanation": "Such methods are crucial for accurately determining the shelf life of a product.",
-     "source": "ICH Q1A, ICH Q2"},
-    {"difficulty": "medium",
-     "question": "What is the role of a 'Responsible Person' or 'Qualified Person' (QP) in EU GMP?",
-     "options": ["The most responsible employee",
-                 "A legally designated person responsible for certifying that each batch of medicinal product has been manufactured and tested in accordance with GMP and the marketing authorization",
-                 "The head of manufacturing", "A quality control analyst"],
-     "answer": "A legally designated person responsible for certifying that each batch of medicinal product has been manufactured and tested in accordance with GMP and the marketing authorization",
-     "explanation": "The QP plays a critical role in the release of pharmaceutical products to the EU market.",
-     "source": "EU GMP Annex 16"},
-    {"difficulty": "medium", "question": "What is 'Technology Transfer' in pharmaceuticals?",
-     "options": ["Transferring technology to another company for money",
-                 "A documented process that transfers manufacturing processes and analytical methods from one site or scale to another (e.g., from R&D to production)",
-                 "Upgrading computer systems", "Training on new software"],
-     "answer": "A documented process that transfers manufacturing processes and analytical methods from one site or scale to another (e.g., from R&D to production)",
-     "explanation": "Successful technology transfer ensures the receiving unit can consistently produce quality product.",
-     "source": "ICH Q10, WHO TRS 961 Annex 7"},
-    {"difficulty": "medium",
-     "question": "What is the purpose of 'Environmental Monitoring' in aseptic processing areas?",
-     "options": ["To check the outside weather",
-                 "To regularly assess the microbiological and particulate quality of the manufacturing environment (air, surfaces, personnel)",
-                 "To monitor employee comfort", "To save energy"],
-     "answer": "To regularly assess the microbiological and particulate quality of the manufacturing environment (air, surfaces, personnel)",
-     "explanation": "It provides an indication of the control over the aseptic environment.",
-     "source": "GMP Annex 1, USP <1116>"},
-    {"difficulty": "medium", "question": "What is a 'Master Validation Plan' (MVP)?",
-     "options": ["A plan for validating all company masters degrees",
-                 "A high-level document that describes the company's overall validation strategy, responsibilities, and the systems/processes to be validated",
-                 "A list of all validation activities completed", "A plan for a single validation project"],
-     "answer": "A high-level document that describes the company's overall validation strategy, responsibilities, and the systems/processes to be validated",
-     "explanation": "The MVP provides a roadmap for the company's validation program.",
-     "source": "Validation Principles"},
-    {"difficulty": "medium", "question": "What is 'Mean Kinetic Temperature' (MKT)?",
-     "options": ["The average temperature",
-                 "A single calculated temperature at which the total amount of degradation over a particular period is equal to the sum of the individual degradations that would occur at various temperatures",
-                 "The temperature of a moving object", "The highest temperature recorded"],
-     "answer": "A single calculated temperature at which the total amount of degradation over a particular period is equal to the sum of the individual degradations that would occur at various temperatures",
-     "explanation": "MKT is used to evaluate the impact of temperature excursions on product stability.",
-     "source": "ICH Q1A, USP <1079>"},
-    {"difficulty": "medium", "question": "What is the significance of 'Column Efficiency' in chromatography?",
-     "options": ["How efficiently the column is packed",
-                 "A measure of the column's ability to produce narrow peaks, indicating good separation",
-                 "How long the column lasts", "The cost of the column"],
-     "answer": "A measure of the column's ability to produce narrow peaks, indicating good separation",
-     "explanation": "It's often expressed as the number of theoretical plates (N). Higher N means better efficiency.",
-     "source": "Analytical Chemistry, Chromatography Principles"},
-    {"difficulty": "medium",
-     "question": "What is a 'Quality Agreement' between a contract manufacturer and a contract giver?",
-     "options": ["An agreement to always provide high quality",
-                 "A legally binding document that defines the specific GMP responsibilities of each party",
-                 "An informal understanding", "A price list for quality services"],
-     "answer": "A legally binding document that defines the specific GMP responsibilities of each party",
-     "explanation": "Quality agreements are crucial for ensuring clarity and compliance in outsourced GMP activities.",
-     "source": "ICH Q7, ICH Q10, FDA Contract Manufacturing Guidance"},
-    {"difficulty": "medium", "question": "What is 'Aseptic Gowning Qualification'?",
-     "options": ["Buying qualified gowns",
-                 "A program to ensure personnel can consistently don sterile garments without compromising their sterility or the aseptic environment",
-                 "A test of how fast personnel can gown", "A one-time training"],
-     "answer": "A program to ensure personnel can consistently don sterile garments without compromising their sterility or the aseptic environment",
-     "explanation": "It involves initial training, observation, and microbiological monitoring.",
-     "source": "GMP Annex 1"},
-    {"difficulty": "medium", "question": "What is the purpose of 'Smoke Studies' in cleanrooms?",
-     "options": ["To test fire alarms",
-                 "To visualize airflow patterns and verify that air is moving as designed (e.g., unidirectionally, away from critical areas)",
-                 "To create a smoky atmosphere", "To check for leaks in the room"],
-     "answer": "To visualize airflow patterns and verify that air is moving as designed (e.g., unidirectionally, away from critical areas)",
-     "explanation": "Smoke studies help identify areas of turbulence or poor airflow that could pose a contamination risk.",
-     "source": "GMP Annex 1, ISO 14644-3"},
-    {"difficulty": "medium", "question": "What is 'Bracketing' in validation studies?",
-     "options": ["Using brackets in documents",
-                 "Validating only the extremes (e.g., smallest and largest sizes) of a range of similar products or equipment, assuming intermediate sizes are also covered",
-                 "Putting items in brackets", "A type of statistical analysis"],
-     "answer": "Validating only the extremes (e.g., smallest and largest sizes) of a range of similar products or equipment, assuming intermediate sizes are also covered",
-     "explanation": "Bracketing can reduce validation effort but requires strong justification.",
-     "source": "Validation Principles, ICH Q1D"},
-    {"difficulty": "medium", "question": "What is 'Matrixing' in stability testing?",
-     "options": ["A type of mathematical matrix",
-                 "Testing only a subset of samples at specific time points, assuming stability of intermediate samples can be inferred",
-                 "A type of data storage", "A complex experimental design"],
-     "answer": "Testing only a subset of samples at specific time points, assuming stability of intermediate samples can be inferred",
-     "explanation": "Matrixing can reduce the number of stability samples tested but needs careful design and justification.",
-     "source": "ICH Q1A, ICH Q1D"},
-    {"difficulty": "medium", "question": "What is a 'Reference Standard' in analytical testing?",
-     "options": ["A standard textbook",
-                 "A highly purified substance of known quality used as a benchmark for testing other samples",
-                 "The first sample tested", "A standard operating procedure"],
-     "answer": "A highly purified substance of known quality used as a benchmark for testing other samples",
-     "explanation": "Reference standards are crucial for the accuracy and reliability of quantitative analytical results.",
-     "source": "Pharmacopoeias (USP, EP), ICH Q7"},
-    {"difficulty": "medium", "question": "What is 'Container Closure Integrity Testing' (CCIT)?",
-     "options": ["Testing if a container can be closed",
-                 "Evaluating the ability of a container closure system to maintain a sterile barrier and prevent leakage or contamination",
-                 "Testing the strength of the container", "A visual inspection of the closure"],
-     "answer": "Evaluating the ability of a container closure system to maintain a sterile barrier and prevent leakage or contamination",
-     "explanation": "CCIT is critical for sterile products to ensure product sterility throughout its shelf life.",
-     "source": "USP <1207>"},
-    {"difficulty": "medium", "question": "What is the 'Limit of Detection' (LOD) of an analytical method?",
-     "options": ["The limit of how much can be detected",
-                 "The lowest amount of analyte in a sample that can be detected but not necessarily quantitated as an exact value",
-                 "The highest amount that can be detected", "A limit set by the lab manager"],
-     "answer": "The lowest amount of analyte in a sample that can be detected but not necessarily quantitated as an exact value",
-     "explanation": "LOD indicates the sensitivity of an analytical method for detecting an analyte.",
-     "source": "ICH Q2(R1)"},
-    {"difficulty": "medium", "question": "What is the 'Limit of Quantitation' (LOQ) of an analytical method?",
-     "options": ["The limit of how much can be quantified",
-                 "The lowest amount of analyte in a sample that can be quantitatively determined with suitable precision and accuracy",
-                 "The highest amount that can be quantified", "A limit for the number of samples"],
-     "answer": "The lowest amount of analyte in a sample that can be quantitatively determined with suitable precision and accuracy",
-     "explanation": "LOQ is important for methods used to measure low levels of analytes, such as impurities.",
-     "source": "ICH Q2(R1)"},
-    {"difficulty": "medium", "question": "What is 'Process Analytical Technology' (PAT)?",
-     "options": ["Technology used by analysts",
-                 "A system for designing, analyzing, and controlling manufacturing through timely measurements of critical quality and performance attributes of raw and in-process materials and processes",
-                 "A specific analytical instrument", "A patent for an analytical process"],
-     "answer": "A system for designing, analyzing, and controlling manufacturing through timely measurements of critical quality and performance attributes of raw and in-process materials and processes",
-     "explanation": "PAT aims to build quality into the product by understanding and controlling the process in real-time or near real-time.",
-     "source": "FDA PAT Guidance, ICH Q8"},
-    {"difficulty": "medium", "question": "What is a 'Design Space' in the context of ICH Q8?",
-     "options": ["The space where designers work",
-                 "The multidimensional combination and interaction of input variables and process parameters that have been demonstrated to provide assurance of quality",
-                 "A specific room in the facility", "A theoretical concept with no practical use"],
-     "answer": "The multidimensional combination and interaction of input variables and process parameters that have been demonstrated to provide assurance of quality",
-     "explanation": "Operating within the design space is not considered a change and provides operational flexibility.",
-     "source": "ICH Q8 Pharmaceutical Development"},
-    {"difficulty": "medium", "question": "What is 'Quality by Design' (QbD)?",
-     "options": ["Designing high-quality products",
-                 "A systematic approach to development that begins with predefined objectives and emphasizes product and process understanding and process control, based on sound science and quality risk management",
-                 "A design review meeting", "A marketing strategy for quality products"],
-     "answer": "A systematic approach to development that begins with predefined objectives and emphasizes product and process understanding and process control, based on sound science and quality risk management",
-     "explanation": "QbD aims to build quality into the product from the design stage rather than testing it in.",
-     "source": "ICH Q8, ICH Q9, ICH Q10"},
-    {"difficulty": "medium", "question": "What is a 'Critical Process Parameter' (CPP)?",
-     "options": ["A parameter that is critical to measure",
-                 "A process parameter whose variability has an impact on a critical quality attribute (CQA) and therefore should be monitored or controlled to ensure the process produces the desired quality",
-                 "The most difficult parameter to control", "A parameter that often fails"],
-     "answer": "A process parameter whose variability has an impact on a critical quality attribute (CQA) and therefore should be monitored or controlled to ensure the process produces the desired quality",
-     "explanation": "Identification and control of CPPs are key elements of QbD and process validation.",
-     "source": "ICH Q8"},
-    {"difficulty": "medium", "question": "What is a 'Critical Material Attribute' (CMA)?",
-     "options": ["An attribute of a very important material",
-                 "A physical, chemical, biological or microbiological property or characteristic of an input material that should be within an appropriate limit, range, or distribution to ensure the desired quality of output material",
-                 "The cost of a material", "An attribute that is difficult to test"],
-     "answer": "A physical, chemical, biological or microbiological property or characteristic of an input material that should be within an appropriate limit, range, or distribution to ensure the desired quality of output material",
-     "explanation": "CMAs of starting materials and intermediates impact the CQAs of the final product.",
-     "source": "ICH Q8"},
-    {"difficulty": "medium", "question": "What is 'Real-Time Release Testing' (RTRT)?",
-     "options": ["Testing products very quickly",
-                 "The ability to evaluate and ensure the quality of in-process and/or final product based on process data, which typically include a valid combination of measured material attributes and process controls",
-                 "Releasing products in real time as they are made", "A type of software for release"],
-     "answer": "The ability to evaluate and ensure the quality of in-process and/or final product based on process data, which typically include a valid combination of measured material attributes and process controls",
-     "explanation": "RTRT can reduce or eliminate end-product testing if the process is well understood and controlled.",
-     "source": "ICH Q8, FDA PAT Guidance"},
-    {"difficulty": "medium", "question": "What is a 'Biological Indicator' (BI) used for in sterilization validation?",
-     "options": ["An indicator of biological activity in the room",
-                 "A characterized preparation of specific microorganisms resistant to a particular sterilization process, used to demonstrate the effectiveness of that process",
-                 "A type of plant used in labs", "An indicator that turns color when wet"],
-     "answer": "A characterized preparation of specific microorganisms resistant to a particular sterilization process, used to demonstrate the effectiveness of that process",
-     "explanation": "If the BIs are killed, it provides assurance that the sterilization process was effective.",
-     "source": "USP <1229>, ISO 11138"},
-    {"difficulty": "medium", "question": "What is a 'Chemical Indicator' (CI) used for in sterilization processes?",
-     "options": ["An indicator of chemical spills",
-                 "A system that reveals a change in one or more pre-defined process variables based on a chemical or physical change resulting from exposure to a process",
-                 "A pH indicator", "An indicator that detects specific chemicals"],
-     "answer": "A system that reveals a change in one or more pre-defined process variables based on a chemical or physical change resulting from exposure to a process",
-     "explanation": "CIs provide a quick visual confirmation that items have been exposed to the sterilization process but do not prove sterility.",
-     "source": "ISO 11140"},
-    {"difficulty": "medium", "question": "What is 'Parametric Release'?",
-     "options": ["Releasing products based on parameters set by marketing",
-                 "A system of release that gives the assurance that the product is of the intended quality based on information collected during the manufacturing process and on the compliance with specific GMP requirements related to parametric release",
-                 "Releasing only a parameter of the product", "A type of statistical release"],
-     "answer": "A system of release that gives the assurance that the product is of the intended quality based on information collected during the manufacturing process and on the compliance with specific GMP requirements related to parametric release",
-     "explanation": "Parametric release can replace certain end-product sterility tests if the sterilization process is robustly validated and monitored.",
-     "source": "GMP Annex 17"},
-    {"difficulty": "medium", "question": "What is a 'Pharmacopoeia' (e.g., USP, EP, JP)?",
-     "options": ["A pharmacy encyclopedia",
-                 "A legally binding collection of standards and quality specifications for medicines, excipients, and analytical methods",
-                 "A history of pharmacy", "A journal for pharmacists"],
-     "answer": "A legally binding collection of standards and quality specifications for medicines, excipients, and analytical methods",
-     "explanation": "Compliance with pharmacopoeial standards is often a regulatory requirement.",
-     "source": "General Knowledge"},
-    {"difficulty": "medium",
-     "question": "What is the purpose of 'Airflow Visualization Studies' (e.g., smoke studies)?",
-     "options": ["To make the cleanroom look misty",
-                 "To demonstrate that airflow patterns within a cleanroom or controlled environment are suitable to protect the product from contamination",
-                 "To test the fire alarm system's smoke detectors", "To measure airflow speed only"],
-     "answer": "To demonstrate that airflow patterns within a cleanroom or controlled environment are suitable to protect the product from contamination",
-     "explanation": "These studies help identify and correct any undesirable airflow patterns that could compromise sterility or product quality.",
-     "source": "EU GMP Annex 1, ISO 14644-3"},
-    {"difficulty": "medium", "question": "What is 'Extractables and Leachables' testing primarily concerned with?",
-     "options": ["Extracting active ingredients",
-                 "Identifying and quantifying chemical compounds that migrate from container closure systems, processing equipment, or packaging into the drug product",
-                 "Leaching color from the product", "Testing how much can be extracted from a plant"],
-     "answer": "Identifying and quantifying chemical compounds that migrate from container closure systems, processing equipment, or packaging into the drug product",
-     "explanation": "These compounds can pose a safety risk or affect product stability and efficacy.",
-     "source": "PQRI Guidelines, USP <1663>, <1664>"},
-    {"difficulty": "medium", "question": "What is a 'Validation Protocol'?",
-     "options": ["A summary of validation results",
-                 "A written plan stating how validation will be conducted, including test parameters, product characteristics, equipment, and acceptance criteria",
-                 "A list of all validation SOPs", "A certificate issued after successful validation"],
-     "answer": "A written plan stating how validation will be conducted, including test parameters, product characteristics, equipment, and acceptance criteria",
-     "explanation": "The protocol must be approved before validation activities begin.",
-     "source": "Validation Principles"},
-    {"difficulty": "medium", "question": "What is a 'Validation Report'?",
-     "options": ["A report on why validation is needed",
-                 "A document that summarizes the results of validation activities, analyzes the data, and states whether the acceptance criteria were met",
-                 "A daily report during validation", "A request to perform validation"],
-     "answer": "A document that summarizes the results of validation activities, analyzes the data, and states whether the acceptance criteria were met",
-     "explanation": "The validation report provides documented evidence of the validation outcome.",
-     "source": "Validation Principles"},
-    {"difficulty": "medium", "question": "What is 'Media Fill' in aseptic processing validation?",
-     "options": ["Filling containers with social media content",
-                 "A process simulation where a sterile microbiological growth medium is processed in the same way as the drug product to assess the sterility assurance of the process",
-                 "Filling media bottles for the lab", "A type of food for microorganisms"],
-     "answer": "A process simulation where a sterile microbiological growth medium is processed in the same way as the drug product to assess the sterility assurance of the process",
-     "explanation": "If no growth occurs in the processed media units, it provides confidence in the aseptic process.",
-     "source": "GMP Annex 1, FDA Aseptic Processing Guide"},
-    {"difficulty": "medium", "question": "What is the 'Zone Concept' in cleanroom design (e.g., Grade A, B, C, D)?",
-     "options": ["Different time zones for working",
-                 "Defining areas of different cleanliness levels, with stricter controls in areas where the product is more exposed",
-                 "Naming zones in the facility", "Zones for different types of equipment"],
-     "answer": "Defining areas of different cleanliness levels, with stricter controls in areas where the product is more exposed",
-     "explanation": "For example, Grade A (critical zone) is typically a localized environment for high-risk operations within a Grade B background.",
-     "source": "EU GMP Annex 1"},
-    {"difficulty": "medium", "question": "What is 'Unidirectional Airflow' (formerly Laminar Flow)?",
-     "options": ["Air flowing in one random direction",
-                 "An airflow moving in a single direction, in parallel paths, and at a constant velocity, sweeping particles away from critical areas",
-                 "Air that flows in circles", "Air that is very slow"],
-     "answer": "An airflow moving in a single direction, in parallel paths, and at a constant velocity, sweeping particles away from critical areas",
-     "explanation": "Unidirectional airflow is critical for protecting exposed sterile products and surfaces in Grade A zones.",
-     "source": "GMP Annex 1, ISO 14644"},
-    {"difficulty": "medium", "question": "What is the purpose of 'Glove Integrity Testing' for isolators or RABS?",
-     "options": ["To test if gloves fit well",
-                 "To detect leaks or holes in gloves that could compromise the sterile barrier",
-                 "To see how strong the glove material is", "A test performed only when new gloves are purchased"],
-     "answer": "To detect leaks or holes in gloves that could compromise the sterile barrier",
-     "explanation": "Regular glove integrity testing is crucial for maintaining the sterility of barrier systems.",
-     "source": "GMP Annex 1, PDA TR No. 27"},
-    {"difficulty": "medium", "question": "What is a 'Risk-Based Approach' to GMP?", "options": ["Ignoring all risks",
-                                                                                                "Using scientific knowledge and experience to identify, analyze, evaluate, control, communicate, and review risks to product quality throughout the product lifecycle",
-                                                                                                "Only focusing on high-risk products",
-                                                                                                "A way to avoid GMP requirements"],
-     "answer": "Using scientific knowledge and experience to identify, analyze, evaluate, control, communicate, and review risks to product quality throughout the product lifecycle",
-     "explanation": "This approach allows resources to be focused on areas of higher risk to patient safety and product quality.",
-     "source": "ICH Q9 Quality Risk Management"},
-    {"difficulty": "medium", "question": "What is a 'Supplier Audit'?",
-     "options": ["An audit of your company by a supplier",
-                 "An audit conducted by a manufacturer at a supplier's facility to assess their quality systems and GMP compliance",
-                 "A financial audit of a supplier", "An informal visit to a supplier"],
-     "answer": "An audit conducted by a manufacturer at a supplier's facility to assess their quality systems and GMP compliance",
-     "explanation": "Supplier audits are a key part of supplier qualification and ongoing monitoring.",
-     "source": "Supplier Management, ICH Q10"},
-    {"difficulty": "medium", "question": "What is 'Contamination Control Strategy' (CCS)?",
-     "options": ["A strategy to control all company costs",
-                 "A planned set of controls for microorganisms, pyrogens, and particulates, derived from current product and process understanding that assures process performance and product quality",
-                 "A list of all contaminants", "A cleaning schedule"],
-     "answer": "A planned set of controls for microorganisms, pyrogens, and particulates, derived from current product and process understanding that assures process performance and product quality",
-     "explanation": "The CCS is a key concept in the revised EU GMP Annex 1, emphasizing a holistic approach to preventing contamination.",
-     "source": "EU GMP Annex 1 (revised)"},
-    {"difficulty": "medium", "question": "What is 'Water System Validation'?",
-     "options": ["Validating the local water supply",
-                 "Documented evidence that a pharmaceutical water system is designed, installed, operates, and performs consistently to produce water of the required quality",
-                 "Testing tap water", "A one-time check of the water system"],
-     "answer": "Documented evidence that a pharmaceutical water system is designed, installed, operates, and performs consistently to produce water of the required quality",
-     "explanation": "This involves multiple phases of qualification and ongoing monitoring.",
-     "source": "USP <1231>, EP Monograph for Purified Water/WFI"},
-    {"difficulty": "medium", "question": "What is 'Computer System Validation' (CSV)?",
-     "options": ["Validating all computers in the company",
-                 "Documented evidence that a computerized system does what it purports to do, consistently and reliably, and is fit for its intended use",
-                 "Installing antivirus software", "Training employees on how to use computers"],
-     "answer": "Documented evidence that a computerized system does what it purports to do, consistently and reliably, and is fit for its intended use",
-     "explanation": "CSV is critical for GMP-regulated computerized systems that impact product quality or data integrity.",
-     "source": "GAMP 5, FDA 21 CFR Part 11"},
-    {"difficulty": "medium", "question": "What is '21 CFR Part 11'?", "options": ["A chapter in a GMP textbook",
-                                                                                  "A US FDA regulation that provides criteria for acceptance of electronic records, electronic signatures, and handwritten signatures executed to electronic records as equivalent to paper records and handwritten signatures executed on paper",
-                                                                                  "A European regulation",
-                                                                                  "A guideline for cleaning"],
-     "answer": "A US FDA regulation that provides criteria for acceptance of electronic records, electronic signatures, and handwritten signatures executed to electronic records as equivalent to paper records and handwritten signatures executed on paper",
-     "explanation": "It sets requirements for ensuring the trustworthiness and reliability of electronic records and signatures in GMP environments.",
-     "source": "US FDA"},
-    {"difficulty": "medium",
-     "question": "What is a 'User Requirement Specification' (URS) in equipment/system qualification?",
-     "options": ["A list of what users like",
-                 "A document that specifies what the user wants the equipment or system to do, outlining the functional and operational needs",
-                 "The equipment manual", "A purchase order for the equipment"],
-     "answer": "A document that specifies what the user wants the equipment or system to do, outlining the functional and operational needs",
-     "explanation": "The URS is a foundational document for designing and qualifying new equipment or systems.",
-     "source": "GAMP 5"},
-    {"difficulty": "medium", "question": "What is 'Traceability Matrix' in validation?",
-     "options": ["A matrix for tracking employees",
-                 "A document that traces requirements (e.g., from URS) through design, development, and testing to ensure all requirements are met and verified",
-                 "A type of mathematical matrix", "A list of all traceable items"],
-     "answer": "A document that traces requirements (e.g., from URS) through design, development, and testing to ensure all requirements are met and verified",
-     "explanation": "It provides a clear link between what was required and what was delivered and tested.",
-     "source": "Validation Principles, GAMP 5"},
-    {"difficulty": "medium", "question": "What is 'Retrospective Validation'?",
-     "options": ["Validating something you forgot to do",
-                 "Validation of a process for a product already in distribution based upon accumulated production, testing, and control data",
-                 "A less reliable form of validation", "Validating old equipment"],
-     "answer": "Validation of a process for a product already in distribution based upon accumulated production, testing, and control data",
-     "explanation": "Retrospective validation is generally discouraged and only acceptable in specific, justified circumstances when extensive historical data exists.",
-     "source": "FDA Process Validation Guidance (historical context)"},
-    {"difficulty": "medium", "question": "What is 'Concurrent Validation'?",
-     "options": ["Validating two things at the same time",
-                 "Validation carried out during routine production of product intended for sale",
-                 "A quick validation method", "Validation performed by concurrent employees"],
-     "answer": "Validation carried out during routine production of product intended for sale",
-     "explanation": "Concurrent validation is used in specific circumstances, e.g., when product demand is high or batches are infrequent, and requires a robust protocol.",
-     "source": "FDA Process Validation Guidance"},
-    {"difficulty": "medium", "question": "What is 'Prospective Validation'?", "options": ["Validating future prospects",
-                                                                                          "Validation conducted before the process is put into routine production or before product is distributed",
-                                                                                          "A type of financial validation",
-                                                                                          "The most expensive validation"],
-     "answer": "Validation conducted before the process is put into routine production or before product is distributed",
-     "explanation": "Prospective validation is the preferred and most common approach for new processes and products.",
-     "source": "FDA Process Validation Guidance"},
-    {"difficulty": "medium", "question": "What is 'GAMP 5'?", "options": ["A video game",
-                                                                          "A Good Automated Manufacturing Practice guide for validation of automated systems in pharmaceutical manufacturing",
-                                                                          "A type of GMP audit", "A government agency"],
-     "answer": "A Good Automated Manufacturing Practice guide for validation of automated systems in pharmaceutical manufacturing",
-     "explanation": "GAMP 5 provides a risk-based framework for validating computerized systems.",
-     "source": "ISPE (International Society for Pharmaceutical Engineering)"},
-    {"difficulty": "medium", "question": "What is 'ICH' and what is its primary role?",
-     "options": ["International Cleaning House; sets cleaning standards",
-                 "International Council for Harmonisation of Technical Requirements for Pharmaceuticals for Human Use; develops guidelines to ensure safe, effective, and high-quality medicines are developed and registered efficiently",
-                 "Internal Company Handbook; employee guide",
-                 "International Chemical Hazards; lists dangerous chemicals"],
-     "answer": "International Council for Harmonisation of Technical Requirements for Pharmaceuticals for Human Use; develops guidelines to ensure safe, effective, and high-quality medicines are developed and registered efficiently",
-     "explanation": "ICH guidelines are widely adopted by regulatory authorities globally.", "source": "ICH Website"},
-    {"difficulty": "medium", "question": "What is the focus of ICH Q7?",
-     "options": ["Quality Risk Management", "Good Manufacturing Practice Guide for Active Pharmaceutical Ingredients",
-                 "Pharmaceutical Development", "Pharmaceutical Quality System"],
-     "answer": "Good Manufacturing Practice Guide for Active Pharmaceutical Ingredients",
-     "explanation": "ICH Q7 provides detailed GMP guidance for the manufacturing of APIs.", "source": "ICH Q7"},
-    {"difficulty": "medium", "question": "What is the focus of ICH Q9?",
-     "options": ["Stability Testing", "Quality Risk Management", "Analytical Validation",
-                 "Pharmaceutical Quality System"], "answer": "Quality Risk Management",
-     "explanation": "ICH Q9 provides principles and examples of tools for quality risk management that can be applied to different aspects of pharmaceutical quality.",
-     "source": "ICH Q9"},
-    {"difficulty": "medium", "question": "What is the focus of ICH Q10?",
-     "options": ["Good Manufacturing Practice for APIs", "Pharmaceutical Quality System",
-                 "Impurities in New Drug Substances", "Validation of Analytical Procedures"],
-     "answer": "Pharmaceutical Quality System",
-     "explanation": "ICH Q10 describes a model for an effective pharmaceutical quality system that applies throughout the product lifecycle.",
-     "source": "ICH Q10"},
-    {"difficulty": "medium", "question": "What is a 'Type I Water' according to USP/EP specifications?",
-     "options": ["Tap water",
-                 "The highest grade of purified water, typically used for critical analytical applications",
-                 "Water for Injection", "Water for cleaning"],
-     "answer": "The highest grade of purified water, typically used for critical analytical applications",
-     "explanation": "Type I water has very low levels of ionic, organic, and particulate contaminants.",
-     "source": "USP <1231>, EP monograph for Purified Water"},
-    {"difficulty": "medium", "question": "What is 'Endotoxin' (or Lipopolysaccharide - LPS)?",
-     "options": ["A toxin found only on the ends of bacteria",
-                 "A component of the outer membrane of Gram-negative bacteria that can cause fever and other adverse reactions if present in injectable drug products",
-                 "A type of cleaning agent", "A beneficial bacteria"],
-     "answer": "A component of the outer membrane of Gram-negative bacteria that can cause fever and other adverse reactions if present in injectable drug products",
-     "explanation": "Control and testing for endotoxins (pyrogens) are critical for parenteral drugs.",
-     "source": "Microbiology, USP <85> Bacterial Endotoxins Test"},
-    {"difficulty": "medium", "question": "What is the 'LAL Test' (Limulus Amebocyte Lysate Test)?",
-     "options": ["A test for laughing gas",
-                 "An in vitro assay used for the detection and quantification of bacterial endotoxins",
-                 "A test for animal allergies", "A type of liver function test"],
-     "answer": "An in vitro assay used for the detection and quantification of bacterial endotoxins",
-     "explanation": "The LAL test is a widely used method for endotoxin testing in the pharmaceutical industry.",
-     "source": "USP <85>"},
-    {"difficulty": "medium", "question": "What is 'Depyrogenation'?", "options": ["Making someone less angry",
-                                                                                  "A process used to remove or inactivate pyrogens (primarily endotoxins) from materials or equipment",
-                                                                                  "A type of fire extinguishing method",
-                                                                                  "Cooling down a product"],
-     "answer": "A process used to remove or inactivate pyrogens (primarily endotoxins) from materials or equipment",
-     "explanation": "Common methods include dry heat (for glassware) or ultrafiltration (for solutions).",
-     "source": "Sterilization & Aseptic Processing"},
-    {"difficulty": "medium", "question": "What is a 'Material Review Board' (MRB)?",
-     "options": ["A board that reviews new materials for purchase",
-                 "A cross-functional team responsible for reviewing and making decisions on non-conforming materials or products",
-                 "A group of material suppliers", "A library for materials"],
-     "answer": "A cross-functional team responsible for reviewing and making decisions on non-conforming materials or products",
-     "explanation": "The MRB decides whether non-conforming material can be reworked, used-as-is (with justification), or must be rejected.",
-     "source": "Quality Management Systems"},
-    {"difficulty": "medium", "question": "What is 'Clean Hold Time' in cleaning validation?",
-     "options": ["How long it takes to clean",
-                 "The maximum time equipment can be held in a clean state before it needs to be re-cleaned or used",
-                 "The time equipment is held for cleaning", "A type of cleaning chemical"],
-     "answer": "The maximum time equipment can be held in a clean state before it needs to be re-cleaned or used",
-     "explanation": "This study ensures that equipment does not become re-contaminated during storage after cleaning.",
-     "source": "Cleaning Validation Principles"},
-    {"difficulty": "medium", "question": "What is 'Dirty Hold Time' in cleaning validation?",
-     "options": ["How long equipment stays dirty",
-                 "The maximum time equipment can be held in a dirty state after use and before cleaning, without adversely affecting the cleaning process effectiveness",
-                 "The time it takes for dirt to appear", "A measure of how dirty equipment is"],
-     "answer": "The maximum time equipment can be held in a dirty state after use and before cleaning, without adversely affecting the cleaning process effectiveness",
-     "explanation": "This study ensures that residues do not become more difficult to clean over time.",
-     "source": "Cleaning Validation Principles"},
-
-    # --- 70 Hard GMP Questions ---
-    {"difficulty": "hard",
-     "question": "In the context of ICH Q9 (Quality Risk Management), what is the primary difference between 'risk assessment' and 'risk control'?",
-     "options": ["Assessment identifies hazards, control eliminates them",
-                 "Assessment is qualitative, control is quantitative",
-                 "Assessment involves identification, analysis, and evaluation of risk; control involves reducing or accepting risks",
-                 "Assessment is done by QA, control by production"],
-     "answer": "Assessment involves identification, analysis, and evaluation of risk; control involves reducing or accepting risks",
-     "explanation": "Risk assessment is the overall process of risk identification, analysis, and evaluation. Risk control focuses on decision-making to reduce and/or accept risks.",
-     "source": "ICH Q9 Quality Risk Management"},
-    {"difficulty": "hard",
-     "question": "What is the primary purpose of a 'Continued Process Verification' (CPV) program as outlined in FDA's Process Validation guidance (Stage 3)?",
-     "options": ["To revalidate the entire process annually",
-                 "An ongoing program to collect and analyze process data to ensure the process remains in a state of control during routine commercial manufacture",
-                 "To validate only new products", "To replace annual product reviews"],
-     "answer": "An ongoing program to collect and analyze process data to ensure the process remains in a state of control during routine commercial manufacture",
-     "explanation": "CPV (Stage 3) ensures that the process remains in a validated state throughout its lifecycle by continually monitoring process parameters and quality attributes.",
-     "source": "FDA Process Validation Guidance (Stage 3)"},
-    {"difficulty": "hard",
-     "question": "According to EU GMP Annex 1 (Manufacture of Sterile Medicinal Products), what is the maximum permitted number of particles ≥0.5 µm/m³ for a Grade A environment 'at rest'?",
-     "options": ["3,520", "352,000", "20", "29"], "answer": "3,520",
-     "explanation": "For Grade A 'at rest', the limit for particles ≥0.5 µm/m³ is 3,520. The limit for ≥5.0 µm/m³ is 29 (revised Annex 1, 2022).",
-     "source": "EU GMP Annex 1 (2022 Revision)"},
-    {"difficulty": "hard",
-     "question": "What is a key consideration when validating a 'Sterilizing Grade Filter' as per PDA Technical Report No. 26?",
-     "options": ["Its color change after use",
-                 "Bacterial challenge testing using Brevundimonas diminuta (ATCC 19146) at a minimum challenge of 10⁷ CFU/cm² of filter surface area",
-                 "The filter's price", "How quickly it filters"],
-     "answer": "Bacterial challenge testing using Brevundimonas diminuta (ATCC 19146) at a minimum challenge of 10⁷ CFU/cm² of filter surface area",
-     "explanation": "This specific organism and challenge level are standard for demonstrating the sterilizing capability of a 0.22 µm (or 0.2 µm) rated filter.",
-     "source": "PDA Technical Report No. 26 (Revised 2008) - Sterilizing Filtration of Liquids"},
-    {"difficulty": "hard",
-     "question": "In the context of ICH Q3D for elemental impurities, what is a 'Permitted Daily Exposure' (PDE)?",
-     "options": ["The maximum amount of an element permitted in a daily dose of a drug product",
-                 "The daily exposure limit for workers handling the element",
-                 "The amount of an element that causes a detectable effect",
-                 "A guideline for environmental discharge of the element"],
-     "answer": "The maximum amount of an element permitted in a daily dose of a drug product",
-     "explanation": "PDE values are established based on toxicological data and represent a dose that is unlikely to cause an appreciable risk to human health during a lifetime of exposure.",
-     "source": "ICH Q3D Guideline for Elemental Impurities"},
-    {"difficulty": "hard",
-     "question": "What is the primary goal of 'Pharmaceutical Development' as described in ICH Q8(R2)?",
-     "options": ["To develop the cheapest manufacturing process",
-                 "To design a quality product and its manufacturing process to consistently deliver the intended performance of the product",
-                 "To complete development as quickly as possible", "To find as many new uses for a drug as possible"],
-     "answer": "To design a quality product and its manufacturing process to consistently deliver the intended performance of the product",
-     "explanation": "ICH Q8(R2) emphasizes a systematic, science and risk-based approach to pharmaceutical development, including the concept of Quality by Design (QbD).",
-     "source": "ICH Q8(R2) Pharmaceutical Development"},
-    {"difficulty": "hard",
-     "question": "What does the term 'Lifecycle Approach' to process validation, as described by the FDA, entail?",
-     "options": ["Validating a process only once in its lifecycle",
-                 "An integrated approach linking product and process development, qualification of the commercial manufacturing process, and maintenance of the process in a state of control during routine production",
-                 "The lifecycle of the validation documents", "Focusing on the end-of-life disposal of the product"],
-     "answer": "An integrated approach linking product and process development, qualification of the commercial manufacturing process, and maintenance of the process in a state of control during routine production",
-     "explanation": "This approach consists of three stages: Process Design (Stage 1), Process Qualification (Stage 2), and Continued Process Verification (Stage 3).",
-     "source": "FDA Process Validation: General Principles and Practices (2011)"},
-    {"difficulty": "hard", "question": "According to GAMP 5, what is a 'Category 4' software system?",
-     "options": ["Operating systems", "Standard software packages (non-configurable)",
-                 "Configured software products (e.g., LIMS, ERP configured for GMP use)", "Custom bespoke software"],
-     "answer": "Configured software products (e.g., LIMS, ERP configured for GMP use)",
-     "explanation": "GAMP 5 categorizes software to guide the validation effort. Category 4 systems are configured off-the-shelf products requiring significant configuration to meet business needs.",
-     "source": "ISPE GAMP 5: A Risk-Based Approach to Compliant GxP Computerized Systems"},
-    {"difficulty": "hard", "question": "What is the 'D-value' in sterilization validation?",
-     "options": ["The design value of the sterilizer",
-                 "The time (or dose) required at a given condition (e.g., temperature) to achieve a 1-log (90%) reduction in the population of a specific microorganism",
-                 "The duration of the sterilization cycle", "The depth of a dent in a can after sterilization"],
-     "answer": "The time (or dose) required at a given condition (e.g., temperature) to achieve a 1-log (90%) reduction in the population of a specific microorganism",
-     "explanation": "D-value is a measure of a microorganism's resistance to a specific sterilization process.",
-     "source": "Sterilization Principles, USP <1229>"},
-    {"difficulty": "hard", "question": "What is the 'Z-value' in thermal sterilization validation?",
-     "options": ["The final value of the process",
-                 "The temperature change required to achieve a 1-log change in the D-value",
-                 "The zone of the sterilizer with the lowest temperature", "A type of statistical value"],
-     "answer": "The temperature change required to achieve a 1-log change in the D-value",
-     "explanation": "Z-value characterizes the temperature dependence of the microbial inactivation rate.",
-     "source": "Sterilization Principles, USP <1229>"},
-    {"difficulty": "hard", "question": "What is a 'Type I Error' (alpha error) in statistical process control?",
-     "options": ["Accepting a bad batch", "Rejecting a good batch (producer's risk)",
-                 "Failing to detect a process shift", "Using the wrong statistical test"],
-     "answer": "Rejecting a good batch (producer's risk)",
-     "explanation": "A Type I error occurs when a process that is actually in control is incorrectly judged to be out of control, leading to unnecessary action.",
-     "source": "Statistical Process Control (SPC) Principles"},
-    {"difficulty": "hard", "question": "What is a 'Type II Error' (beta error) in statistical process control?",
-     "options": ["Rejecting a good batch", "Accepting a bad batch (consumer's risk)", "Making a calculation mistake",
-                 "A very serious error"], "answer": "Accepting a bad batch (consumer's risk)",
-     "explanation": "A Type II error occurs when a process that is actually out of control is incorrectly judged to be in control, potentially leading to the release of non-conforming product.",
-     "source": "Statistical Process Control (SPC) Principles"},
-    {"difficulty": "hard", "question": "What is the primary purpose of 'Adverse Event Reporting' in pharmacovigilance?",
-     "options": ["To blame the drug manufacturer",
-                 "To identify potential safety signals and contribute to the overall safety profile of a medicinal product",
-                 "To get compensation for patients", "To stop the sale of all drugs"],
-     "answer": "To identify potential safety signals and contribute to the overall safety profile of a medicinal product",
-     "explanation": "Systematic collection and analysis of adverse event reports are crucial for post-marketing surveillance and patient safety.",
-     "source": "ICH E2A, E2D"},
-    {"difficulty": "hard", "question": "In cleaning validation, what does 'Visually Clean' mean?",
-     "options": ["The equipment looks shiny",
-                 "The absence of any visible residues on the equipment surface when inspected under defined lighting and distance conditions",
-                 "Cleaned with a visual aid", "Clean enough for visual inspection only"],
-     "answer": "The absence of any visible residues on the equipment surface when inspected under defined lighting and distance conditions",
-     "explanation": "While 'visually clean' is a common acceptance criterion, it's often supplemented by analytical testing for specific residues to ensure thorough cleaning.",
-     "source": "Cleaning Validation Principles, PIC/S PI 006"},
-    {"difficulty": "hard", "question": "What is a 'Critical Defect' in product inspection?",
-     "options": ["A defect that is hard to find",
-                 "A defect that judgment and experience indicate is likely to result in hazardous or unsafe conditions for individuals using, maintaining, or depending upon the product; or a defect that judgment and experience indicate is likely to prevent performance of the tactical function of a major end item",
-                 "Any visual defect", "A defect found by a critical inspector"],
-     "answer": "A defect that judgment and experience indicate is likely to result in hazardous or unsafe conditions for individuals using, maintaining, or depending upon the product; or a defect that judgment and experience indicate is likely to prevent performance of the tactical function of a major end item",
-     "explanation": "Critical defects typically lead to rejection of the batch or 100% inspection and rework if possible.",
-     "source": "Sampling Plans (e.g., ANSI/ASQ Z1.4), Quality Control Principles"},
-    {"difficulty": "hard", "question": "What is 'Acceptable Quality Limit' (AQL) in sampling plans?",
-     "options": ["The best quality achievable",
-                 "The maximum percent defective (or maximum number of defects per hundred units) that, for purposes of sampling inspection, can be considered satisfactory as a process average",
-                 "A limit set by the QA manager", "A quality limit that is always zero defects"],
-     "answer": "The maximum percent defective (or maximum number of defects per hundred units) that, for purposes of sampling inspection, can be considered satisfactory as a process average",
-     "explanation": "AQL is a parameter of the sampling plan, not a guarantee that all batches meeting the AQL are defect-free. There's still a statistical risk of accepting lots with more defects.",
-     "source": "ANSI/ASQ Z1.4, ISO 2859"},
-    {"difficulty": "hard",
-     "question": "What is the primary difference between 'Sterility Assurance Level' (SAL) and 'Sterility Testing'?",
-     "options": ["SAL is for non-sterile products, sterility testing for sterile products",
-                 "SAL is a calculated probability of a non-sterile unit (e.g., 10⁻⁶); sterility testing is a direct test on a sample of units to detect viable microorganisms",
-                 "Sterility testing is more accurate than SAL", "SAL is determined by QA, sterility testing by QC"],
-     "answer": "SAL is a calculated probability of a non-sterile unit (e.g., 10⁻⁶); sterility testing is a direct test on a sample of units to detect viable microorganisms",
-     "explanation": "SAL is achieved through a validated sterilization process. Sterility testing has limitations due to the small sample size relative to the batch size.",
-     "source": "Sterilization Principles, USP <1211>, <71>"},
-    {"difficulty": "hard",
-     "question": "What is a 'Certificate of Suitability to the monographs of the European Pharmacopoeia' (CEP)?",
-     "options": ["A certificate for suitable employees",
-                 "A certificate issued by the EDQM that demonstrates a substance's quality is suitably controlled by the relevant European Pharmacopoeia monograph(s)",
-                 "A certificate of analysis from Europe", "A marketing authorization for Europe"],
-     "answer": "A certificate issued by the EDQM that demonstrates a substance's quality is suitably controlled by the relevant European Pharmacopoeia monograph(s)",
-     "explanation": "A CEP simplifies the regulatory process for using substances (APIs, excipients) in medicinal products within Europe and other regions recognizing CEPs.",
-     "source": "EDQM (European Directorate for the Quality of Medicines & HealthCare)"},
-    {"difficulty": "hard", "question": "What is the 'Common Technical Document' (CTD) format?",
-     "options": ["A common document used for technical training",
-                 "A harmonized format for regulatory submissions (e.g., NDAs, MAAs) developed by ICH, consisting of five modules",
-                 "A technical document shared among companies", "A template for SOPs"],
-     "answer": "A harmonized format for regulatory submissions (e.g., NDAs, MAAs) developed by ICH, consisting of five modules",
-     "explanation": "The CTD format (Modules 1-5) facilitates the preparation and review of marketing applications across ICH regions (US, EU, Japan, etc.).",
-     "source": "ICH M4 Guideline"},
-    {"difficulty": "hard", "question": "What is 'Module 3' of the CTD primarily concerned with?",
-     "options": ["Nonclinical study reports", "Clinical study reports",
-                 "Quality (Chemistry, Manufacturing, and Controls - CMC)",
-                 "Administrative information and prescribing information"],
-     "answer": "Quality (Chemistry, Manufacturing, and Controls - CMC)",
-     "explanation": "Module 3 contains detailed information on the drug substance and drug product, including manufacturing processes, characterization, specifications, and stability data.",
-     "source": "ICH M4Q Guideline"},
-    {"difficulty": "hard", "question": "What is the purpose of 'Process Capability Index' (e.g., Cpk, Ppk)?",
-     "options": ["To measure how capable employees are",
-                 "A statistical measure of a process's ability to produce output within specification limits",
-                 "An index of all company processes", "A measure of process speed"],
-     "answer": "A statistical measure of a process's ability to produce output within specification limits",
-     "explanation": "A Cpk or Ppk value greater than 1.33 is often considered capable, though targets vary. Cpk considers process centering while Ppk reflects overall process performance.",
-     "source": "Statistical Process Control (SPC) Principles"},
-    {"difficulty": "hard", "question": "What is 'Out of Trend' (OOT) analysis?", "options": ["Analyzing fashion trends",
-                                                                                             "A statistical evaluation of data over time to identify results that deviate from an expected pattern or historical performance, even if they are within specification limits",
-                                                                                             "Analyzing trends in customer complaints",
-                                                                                             "A type of financial trend analysis"],
-     "answer": "A statistical evaluation of data over time to identify results that deviate from an expected pattern or historical performance, even if they are within specification limits",
-     "explanation": "OOT analysis can provide early warnings of potential process drifts or issues before OOS results occur.",
-     "source": "Quality Systems, Data Analysis"},
-    {"difficulty": "hard",
-     "question": "What is the primary challenge in validating 'Legacy Systems' (older computerized systems)?",
-     "options": ["They are too old to validate",
-                 "Lack of original documentation, vendor support, or understanding of the system's original design and development",
-                 "Employees don't like using them", "They work perfectly so they don't need validation"],
-     "answer": "Lack of original documentation, vendor support, or understanding of the system's original design and development",
-     "explanation": "Validating legacy systems often requires a risk-based approach focusing on current functionality and impact on product quality and data integrity.",
-     "source": "GAMP Good Practice Guide: Validation of Legacy Systems"},
-    {"difficulty": "hard", "question": "What is 'Data Governance' in the context of data integrity?",
-     "options": ["Governing who can access data",
-                 "The sum total of arrangements to ensure that data, irrespective of the format in which it is generated, is recorded, processed, retained and used to ensure a complete, consistent and accurate record throughout the data lifecycle",
-                 "A government department for data", "A type of data encryption"],
-     "answer": "The sum total of arrangements to ensure that data, irrespective of the format in which it is generated, is recorded, processed, retained and used to ensure a complete, consistent and accurate record throughout the data lifecycle",
-     "explanation": "Good data governance includes policies, procedures, training, and technical controls to ensure data integrity.",
-     "source": "MHRA GxP Data Integrity Guidance"},
-    {"difficulty": "hard", "question": "What is an 'Audit Trail' for a GxP computerized system?",
-     "options": ["A trail leading to the audit room",
-                 "A secure, computer-generated, time-stamped electronic record that allows for reconstruction of the course of events relating to the creation, modification, or deletion of an electronic record",
-                 "A list of all audits performed", "A manual log of system changes"],
-     "answer": "A secure, computer-generated, time-stamped electronic record that allows for reconstruction of the course of events relating to the creation, modification, or deletion of an electronic record",
-     "explanation": "Audit trails are critical for data integrity, providing traceability of actions and changes to electronic records.",
-     "source": "FDA 21 CFR Part 11, EU GMP Annex 11"},
-    {"difficulty": "hard", "question": "What is 'Periodic Review' of validated systems/processes?",
-     "options": ["Reviewing them only if there's a problem",
-                 "A documented re-evaluation at scheduled intervals to confirm that a system or process remains in a validated state and continues to operate as intended",
-                 "A quick daily check", "A review by an external auditor"],
-     "answer": "A documented re-evaluation at scheduled intervals to confirm that a system or process remains in a validated state and continues to operate as intended",
-     "explanation": "Periodic review ensures ongoing compliance and identifies any need for revalidation or changes.",
-     "source": "Validation Principles, GAMP 5"},
-    {"difficulty": "hard", "question": "What is a 'Genotoxic Impurity'?", "options": ["An impurity that is not toxic",
-                                                                                      "An impurity that has been demonstrated to be mutagenic or clastogenic and is therefore presumed to have the potential to damage DNA and cause cancer in humans",
-                                                                                      "An impurity from a gene therapy product",
-                                                                                      "A very common impurity"],
-     "answer": "An impurity that has been demonstrated to be mutagenic or clastogenic and is therefore presumed to have the potential to damage DNA and cause cancer in humans",
-     "explanation": "Control of genotoxic impurities to very low levels (e.g., Threshold of Toxicological Concern - TTC) is a major regulatory concern.",
-     "source": "ICH M7 Guideline"},
-    {"difficulty": "hard", "question": "What is the 'Threshold of Toxicological Concern' (TTC) approach?",
-     "options": ["A threshold for all toxic substances",
-                 "A principle that establishes a human exposure threshold value for chemicals below which there is a very low probability of an appreciable risk to human health, used for certain unstudied impurities",
-                 "A concern about toxicology", "A list of all toxic thresholds"],
-     "answer": "A principle that establishes a human exposure threshold value for chemicals below which there is a very low probability of an appreciable risk to human health, used for certain unstudied impurities",
-     "explanation": "The TTC approach is particularly relevant for controlling genotoxic impurities when specific toxicological data is lacking.",
-     "source": "ICH M7"},
-    {"difficulty": "hard", "question": "What is a 'Quality Target Product Profile' (QTPP)?",
-     "options": ["The target profile for a quality employee",
-                 "A prospective summary of the quality characteristics of a drug product that ideally will be achieved to ensure the desired quality, taking into account safety and efficacy",
-                 "A profile of all quality targets in the company", "A marketing document describing product quality"],
-     "answer": "A prospective summary of the quality characteristics of a drug product that ideally will be achieved to ensure the desired quality, taking into account safety and efficacy",
-     "explanation": "The QTPP forms the basis for product and process development under a Quality by Design (QbD) approach.",
-     "source": "ICH Q8(R2)"},
-    {"difficulty": "hard", "question": "What is 'Control Strategy' in the context of ICH Q8, Q10, and Q11?",
-     "options": ["A strategy to control employees",
-                 "A planned set of controls, derived from product and process understanding, that assures process performance and product quality. The controls can include parameters and attributes related to drug substance and drug product materials and components, facility and equipment operating conditions, in-process controls, finished product specifications, and the associated methods and frequency of monitoring and control.",
-                 "A strategy for pest control", "A document control strategy"],
-     "answer": "A planned set of controls, derived from product and process understanding, that assures process performance and product quality. The controls can include parameters and attributes related to drug substance and drug product materials and components, facility and equipment operating conditions, in-process controls, finished product specifications, and the associated methods and frequency of monitoring and control.",
-     "explanation": "A robust control strategy is a key output of QbD and ensures consistent product quality.",
-     "source": "ICH Q8, Q10, Q11"},
-    {"difficulty": "hard",
-     "question": "What is 'Active Pharmaceutical Ingredient Starting Material' as defined by ICH Q7?",
-     "options": ["Any material used to start API manufacturing",
-                 "A raw material, intermediate, or an API that is used in the production of an API and that is incorporated as a significant structural fragment into the structure of the API. It is the point at which GMP requirements for API manufacturing begin.",
-                 "The very first chemical purchased for a process", "A material that starts the chemical reaction"],
-     "answer": "A raw material, intermediate, or an API that is used in the production of an API and that is incorporated as a significant structural fragment into the structure of the API. It is the point at which GMP requirements for API manufacturing begin.",
-     "explanation": "The proper definition and justification of the API starting material is a critical regulatory expectation.",
-     "source": "ICH Q7, ICH Q11"},
-    {"difficulty": "hard", "question": "What is a 'Drug Master File' (DMF) or 'Active Substance Master File' (ASMF)?",
-     "options": ["A master file for all drugs in a company",
-                 "A submission to a regulatory authority containing confidential detailed information about facilities, processes, or articles used in the manufacturing, processing, packaging, and storing of one or more human drugs, often submitted by an API manufacturer to support an NDA/MAA from a drug product manufacturer",
-                 "A file containing all master batch records", "A marketing file for a drug"],
-     "answer": "A submission to a regulatory authority containing confidential detailed information about facilities, processes, or articles used in the manufacturing, processing, packaging, and storing of one or more human drugs, often submitted by an API manufacturer to support an NDA/MAA from a drug product manufacturer",
-     "explanation": "DMFs/ASMFs allow API manufacturers to protect their intellectual property while providing necessary information to regulatory agencies and their customers.",
-     "source": "FDA DMF Guidance, EMA ASMF Procedure"},
-    {"difficulty": "hard",
-     "question": "What is 'Process Analytical Technology (PAT) - Real Time Release Testing (RTRT)' according to ICH Q8?",
-     "options": ["Testing products in real time for marketing",
-                 "The ability to evaluate and ensure the quality of in-process and/or final product based on process data, which typically include a valid combination of measured material attributes and process controls, potentially replacing end-product testing",
-                 "A very fast release test", "A technology for releasing PAT records"],
-     "answer": "The ability to evaluate and ensure the quality of in-process and/or final product based on process data, which typically include a valid combination of measured material attributes and process controls, potentially replacing end-product testing",
-     "explanation": "RTRT is an advanced application of PAT that can significantly improve manufacturing efficiency and quality assurance.",
-     "source": "ICH Q8(R2)"},
-    {"difficulty": "hard", "question": "What is the 'F0 value' in steam sterilization validation?",
-     "options": ["The initial temperature",
-                 "A measure of the lethality of a heat sterilization process, equivalent to the time in minutes at a reference temperature of 121.1°C (250°F) delivered to a product, assuming a Z-value of 10°C",
-                 "The final outcome of sterilization", "A failure code for sterilization"],
-     "answer": "A measure of the lethality of a heat sterilization process, equivalent to the time in minutes at a reference temperature of 121.1°C (250°F) delivered to a product, assuming a Z-value of 10°C",
-     "explanation": "F0 is used to quantify the microbial inactivation achieved by a steam sterilization cycle.",
-     "source": "Sterilization Principles, USP <1229.1>"},
-    {"difficulty": "hard",
-     "question": "What is a 'Bio-Decontamination Cycle' for an isolator or cleanroom (e.g., using VHP)?",
-     "options": ["A routine cleaning cycle",
-                 "A validated process using a sporicidal chemical agent (like Vaporized Hydrogen Peroxide - VHP) to achieve a defined level of microbial inactivation on exposed surfaces",
-                 "Decontaminating biological samples", "A cycle to remove all biological life from the planet"],
-     "answer": "A validated process using a sporicidal chemical agent (like Vaporized Hydrogen Peroxide - VHP) to achieve a defined level of microbial inactivation on exposed surfaces",
-     "explanation": "This is crucial for preparing isolators and cleanrooms for aseptic operations, often targeting a 6-log reduction of resistant spores.",
-     "source": "GMP Annex 1, Isolator Technology"},
-    {"difficulty": "hard", "question": "What is the primary purpose of 'Bulk Product Holding Time' studies?",
-     "options": ["To see how long bulk product can be stored before selling",
-                 "To establish the maximum time that a bulk drug product can be held under specified conditions before further processing (e.g., filling) without adversely affecting its quality attributes",
-                 "To validate the holding tanks", "To reduce storage costs"],
-     "answer": "To establish the maximum time that a bulk drug product can be held under specified conditions before further processing (e.g., filling) without adversely affecting its quality attributes",
-     "explanation": "These studies ensure that any delays in the manufacturing process do not compromise the final product quality.",
-     "source": "Process Validation, Stability Principles"},
-    {"difficulty": "hard", "question": "What is 'Atypical Result' or 'Aberrant Result' in laboratory testing?",
-     "options": ["A result that is very good",
-                 "A result that is unexpected, unusual, or inconsistent with historical data or other results, even if it is within specification limits",
-                 "A result from an uncalibrated instrument", "A result that is always OOS"],
-     "answer": "A result that is unexpected, unusual, or inconsistent with historical data or other results, even if it is within specification limits",
-     "explanation": "Atypical results should trigger an investigation to understand their cause and potential impact, similar to OOS investigations but for in-specification results.",
-     "source": "Laboratory Controls, OOS/OOT Guidance"},
-    {"difficulty": "hard",
-     "question": "What is the significance of the 'Recovery Factor' in cleaning validation swab/rinse sampling?",
-     "options": ["How quickly the equipment recovers from cleaning",
-                 "The percentage of a known amount of residue that can be recovered from a surface by a specific sampling method (swab or rinse) and quantified by the analytical method",
-                 "The factor by which cleaning time is reduced", "How much cleaning agent is recovered"],
-     "answer": "The percentage of a known amount of residue that can be recovered from a surface by a specific sampling method (swab or rinse) and quantified by the analytical method",
-     "explanation": "The recovery factor must be determined and applied to calculate the actual amount of residue present on the equipment surface.",
-     "source": "Cleaning Validation Principles, PIC/S PI 006"},
-    {"difficulty": "hard", "question": "What is 'Worst Case Product' approach in cleaning validation?",
-     "options": ["The product that is hardest to sell",
-                 "Selecting the product that is most difficult to clean (e.g., due to low solubility, high toxicity, high concentration) to represent a group of similar products for cleaning validation purposes",
-                 "The product with the most customer complaints", "The product made in the worst equipment"],
-     "answer": "Selecting the product that is most difficult to clean (e.g., due to low solubility, high toxicity, high concentration) to represent a group of similar products for cleaning validation purposes",
-     "explanation": "Validating the cleaning procedure for the worst-case product provides assurance for other products in the group, reducing overall validation effort.",
-     "source": "Cleaning Validation Principles"},
-    {"difficulty": "hard", "question": "What is a 'Pharmacokinetic (PK) Study' primarily designed to determine?",
-     "options": ["How the drug affects the body (pharmacodynamics)",
-                 "How the body affects the drug (absorption, distribution, metabolism, and excretion - ADME)",
-                 "The drug's manufacturing process", "The drug's price"],
-     "answer": "How the body affects the drug (absorption, distribution, metabolism, and excretion - ADME)",
-     "explanation": "PK studies are essential for understanding a drug's dosing regimen, potential drug interactions, and behavior in different patient populations.",
-     "source": "Pharmacology, Clinical Pharmacology"},
-    {"difficulty": "hard", "question": "What is a 'Pharmacodynamic (PD) Study' primarily designed to determine?",
-     "options": ["How the body affects the drug (ADME)",
-                 "How the drug affects the body (the biochemical and physiological effects of drugs and their mechanisms of action)",
-                 "The drug's stability", "The drug's packaging requirements"],
-     "answer": "How the drug affects the body (the biochemical and physiological effects of drugs and their mechanisms of action)",
-     "explanation": "PD studies help understand a drug's efficacy, mechanism, and dose-response relationship.",
-     "source": "Pharmacology, Clinical Pharmacology"},
-    {"difficulty": "hard", "question": "What is 'Statistical Significance' (e.g., p-value < 0.05) in data analysis?",
-     "options": ["The data is very important",
-                 "A measure of the probability that an observed difference or relationship could have occurred by random chance alone; a small p-value suggests the observed effect is likely real",
-                 "The data is 100% correct", "The data is easy to understand"],
-     "answer": "A measure of the probability that an observed difference or relationship could have occurred by random chance alone; a small p-value suggests the observed effect is likely real",
-     "explanation": "Statistical significance does not necessarily imply practical or clinical significance, and the chosen alpha level (e.g., 0.05) is a convention.",
-     "source": "Statistics Principles"},
-    {"difficulty": "hard", "question": "What is a 'Confidence Interval' in statistics?",
-     "options": ["How confident you are in the results",
-                 "A range of values, derived from sample data, that is likely to contain the true value of an unknown population parameter with a certain degree of confidence (e.g., 95% CI)",
-                 "An interval where data is always correct", "A type of data storage interval"],
-     "answer": "A range of values, derived from sample data, that is likely to contain the true value of an unknown population parameter with a certain degree of confidence (e.g., 95% CI)",
-     "explanation": "A narrower confidence interval indicates more precision in the estimate.",
-     "source": "Statistics Principles"},
-    {"difficulty": "hard", "question": "What is 'Process Drift'?", "options": ["When a process stops working",
-                                                                               "A gradual change or shift in process performance or output over time, which may still be within specification limits but could indicate an underlying issue or a trend towards an out-of-control state",
-                                                                               "A very fast process",
-                                                                               "A planned change in a process"],
-     "answer": "A gradual change or shift in process performance or output over time, which may still be within specification limits but could indicate an underlying issue or a trend towards an out-of-control state",
-     "explanation": "Monitoring for process drift using control charts and trend analysis is important for maintaining a state of control.",
-     "source": "Statistical Process Control (SPC)"},
-    {"difficulty": "hard", "question": "What is 'Equipment History File/Log'?",
-     "options": ["A file about the history of equipment in general",
-                 "A record maintained for each significant piece of equipment, detailing its installation, calibration, maintenance, repairs, modifications, and usage history",
-                 "A list of all equipment in the company", "A user manual for old equipment"],
-     "answer": "A record maintained for each significant piece of equipment, detailing its installation, calibration, maintenance, repairs, modifications, and usage history",
-     "explanation": "This file provides a complete lifecycle history for the equipment and is important for investigations, maintenance planning, and GMP compliance.",
-     "source": "GMP Equipment Management"},
-    {"difficulty": "hard", "question": "What is the role of 'Internal Audits' (Self-Inspections) in a PQS?",
-     "options": ["To prepare for external audits only",
-                 "A systematic and independent examination of a company's own quality systems and procedures to determine compliance with GMP and internal requirements, and to identify areas for improvement",
-                 "A way to find fault with employees", "Performed only by external auditors"],
-     "answer": "A systematic and independent examination of a company's own quality systems and procedures to determine compliance with GMP and internal requirements, and to identify areas for improvement",
-     "explanation": "Internal audits are a proactive tool for maintaining compliance and driving continuous improvement.",
-     "source": "ICH Q10, GMP Chapter 9 (Self Inspection)"},
-    {"difficulty": "hard", "question": "What is 'Management of Outsourced Activities' as per ICH Q10?",
-     "options": ["Hiring external managers",
-                 "The PQS should extend to the control and review of any outsourced activities and the quality of purchased materials, ensuring that responsibilities are clearly defined in quality agreements",
-                 "Outsourcing all management tasks", "Only for activities outsourced to other countries"],
-     "answer": "The PQS should extend to the control and review of any outsourced activities and the quality of purchased materials, ensuring that responsibilities are clearly defined in quality agreements",
-     "explanation": "The contract giver is ultimately responsible for the quality of outsourced activities and materials.",
-     "source": "ICH Q10"},
-    {"difficulty": "hard", "question": "What is a 'Product Lifecycle' approach in pharmaceutical quality systems?",
-     "options": ["The time from when a product is launched until it is discontinued",
-                 "A holistic view of a product from initial development, through manufacturing, distribution, and discontinuation, with quality management applied at all stages",
-                 "The shelf life of a product", "The lifecycle of the product packaging"],
-     "answer": "A holistic view of a product from initial development, through manufacturing, distribution, and discontinuation, with quality management applied at all stages",
-     "explanation": "ICH Q8, Q9, and Q10 promote a lifecycle approach to ensure product quality is built-in and maintained.",
-     "source": "ICH Q8, Q9, Q10"},
-    {"difficulty": "hard", "question": "What is 'Dead Leg' in a pharmaceutical water system or piping?",
-     "options": ["A pipe that is no longer used",
-                 "A section of pipework where water can stagnate due to lack of flow, creating a potential for microbial growth and contamination",
-                 "A support for a pipe", "A very short pipe"],
-     "answer": "A section of pipework where water can stagnate due to lack of flow, creating a potential for microbial growth and contamination",
-     "explanation": "Design of water systems aims to minimize or eliminate dead legs to maintain water quality.",
-     "source": "Pharmaceutical Water System Design, ISPE Baseline Guide"},
-    {"difficulty": "hard", "question": "What is 'Rouging' in stainless steel pharmaceutical systems?",
-     "options": ["Painting stainless steel red",
-                 "A form of corrosion (iron oxide deposition) that can occur on the surface of stainless steel in high-purity water or steam systems, appearing as a reddish or brownish film",
-                 "A type of polishing for stainless steel", "A protective layer on stainless steel"],
-     "answer": "A form of corrosion (iron oxide deposition) that can occur on the surface of stainless steel in high-purity water or steam systems, appearing as a reddish or brownish film",
-     "explanation": "While often not a direct contamination risk itself, rouging can indicate underlying corrosion issues or trap contaminants, and needs to be monitored and managed.",
-     "source": "Pharmaceutical Engineering, Water System Maintenance"},
-    {"difficulty": "hard", "question": "What is 'Passivation' of stainless steel?",
-     "options": ["Making stainless steel passive or inactive",
-                 "A chemical treatment process that removes free iron from the surface of stainless steel and enhances the formation of a passive chromium oxide layer, improving its corrosion resistance",
-                 "Painting stainless steel", "A type of cleaning for stainless steel"],
-     "answer": "A chemical treatment process that removes free iron from the surface of stainless steel and enhances the formation of a passive chromium oxide layer, improving its corrosion resistance",
-     "explanation": "Passivation is important for maintaining the integrity and cleanliness of stainless steel equipment and piping in pharmaceutical applications.",
-     "source": "ASTM A967, Pharmaceutical Engineering"},
-    {"difficulty": "hard",
-     "question": "What is 'Total Organic Carbon' (TOC) testing used for in pharmaceutical water systems?",
-     "options": ["To measure all carbon-based life forms",
-                 "An indirect measure of organic molecules present in water, used as an indicator of water purity and to monitor the effectiveness of purification processes",
-                 "To measure inorganic carbon", "A test for carbonated water"],
-     "answer": "An indirect measure of organic molecules present in water, used as an indicator of water purity and to monitor the effectiveness of purification processes",
-     "explanation": "Low TOC levels are required for Purified Water and Water for Injection.",
-     "source": "USP <643>, EP 2.2.44"},
-    {"difficulty": "hard", "question": "What is 'Conductivity' testing used for in pharmaceutical water systems?",
-     "options": ["To test electrical conductivity of equipment",
-                 "An indirect measure of the concentration of ionic impurities in water, used as an indicator of water purity",
-                 "To measure water temperature", "A test for static electricity"],
-     "answer": "An indirect measure of the concentration of ionic impurities in water, used as an indicator of water purity",
-     "explanation": "High conductivity indicates higher levels of dissolved ions. It's a key quality attribute for pharmaceutical water.",
-     "source": "USP <645>, EP 2.2.38"},
-    {"difficulty": "hard", "question": "What is 'Aseptic Connection' in sterile manufacturing?",
-     "options": ["Connecting two sterile items in any way",
-                 "A procedure for connecting two or more sterile components (e.g., tubing, bags, filters) in a manner that maintains the sterility of the fluid pathway",
-                 "A very clean connection", "A connection made by an aseptic operator"],
-     "answer": "A procedure for connecting two or more sterile components (e.g., tubing, bags, filters) in a manner that maintains the sterility of the fluid pathway",
-     "explanation": "This often involves specialized connectors (e.g., sterile connectors, steam-in-place connections) or techniques performed in a Grade A environment.",
-     "source": "GMP Annex 1, Aseptic Processing Principles"},
-    {"difficulty": "hard", "question": "What is 'Single-Use Technology (SUT) Validation' primarily focused on?",
-     "options": ["Validating that it can be used only once",
-                 "Ensuring the SUT components are sterile (if applicable), do not leach harmful substances into the product, maintain integrity under process conditions, and are suitable for their intended use",
-                 "Validating the disposal process", "Testing the plastic material only"],
-     "answer": "Ensuring the SUT components are sterile (if applicable), do not leach harmful substances into the product, maintain integrity under process conditions, and are suitable for their intended use",
-     "explanation": "Key aspects include extractables/leachables, integrity testing, particulate control, and supplier qualification.",
-     "source": "Bio-Process Systems Alliance (BPSA) Guides, PDA TR No. 66"},
-    {"difficulty": "hard", "question": "What is a 'Holistic Validation Approach'?",
-     "options": ["Validating the whole company at once",
-                 "An approach that considers the entire system or process, including interactions between components, rather than validating individual parts in isolation, often emphasizing risk-based strategies and lifecycle management",
-                 "A very spiritual validation method", "Validating only on holidays"],
-     "answer": "An approach that considers the entire system or process, including interactions between components, rather than validating individual parts in isolation, often emphasizing risk-based strategies and lifecycle management",
-     "explanation": "This integrated approach is more aligned with modern quality system thinking (e.g., ICH Q8, Q9, Q10).",
-     "source": "Modern Validation Principles"},
-    {"difficulty": "hard",
-     "question": "What is 'Breakthrough Volume' in chromatography column packing or adsorption processes?",
-     "options": ["The volume at which the column breaks",
-                 "The volume of mobile phase (or sample) that can pass through a column before the analyte of interest or an impurity begins to elute or is no longer effectively retained",
-                 "The volume of the first breakthrough discovery", "The total volume of the column"],
-     "answer": "The volume of mobile phase (or sample) that can pass through a column before the analyte of interest or an impurity begins to elute or is no longer effectively retained",
-     "explanation": "Knowing the breakthrough volume is important for optimizing purification processes and preventing product loss or contamination.",
-     "source": "Chromatography Principles, Process Development"},
-    {"difficulty": "hard", "question": "What is 'Process Signature' or 'Process Fingerprint' in PAT?",
-     "options": ["The signature of the process owner",
-                 "A unique multivariate data profile or pattern generated by a process when it is operating in a state of control, which can be used for real-time monitoring and fault detection",
-                 "A fingerprint left on the equipment", "A simplified process diagram"],
-     "answer": "A unique multivariate data profile or pattern generated by a process when it is operating in a state of control, which can be used for real-time monitoring and fault detection",
-     "explanation": "Deviations from the established process signature can indicate potential issues.",
-     "source": "Process Analytical Technology (PAT) Principles"},
-    {"difficulty": "hard", "question": "What is 'Chemometrics'?", "options": ["Measuring chemicals",
-                                                                              "The science of extracting information from chemical systems by data-driven means, often using multivariate statistical methods to analyze complex chemical data (e.g., from spectroscopic instruments in PAT)",
-                                                                              "A type of chemical metric system",
-                                                                              "The chemistry of metrics"],
-     "answer": "The science of extracting information from chemical systems by data-driven means, often using multivariate statistical methods to analyze complex chemical data (e.g., from spectroscopic instruments in PAT)",
-     "explanation": "Chemometrics is essential for developing predictive models and control strategies in PAT applications.",
-     "source": "Analytical Chemistry, PAT"},
-    {"difficulty": "hard",
-     "question": "What is a 'Regulatory Starting Material' (RSM) in API synthesis, and why is its definition critical?",
-     "options": ["The first material purchased for API synthesis; it's not very critical",
-                 "A material used in the synthesis of an API that is incorporated as a significant structural fragment into the API structure. Its definition is critical because GMP controls typically apply from this point forward in the synthesis.",
-                 "Any starting material regulated by the government", "A material that starts the regulatory process"],
-     "answer": "A material used in the synthesis of an API that is incorporated as a significant structural fragment into the API structure. Its definition is critical because GMP controls typically apply from this point forward in the synthesis.",
-     "explanation": "The selection and justification of RSMs are scrutinized by regulatory agencies as it defines the scope of GMP for API manufacturing.",
-     "source": "ICH Q11 Development and Manufacture of Drug Substances"},
-    {"difficulty": "hard",
-     "question": "What is the 'Maximum Allowable Carryover' (MACRO) or 'Acceptable Daily Exposure' (ADE) used for in cleaning validation limit calculations?",
-     "options": ["The maximum amount of product that can be carried over to the next office",
-                 "A health-based limit representing the maximum amount of a residue of one product that can be carried over into a subsequent product without posing an unacceptable risk to patient safety",
-                 "The amount of cleaning agent allowed", "A limit for how much can be carried by one person"],
-     "answer": "A health-based limit representing the maximum amount of a residue of one product that can be carried over into a subsequent product without posing an unacceptable risk to patient safety",
-     "explanation": "ADE (derived from toxicological data) is increasingly the preferred method for setting scientifically sound cleaning limits, replacing older 10 ppm or 1/1000th dose criteria where appropriate.",
-     "source": "EMA Guideline on setting health based exposure limits, ISPE Risk-MaPP Guide"},
-    {"difficulty": "hard", "question": "What is 'Orthogonal Analytical Methods'?",
-     "options": ["Methods that are perpendicular to each other",
-                 "The use of two or more analytical methods based on different scientific principles to measure the same attribute or analyte, providing greater confidence in the results",
-                 "Methods developed by Dr. Orthogonal", "Very complex analytical methods"],
-     "answer": "The use of two or more analytical methods based on different scientific principles to measure the same attribute or analyte, providing greater confidence in the results",
-     "explanation": "If different methods yield comparable results, it strengthens the validity of the data, especially for critical quality attributes or impurity profiling.",
-     "source": "Analytical Method Development & Validation"},
-    {"difficulty": "hard",
-     "question": "What does 'Lifecycle Management of Analytical Procedures' (as per upcoming USP <1220> / ICH Q14) emphasize?",
-     "options": ["Using analytical procedures only once in their lifecycle",
-                 "A holistic approach to analytical procedures, from development and validation through routine use and retirement, focusing on ensuring continued fitness for purpose based on risk and knowledge management",
-                 "The lifecycle of the analyst performing the procedure",
-                 "Only validating the procedure once at the beginning"],
-     "answer": "A holistic approach to analytical procedures, from development and validation through routine use and retirement, focusing on ensuring continued fitness for purpose based on risk and knowledge management",
-     "explanation": "This modern approach moves away from a one-time validation event towards continuous verification and improvement of analytical procedures.",
-     "source": "USP <1220> Analytical Procedure Lifecycle, ICH Q14 Analytical Procedure Development"},
-    {"difficulty": "hard", "question": "What is 'Material Qualification' in the context of single-use systems (SUS)?",
-     "options": ["Qualifying the person who uses the material",
-                 "Evaluating the suitability of the materials of construction of SUS components, including biocompatibility, extractables/leachables profiles, and physical/chemical properties, for the intended application",
-                 "Testing if the material is qualified to be single-use", "Only checking the supplier's certificate"],
-     "answer": "Evaluating the suitability of the materials of construction of SUS components, including biocompatibility, extractables/leachables profiles, and physical/chemical properties, for the intended application",
-     "explanation": "This is critical to ensure the SUS does not adversely affect product quality or patient safety.",
-     "source": "BPSA Guides, PDA TR No. 66"},
-    {"difficulty": "hard", "question": "What is 'Viral Clearance Validation' for biopharmaceutical products?",
-     "options": ["Validating that the product is clear of viruses by visual inspection",
-                 "Documented evidence that the manufacturing process (specifically certain purification steps) can effectively remove or inactivate a range of viruses that could potentially contaminate the product",
-                 "Validating the antiviral properties of the drug", "Cleaning viruses from the facility"],
-     "answer": "Documented evidence that the manufacturing process (specifically certain purification steps) can effectively remove or inactivate a range of viruses that could potentially contaminate the product",
-     "explanation": "This is a critical safety requirement for products derived from cell lines or biological sources, often involving spiking studies with model viruses.",
-     "source": "ICH Q5A (R1)"},
-]
+# --- Question Bank ---
+QUESTIONS_FILE = os.getenv("QUESTIONS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "questions.jsonl"))
+QUESTIONS_PACK = os.getenv("QUESTIONS_PACK", os.path.splitext(QUESTIONS_FILE)[0] + ".pack")
+QUESTION_CACHE_SIZE = int(os.getenv("QUESTION_CACHE_SIZE", "256"))
+QUESTION_RENDER_CACHE_SIZE = int(os.getenv("QUESTION_RENDER_CACHE_SIZE", "4096"))  # (question, option order) pairs
+
+
+class JsonlQuestionStore:
+    """Question bank stored as JSON Lines, one question per line.
+
+    Only the byte offset of each line (plus the difficulty and source needed for
+    indexing) is kept in memory; question text, options and explanations are read
+    from disk when a question is actually shown.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._offsets = array('Q')
+        self._difficulties = []
+        self._sources = []
+        self.version = 0  # crc32 of the file, as recorded in a compiled pack
+
+        with open(path, 'rb') as f:
+            offset = 0
+            for line in f:
+                self.version = zlib.crc32(line, self.version)
+                if line.strip():
+                    record = json.loads(line)
+                    self._offsets.append(offset)
+                    self._difficulties.append(sys.intern(record['difficulty']))
+                    self._sources.append(sys.intern(record['source']))
+                offset += len(line)
+        self._end = offset
+        self._fd = os.open(path, os.O_RDONLY)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def index_entries(self):
+        """Yields (question_id, difficulty, source) for every question, without reading question text."""
+        yield from zip(range(len(self._offsets)), self._difficulties, self._sources)
+
+    def load(self, question_id):
+        """Reads and parses a single question from disk."""
+        offset = self._offsets[question_id]
+        # Blank lines are skipped when indexing, so the next offset is an upper bound, not an exact end.
+        end = self._offsets[question_id + 1] if question_id + 1 < len(self._offsets) else self._end
+        line = os.pread(self._fd, end - offset, offset).split(b'\n', 1)[0]
+        return json.loads(line)
+
+
+# Binary pack layout (little-endian), compiled from the JSON Lines file:
+#   header | string spans (offset, length) | fixed-width question records | UTF-8 string data
+# Records refer to strings by span index; a question's options are stored as consecutive spans.
+PACK_MAGIC = b"GMPQ"
+PACK_FORMAT_VERSION = 1
+PACK_HEADER = struct.Struct("<4sHxxIII")  # magic, format version, question count, string count, bank version
+PACK_SPAN = struct.Struct("<II")
+PACK_RECORD = struct.Struct("<IIIIIBBxx")  # question, explanation, source, difficulty, first option, option count, answer
+MAX_OPTIONS = 8  # Option permutations are packed 4 bits per slot into 32 bits in the per-user quiz record
+
+
+def build_question_pack(source_path, pack_path):
+    """Compiles the JSON Lines question file into the binary pack read by MappedQuestionStore."""
+    with open(source_path, 'rb') as f:
+        raw = f.read()
+
+    spans = []
+    data = bytearray()
+    shared_strings = {}
+
+    def add_string(text, shared=False):
+        if shared and text in shared_strings:
+            return shared_strings[text]
+        encoded = text.encode('utf-8')
+        string_id = len(spans)
+        spans.append((len(data), len(encoded)))
+        data.extend(encoded)
+        if shared:
+            shared_strings[text] = string_id
+        return string_id
+
+    records = []
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        question = json.loads(line)
+        options = question['options']
+        if not 2 <= len(options) <= MAX_OPTIONS:
+            raise ValueError(f"Questions need 2 to {MAX_OPTIONS} options: {question['question']!r}")
+        try:
+            answer_index = options.index(question['answer'])
+        except ValueError:
+            raise ValueError(f"Answer not among options for question: {question['question']!r}") from None
+        first_option = len(spans)
+        for option in options:
+            add_string(option)
+        records.append((
+            add_string(question['question']),
+            add_string(question.get('explanation', '')),
+            add_string(question['source'], shared=True),
+            add_string(question['difficulty'], shared=True),
+            first_option,
+            len(options),
+            answer_index,
+        ))
+
+    tmp_path = f"{pack_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_FORMAT_VERSION, len(records), len(spans), zlib.crc32(raw)))
+        for span in spans:
+            f.write(PACK_SPAN.pack(*span))
+        for record in records:
+            f.write(PACK_RECORD.pack(*record))
+        f.write(data)
+    # Atomic rename so workers starting at the same time never map a half-written pack.
+    os.replace(tmp_path, pack_path)
+    logger.info(f"Built question pack {pack_path} with {len(records)} questions.")
+
+
+class MappedQuestionStore:
+    """Question bank served from a read-only memory-mapped pack.
+
+    Every worker process mapping the same pack shares one page-cache copy of the
+    question text; a process only decodes the strings of the question it is showing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, self._count, string_count, self.version = PACK_HEADER.unpack_from(self._mmap, 0)
+        if magic != PACK_MAGIC or format_version != PACK_FORMAT_VERSION:
+            raise ValueError(f"{path} is not a question pack in format version {PACK_FORMAT_VERSION}.")
+
+        self._spans_at = PACK_HEADER.size
+        self._records_at = self._spans_at + string_count * PACK_SPAN.size
+        self._strings_at = self._records_at + self._count * PACK_RECORD.size
+
+    def __len__(self):
+        return self._count
+
+    def _string(self, string_id):
+        offset, length = PACK_SPAN.unpack_from(self._mmap, self._spans_at + string_id * PACK_SPAN.size)
+        start = self._strings_at + offset
+        return self._mmap[start:start + length].decode('utf-8')
+
+    def _record(self, question_id):
+        if not 0 <= question_id < self._count:
+            raise IndexError(f"Question ID {question_id} out of range.")
+        return PACK_RECORD.unpack_from(self._mmap, self._records_at + question_id * PACK_RECORD.size)
+
+    def index_entries(self):
+        """Yields (question_id, difficulty, source) for every question, decoding each shared string once."""
+        decoded = {}
+        for question_id in range(self._count):
+            _, _, source_id, difficulty_id, _, _, _ = self._record(question_id)
+            if source_id not in decoded:
+                decoded[source_id] = sys.intern(self._string(source_id))
+            if difficulty_id not in decoded:
+                decoded[difficulty_id] = sys.intern(self._string(difficulty_id))
+            yield question_id, decoded[difficulty_id], decoded[source_id]
+
+    def load(self, question_id):
+        """Decodes a single question into the same dict shape as a line of the JSON Lines file."""
+        question_sid, explanation_sid, source_sid, difficulty_sid, first_option, option_count, answer_index = \
+            self._record(question_id)
+        options = [self._string(first_option + i) for i in range(option_count)]
+        return {
+            'difficulty': self._string(difficulty_sid),
+            'question': self._string(question_sid),
+            'options': options,
+            'answer': options[answer_index],
+            'explanation': self._string(explanation_sid),
+            'source': self._string(source_sid),
+        }
+
+
+def open_question_store(source_path, pack_path):
+    """Maps the question pack, rebuilding it from the JSON Lines file first if it is missing or stale.
+
+    Falls back to reading the JSON Lines file directly if the pack cannot be written.
+    """
+    if os.path.exists(source_path):
+        try:
+            if not os.path.exists(pack_path) or os.path.getmtime(pack_path) < os.path.getmtime(source_path):
+                build_question_pack(source_path, pack_path)
+        except OSError as e:
+            logger.warning(f"Could not build question pack {pack_path}: {e}. Reading {source_path} directly.")
+            return JsonlQuestionStore(source_path)
+    return MappedQuestionStore(pack_path)
 
 # --- Bot Configuration & Handlers ---
 QUIZ_LENGTH = 20
 QUIZ_COMPOSITION = {"easy": 7, "medium": 7, "hard": 6}
+FEEDBACK_DELAY = float(os.getenv("FEEDBACK_DELAY", "1.5"))  # Seconds the ✅/❌ verdict stays up
+# "scheduled": the next question is shown by a JobQueue job and handle_answer returns immediately.
+# "sleep": handle_answer waits FEEDBACK_DELAY itself before editing in the next question.
+# "merged": no delay; the verdict is shown as a toast and as a header above the next question.
+FEEDBACK_MODE = os.getenv("FEEDBACK_MODE", "scheduled")
+# Outbound Bot API limits (requests per second). A global rate of 0 disables the rate limiter.
+RATE_LIMIT_GLOBAL = float(os.getenv("RATE_LIMIT_GLOBAL", "30"))
+RATE_LIMIT_PER_CHAT = float(os.getenv("RATE_LIMIT_PER_CHAT", "1"))
+RATE_LIMIT_PER_GROUP = float(os.getenv("RATE_LIMIT_PER_GROUP", str(20 / 60)))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))
+# Updates processed at once across all users; each user's own updates are still handled in order.
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "64"))
+MAX_PENDING_UPDATES_PER_USER = int(os.getenv("MAX_PENDING_UPDATES_PER_USER", "8"))
+# Where quiz sessions survive restarts: "sqlite" (default), "redis" or "memory" (not persisted).
+SESSION_STORE = os.getenv("SESSION_STORE", "sqlite")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.sqlite3")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+PERSISTENCE_FLUSH_INTERVAL = float(os.getenv("PERSISTENCE_FLUSH_INTERVAL", "30"))  # Seconds between batched writes
+# Several workers serving one token (webhook mode behind a load balancer): every update reads and
+# writes the user's session in SESSION_STORE directly, guarded by a version number.
+SESSION_SHARED = os.getenv("SESSION_SHARED", "0") == "1"
+CONVERSATION_TIMEOUT = float(os.getenv("CONVERSATION_TIMEOUT", "1800"))  # Seconds of inactivity before a quiz ends
+# In-memory user_data is evicted after SESSION_IDLE_TIMEOUT seconds idle, or least recently used first
+# once all sessions together exceed SESSION_MEMORY_BUDGET bytes. Evicted data is parked in the
+# session store (or in SESSION_SPILL_PATH when sessions are not persisted) and restored on the next update.
+SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", "3600"))
+SESSION_MEMORY_BUDGET = int(os.getenv("SESSION_MEMORY_BUDGET", str(64 * 1024 * 1024)))
+SESSION_SPILL_PATH = os.getenv("SESSION_SPILL_PATH")
+# Adaptive assessments stop once the ability estimate's standard error (in logits) is at most
+# ADAPTIVE_TARGET_SE, after at least ADAPTIVE_MIN_QUESTIONS and at most QUIZ_LENGTH questions.
+ADAPTIVE_TARGET_SE = float(os.getenv("ADAPTIVE_TARGET_SE", "0.5"))
+ADAPTIVE_MIN_QUESTIONS = int(os.getenv("ADAPTIVE_MIN_QUESTIONS", "5"))
+ITEM_CALIBRATION_INTERVAL = float(os.getenv("ITEM_CALIBRATION_INTERVAL", "300"))  # Seconds between difficulty refits
+# Every answer and finished quiz is appended to ANSWER_LOG_PATH (JSON Lines) for item statistics;
+# an empty path keeps the statistics in memory only.
+ANSWER_LOG_PATH = os.getenv("ANSWER_LOG_PATH", "answers.jsonl")
+ANSWER_LOG_FLUSH_INTERVAL = float(os.getenv("ANSWER_LOG_FLUSH_INTERVAL", "5"))  # Seconds between log appends
+# Seconds between snapshots of the statistics folded from the log, so startup reads only newer events.
+ANSWER_LOG_SNAPSHOT_INTERVAL = float(os.getenv("ANSWER_LOG_SNAPSHOT_INTERVAL", "3600"))
+ITEM_STATS_MIN_ANSWERS = int(os.getenv("ITEM_STATS_MIN_ANSWERS", "10"))  # Before /itemstats flags a question
+# Practice mode serves up to PRACTICE_LENGTH due questions from the user's spaced-repetition deck.
+PRACTICE_LENGTH = int(os.getenv("PRACTICE_LENGTH", "10"))
+# Topics offered by the /start topic picker: source tags with at least this many questions.
+TOPIC_MIN_QUESTIONS = int(os.getenv("TOPIC_MIN_QUESTIONS", "4"))
+# Telegram user IDs (comma separated) allowed to use admin commands such as /cohort.
+ADMIN_USER_IDS = frozenset(int(user_id) for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip())
 ENCOURAGING_PHRASES = [
     "Every quiz is a step forward in mastering GMP! �",
     "Keep up the great work! Repetition is key to learning. 🧠",
@@ -1412,6 +318,1710 @@ ENCOURAGING_PHRASES = [
 WELCOME, IN_QUIZ, RESULTS_DISPLAYED, REVIEW_QUESTIONS = range(4)
 
 
+# --- Question Index ---
+# Topic tags are normalized from each question's comma-separated source, so that e.g.
+# "ICH Q8(R2) Pharmaceutical Development" and "ICH Q8, Q9, Q10" both count towards "ICH Q8".
+ICH_CODE = re.compile(r"\b([QEM]\d+[A-Z]?)\b")
+GMP_ANNEX = re.compile(r"\bGMP Annex (\d+)")
+PHARMACOPOEIA = re.compile(r"^(USP\b|EP\b|<\d+|Pharmacopoeias)")
+PARENTHESIZED = re.compile(r"\s*\([^)]*\)")
+TOP_LEVEL_COMMA = re.compile(r",(?![^(]*\))")  # Not inside parentheses, e.g. "Sampling Plans (e.g. ANSI, ISO)"
+GENERIC_SUFFIX = re.compile(r"\s+(Principles|Guideline|Guidance)$")
+TOPIC_ALIASES = {
+    "GDP": "Good Documentation Practices",
+    "Modern Validation": "Validation",
+    "Statistics": "Statistical Process Control",
+    "ISO 14644-3": "ISO 14644",
+}
+
+
+def source_tags(source):
+    """Returns the set of normalized topic tags for a question's source string."""
+    tags = set()
+    after_ich = False  # A bare code such as "Q10" continues an ICH list
+    for part in TOP_LEVEL_COMMA.split(source):
+        part = part.strip()
+        code = ICH_CODE.match(part) if after_ich else None
+        if part.startswith("ICH ") or code:
+            code = code or ICH_CODE.search(part)
+            if code:
+                tags.add(f"ICH {code.group(1)}")
+                after_ich = True
+                continue
+        after_ich = False
+        annex = GMP_ANNEX.search(part)
+        if annex:
+            tags.add(f"EU GMP Annex {annex.group(1)}")
+        elif PHARMACOPOEIA.match(part):
+            tags.add("Pharmacopoeias (USP, EP)")
+        elif "GAMP" in part:
+            tags.add("GAMP 5")
+        elif "Data Integrity" in part:
+            tags.add("Data Integrity")
+        elif part.startswith("FDA Process Validation"):
+            tags.add("FDA Process Validation")
+        elif part:
+            tag = GENERIC_SUFFIX.sub("", PARENTHESIZED.sub("", part)).strip()
+            tags.add(TOPIC_ALIASES.get(tag, tag))
+    return tags
+
+
+def is_in_sorted(ids, question_id):
+    position = bisect.bisect_left(ids, question_id)
+    return position < len(ids) and ids[position] == question_id
+
+
+class QuestionBank:
+    """Read-only view over a question store, indexed once at startup.
+
+    Questions are addressed by their integer position in the bank (the question ID).
+    The per-difficulty and per-source indexes are tuples of IDs, so building a quiz
+    only touches as many entries as the quiz is long. by_topic is an inverted index
+    from normalized topic tags (see source_tags) to sorted arrays of IDs, and topics
+    lists the tags from most to least questions. Question dicts are materialized
+    from the store on demand and kept in a small LRU cache.
+    """
+
+    def __init__(self, store, composition, cache_size=QUESTION_CACHE_SIZE):
+        self._store = store
+        self.version = store.version  # Changes whenever the question file does
+        self._load = functools.lru_cache(maxsize=cache_size)(store.load)
+
+        by_difficulty = {}
+        by_source = {}
+        for question_id, difficulty, source in store.index_entries():
+            by_difficulty.setdefault(difficulty, []).append(question_id)
+            by_source.setdefault(source, []).append(question_id)
+
+        self.by_difficulty = {difficulty: tuple(ids) for difficulty, ids in by_difficulty.items()}
+        self.by_source = {source: tuple(ids) for source, ids in by_source.items()}
+
+        by_topic = {}
+        for source, ids in self.by_source.items():
+            for tag in source_tags(source):
+                by_topic.setdefault(tag, []).extend(ids)
+        self.by_topic = {tag: array('I', sorted(ids)) for tag, ids in by_topic.items()}
+        self.topics = tuple(sorted(self.by_topic, key=lambda tag: (-len(self.by_topic[tag]), tag)))
+
+        self.validate_composition(composition)
+
+    def __len__(self):
+        return len(self._store)
+
+    def __getitem__(self, question_id):
+        """Returns the question dict for an ID. The dict is shared via the cache and must not be mutated."""
+        return self._load(question_id)
+
+    def validate_composition(self, composition):
+        """Raises ValueError if any difficulty has fewer questions than the composition asks for."""
+        shortfalls = [
+            f"{difficulty} (need {count}, have {len(self.by_difficulty.get(difficulty, ()))})"
+            for difficulty, count in composition.items()
+            if len(self.by_difficulty.get(difficulty, ())) < count
+        ]
+        if shortfalls:
+            raise ValueError(f"Not enough questions for quiz composition: {', '.join(shortfalls)}")
+
+    def sample_quiz(self, composition, rng=random, seen=None):
+        """Returns a shuffled list of question IDs matching the composition, drawn from rng.
+
+        Questions in seen (a SeenQuestions) are skipped. Once a difficulty runs out of unseen
+        questions, its questions are removed from seen and that difficulty starts over.
+        """
+        question_ids = []
+        for difficulty, count in composition.items():
+            pool = self.by_difficulty[difficulty]
+            if seen is None:
+                question_ids.extend(rng.sample(pool, count))
+            else:
+                question_ids.extend(self._sample_unseen(pool, count, rng, seen))
+        rng.shuffle(question_ids)
+        return question_ids
+
+    def sample_topics(self, topics, count, rng=random, seen=None):
+        """Returns up to count shuffled question IDs tagged with any of topics, preferring ones not in seen.
+
+        Like _sample_unseen this rejection-samples the per-topic arrays instead of building their
+        union: a topic is drawn in proportion to its size, then a question in it, which is kept
+        with probability 1 / (number of the topics it is tagged with) so that every question in
+        the union is equally likely. Small unions, and pools mostly seen already, are listed instead.
+        """
+        pools = [self.by_topic[topic] for topic in topics]
+        sizes = list(itertools.accumulate(map(len, pools)))
+        chosen = []
+        if sizes[-1] > 4 * count:
+            for _ in range(4 * count):
+                if len(chosen) == count:
+                    return chosen
+                question_id = rng.choice(rng.choices(pools, cum_weights=sizes)[0])
+                tagged = sum(1 for pool in pools if is_in_sorted(pool, question_id)) if len(pools) > 1 else 1
+                if (rng.random() * tagged < 1 and question_id not in chosen
+                        and (seen is None or question_id not in seen)):
+                    chosen.append(question_id)
+
+        rest = sorted(set().union(*pools).difference(chosen))
+        unseen = rest if seen is None else [question_id for question_id in rest if question_id not in seen]
+        chosen.extend(rng.sample(unseen, min(count - len(chosen), len(unseen))))
+        if len(chosen) < count and seen is not None:
+            seen_ids = [question_id for question_id in rest if question_id in seen]
+            chosen.extend(rng.sample(seen_ids, min(count - len(chosen), len(seen_ids))))
+        rng.shuffle(chosen)
+        return chosen
+
+    @staticmethod
+    def _sample_unseen(pool, count, rng, seen):
+        # Rejection sampling needs about count draws while most of the pool is unseen. After a
+        # few misses per pick, list the unseen questions instead.
+        chosen = []
+        for _ in range(4 * count):
+            if len(chosen) == count:
+                return chosen
+            question_id = rng.choice(pool)
+            if question_id not in seen and question_id not in chosen:
+                chosen.append(question_id)
+        unseen = [question_id for question_id in pool if question_id not in seen and question_id not in chosen]
+        if len(unseen) < count - len(chosen):
+            seen.discard_all(pool)
+            unseen = [question_id for question_id in pool if question_id not in chosen]
+        chosen.extend(rng.sample(unseen, count - len(chosen)))
+        return chosen
+
+
+QUESTION_BANK = QuestionBank(open_question_store(QUESTIONS_FILE, QUESTIONS_PACK), QUIZ_COMPOSITION)
+
+
+# --- Quiz Session ---
+SESSION_KEY = "session"  # The current quiz in user_data; cleared with every new quiz
+UNANSWERED = -1
+
+
+def pack_permutation(order):
+    """Packs a display order of option indexes (at most MAX_OPTIONS of them) into a single int."""
+    packed = 0
+    for slot, original_idx in enumerate(order):
+        packed |= original_idx << (4 * slot)
+    return packed
+
+
+def unpack_permutation(packed, option_count):
+    return [(packed >> (4 * slot)) & 0xF for slot in range(option_count)]
+
+
+def draw_permutations(question_ids, rng=random):
+    """Returns a random packed option order for each question."""
+    permutations = []
+    for question_id in question_ids:
+        option_count = len(QUESTION_BANK[question_id]['options'])
+        permutations.append(pack_permutation(rng.sample(range(option_count), option_count)))
+    return permutations
+
+
+class QuizSession:
+    """One user's quiz, stored under user_data[SESSION_KEY].
+
+    Questions are kept as parallel arrays indexed by quiz position, never as text:
+    question IDs in QUESTION_BANK, the display order of each question's options
+    (packed 4 bits per slot) and the original index of the chosen option.
+    correct_mask has bit n set if the answer at position n was correct.
+
+    Sessions started with from_seed draw everything from random.Random seeded with
+    (seed, bank version), so only the seed is persisted and the question and option
+    arrays are regenerated on load. seen_bits is the SeenQuestions snapshot the draw
+    excluded, if any, so that the draw can be repeated (see from_seed for when it is too big). Sessions built from explicit arrays (cohorts)
+    persist the arrays themselves. Either kind is emptied on load if the bank version
+    has changed, since its question IDs may now point at different questions.
+
+    render_cache memoizes the results card and review pages, and last_rendered holds
+    (message_id, content hash) of the last edit made by edit_if_changed. Both are
+    cleared whenever the answers change. They are not persisted, and neither is
+    shown_at, the time the current question was last rendered (for answer latency).
+    """
+
+    __slots__ = ('session_id', 'seed', 'bank_version', 'answers', 'question_index', 'score', 'review_index',
+                 'correct_mask', 'seen_bits', 'question_ids', 'permutations', 'render_cache', 'last_rendered',
+                 'shown_at')
+    persisted_slots = __slots__[:-5]
+    adaptive = False
+    practice = False
+
+    def __init__(self, question_ids, permutations, seed=None, seen_bits=None):
+        self.session_id = random.getrandbits(32)  # Tells this quiz apart from the user's earlier and later ones
+        self.seed = seed
+        self.seen_bits = seen_bits
+        self.bank_version = QUESTION_BANK.version
+        self.question_ids = array('I', question_ids)
+        self.permutations = array('I', permutations)
+        self.answers = array('b', [UNANSWERED]) * len(self.question_ids)
+        self.question_index = 0
+        self.score = 0
+        self.review_index = 0
+        self.correct_mask = 0
+        self.render_cache = {}
+        self.last_rendered = None
+        self.shown_at = None
+
+    def __getstate__(self):
+        state = {name: getattr(self, name) for name in self.persisted_slots}
+        if self.seed is None:
+            state['question_ids'] = self.question_ids
+            state['permutations'] = self.permutations
+        return state
+
+    def __setstate__(self, state):
+        self.seed = self.bank_version = self.seen_bits = None  # Sessions pickled before these existed
+        self.correct_mask = 0
+        for name, value in state.items():
+            setattr(self, name, value)
+        if self.bank_version != QUESTION_BANK.version:
+            # The question IDs may now name other questions; keep an empty, finished session so handlers end it cleanly.
+            logger.warning(f"Dropping quiz {self.session_id}: the question bank changed since it started.")
+            self.drop_questions()
+        elif self.seed is not None:
+            seen = None if self.seen_bits is None else SeenQuestions.from_snapshot(self.bank_version, self.seen_bits)
+            self.question_ids, self.permutations = self.draw(self.seed, self.bank_version, seen)
+        self.render_cache = {}
+        self.last_rendered = None
+        self.shown_at = None
+
+    def drop_questions(self):
+        self.question_ids, self.permutations = array('I'), array('I')
+        self.answers = array('b')
+        self.question_index = self.score = self.review_index = self.correct_mask = 0
+
+    @staticmethod
+    def draw(seed, bank_version, seen=None):
+        """Returns the (question_ids, permutations) arrays a seed yields for QUIZ_COMPOSITION on a bank version."""
+        rng = random.Random(f"{seed}:{bank_version}")
+        question_ids = QUESTION_BANK.sample_quiz(QUIZ_COMPOSITION, rng, seen)
+        return array('I', question_ids), array('I', draw_permutations(question_ids, rng))
+
+    @classmethod
+    def from_seed(cls, seed=None, seen=None):
+        """Starts a quiz drawn from seed (a fresh random one by default) on the current question bank.
+
+        With a seen set the draw avoids the user's seen questions, and a snapshot of the set
+        taken before the draw (which may reset part of it) is kept alongside the seed. When that
+        snapshot would take more space than the quiz's own arrays (large banks), the session
+        keeps the arrays instead, like an unseeded one.
+        """
+        if seed is None:
+            seed = random.getrandbits(64)
+        seen_bits = seen.snapshot() if seen is not None else None
+        question_ids, permutations = cls.draw(seed, QUESTION_BANK.version, seen)
+        if seen_bits is not None and len(seen_bits) > question_ids.itemsize * len(question_ids) * 2:
+            return cls(question_ids, permutations)
+        return cls(question_ids, permutations, seed, seen_bits)
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def nbytes(self):
+        """Approximate memory held by this session, for the session memory budget."""
+        return (sys.getsizeof(self) + sys.getsizeof(self.question_ids) + sys.getsizeof(self.permutations)
+                + sys.getsizeof(self.answers) + sys.getsizeof(self.render_cache)
+                + sum(sys.getsizeof(text) for text, _ in self.render_cache.values()))
+
+    @property
+    def is_finished(self):
+        return self.question_index >= len(self.question_ids)
+
+    @property
+    def current_question_id(self):
+        return self.question_ids[self.question_index]
+
+    def option_order(self, position, option_count):
+        """Original option indexes in the order they are shown for the question at position."""
+        return unpack_permutation(self.permutations[position], option_count)
+
+    def record_answer(self, option_index, is_correct):
+        """Stores the chosen option (by original index) for the current question and updates the score."""
+        self.answers[self.question_index] = option_index
+        if is_correct:
+            self.score += 1
+            self.correct_mask |= 1 << self.question_index
+        self.render_cache.clear()
+        self.last_rendered = None
+
+    def advance(self):
+        """Moves to the next question. Returns False once the quiz is finished."""
+        self.question_index += 1
+        self.render_cache.clear()
+        self.last_rendered = None
+        return not self.is_finished
+
+    @property
+    def answered_count(self):
+        return self.question_index
+
+    def answer_at(self, position):
+        """Returns (question_id, chosen original option index) for an answered position."""
+        return self.question_ids[position], self.answers[position]
+
+    def move_review(self, step):
+        """Moves the review cursor by step, staying within the answered questions. Returns True if it moved."""
+        new_index = self.review_index + step
+        if 0 <= new_index < self.answered_count:
+            self.review_index = new_index
+            return True
+        return False
+
+    @property
+    def question_total(self):
+        """Question count shown in the heading."""
+        return len(self.question_ids)
+
+    def is_correct_at(self, position):
+        return bool(self.correct_mask >> position & 1)
+
+    def proficiency_percentage(self):
+        return (self.score / len(self)) * 100 if len(self) else 0.0
+
+    def cached_render(self, key, render):
+        """Returns render(self), memoized under key until the answers next change."""
+        rendered = self.render_cache.get(key)
+        if rendered is None:
+            rendered = self.render_cache[key] = render(self)
+        return rendered
+
+
+# --- Seen Questions ---
+SEEN_KEY = "seen_questions"  # Kept in user_data across quizzes, /start and /cancel
+
+
+class SeenQuestions:
+    """Bitset over QUESTION_BANK of the questions a user has answered: one bit per question."""
+
+    __slots__ = ('bank_version', 'bits')
+
+    def __init__(self):
+        self.bank_version = QUESTION_BANK.version
+        self.bits = bytearray((len(QUESTION_BANK) + 7) // 8)
+
+    def __contains__(self, question_id):
+        return self.bits[question_id >> 3] >> (question_id & 7) & 1
+
+    def add(self, question_id):
+        self.bits[question_id >> 3] |= 1 << (question_id & 7)
+
+    def discard_all(self, question_ids):
+        for question_id in question_ids:
+            self.bits[question_id >> 3] &= ~(1 << (question_id & 7))
+
+    def snapshot(self):
+        """The bits as bytes without trailing zero bytes, for QuizSession.seen_bits."""
+        return bytes(self.bits).rstrip(b"\0")
+
+    @classmethod
+    def from_snapshot(cls, bank_version, bits):
+        seen = cls.__new__(cls)
+        seen.bank_version = bank_version
+        seen.bits = bytearray(bits).ljust((len(QUESTION_BANK) + 7) // 8, b"\0")
+        return seen
+
+
+def seen_questions(user_data):
+    """Returns the user's SeenQuestions, starting a new one if there is none or the bank has changed."""
+    seen = user_data.get(SEEN_KEY)
+    if seen is None or seen.bank_version != QUESTION_BANK.version:
+        seen = user_data[SEEN_KEY] = SeenQuestions()
+    return seen
+
+
+# --- Cohort Assessments ---
+def sample_rows(rng, pool, count, size):
+    """A (count, size) array whose rows are independent draws of size distinct entries of pool.
+
+    Floyd's algorithm, one column at a time for all rows, so memory is O(count * size)
+    however large the pool is.
+    """
+    picks = np.empty((count, size), dtype=np.int64)
+    for column, upper in enumerate(range(len(pool) - size, len(pool))):
+        candidates = rng.integers(0, upper + 1, count)
+        taken = (picks[:, :column] == candidates[:, np.newaxis]).any(axis=1)
+        picks[:, column] = np.where(taken, upper, candidates)
+    return np.asarray(pool, dtype=np.int64)[picks]
+
+
+def generate_cohort(count, composition, seed=None):
+    """Builds count QuizSessions with the given composition, reproducibly for a given seed (≥ 0).
+
+    Every quiz and option order is drawn in one vectorized NumPy pass. Call it via asyncio.to_thread.
+    """
+    rng = np.random.default_rng(seed)
+    columns = [sample_rows(rng, QUESTION_BANK.by_difficulty[difficulty], count, size)
+               for difficulty, size in composition.items()]
+    question_ids = rng.permuted(np.concatenate(columns, axis=1), axis=1)
+
+    option_counts = np.zeros(len(QUESTION_BANK), dtype=np.int64)
+    for question_id in np.unique(question_ids).tolist():
+        option_counts[question_id] = len(QUESTION_BANK[question_id]['options'])
+    option_counts = option_counts[question_ids][..., np.newaxis]
+
+    # Option orders: sorting random keys gives a permutation; slots past a question's option count
+    # sort last and are zeroed before packing 4 bits per slot, as pack_permutation does.
+    slots = np.arange(MAX_OPTIONS)
+    keys = rng.random(question_ids.shape + (MAX_OPTIONS,))
+    keys[slots >= option_counts] = np.inf
+    order = np.where(slots < option_counts, keys.argsort(axis=2), 0).astype(np.uint64)
+    permutations = (order << (4 * slots).astype(np.uint64)).sum(axis=2)
+
+    return [QuizSession(ids, packed) for ids, packed in zip(question_ids.tolist(), permutations.tolist())]
+
+
+class CohortRoster:
+    """Quiz sessions assigned ahead of time to trainees, handed out when each next starts a quiz.
+
+    Kept in a session store when one is given (so every worker and restart sees them), else in memory.
+    """
+
+    namespace = "cohort"
+
+    def __init__(self, store=None):
+        self._store = store
+        self._sessions = {}
+
+    async def assign(self, sessions_by_user):
+        """Assigns {user_id: QuizSession}, replacing any unclaimed earlier assignment."""
+        if self._store is None:
+            self._sessions.update(sessions_by_user)
+            return
+        items = {(self.namespace, str(user_id)): pickle.dumps(session, pickle.HIGHEST_PROTOCOL)
+                 for user_id, session in sessions_by_user.items()}
+        await asyncio.to_thread(self._store.write_batch, items)
+
+    async def claim(self, user_id):
+        """Removes and returns the session assigned to user_id, or None. Only one worker can claim a session."""
+        if self._store is None:
+            return self._sessions.pop(user_id, None)
+        value = await asyncio.to_thread(self._store.take, self.namespace, str(user_id))
+        return pickle.loads(value) if value is not None else None
+
+
+COHORT_ROSTER = CohortRoster()  # Store-backed once main() has picked the session store
+
+
+# --- Item Statistics ---
+class ItemStatistics:
+    """Running statistics for every question, updated in O(1) per answer.
+
+    Per question: answers, correct answers (their share is the p-value) and answer time.
+    Discrimination is the point-biserial correlation between answering the question
+    correctly and the quiz score (share correct), so it is accumulated from finished
+    quizzes only, as sums that give both group means and the score variance.
+    """
+
+    def __init__(self, size):
+        self.attempts = array('I', [0]) * size
+        self.correct = array('I', [0]) * size
+        self.timed = array('I', [0]) * size  # Answers with a known answer time
+        self.latency_sum = array('d', [0.0]) * size
+        self.scored = array('I', [0]) * size  # Answers in finished quizzes, and the sums below over them
+        self.scored_correct = array('I', [0]) * size
+        self.score_sum = array('d', [0.0]) * size
+        self.score_sq_sum = array('d', [0.0]) * size
+        self.correct_score_sum = array('d', [0.0]) * size
+        self.answer_count = 0
+        self.quiz_count = 0
+
+    def __len__(self):
+        return len(self.attempts)
+
+    def add_answer(self, question_id, is_correct, latency=None):
+        self.attempts[question_id] += 1
+        self.correct[question_id] += is_correct
+        if latency is not None:
+            self.timed[question_id] += 1
+            self.latency_sum[question_id] += latency
+        self.answer_count += 1
+
+    def add_quiz(self, responses, score):
+        """Adds a finished quiz's (question_id, is_correct) responses, given its score as a share correct."""
+        for question_id, is_correct in responses:
+            self.scored[question_id] += 1
+            self.score_sum[question_id] += score
+            self.score_sq_sum[question_id] += score * score
+            if is_correct:
+                self.scored_correct[question_id] += 1
+                self.correct_score_sum[question_id] += score
+        self.quiz_count += 1
+
+    def p_value(self, question_id):
+        attempts = self.attempts[question_id]
+        return self.correct[question_id] / attempts if attempts else None
+
+    def mean_latency(self, question_id):
+        timed = self.timed[question_id]
+        return self.latency_sum[question_id] / timed if timed else None
+
+    def discrimination(self, question_id):
+        """Point-biserial correlation, or None while it is undefined (no variance yet)."""
+        n = self.scored[question_id]
+        n_correct = self.scored_correct[question_id]
+        if n < 2 or n_correct in (0, n):
+            return None
+        mean = self.score_sum[question_id] / n
+        variance = self.score_sq_sum[question_id] / n - mean * mean
+        if variance <= 1e-12:
+            return None
+        p = n_correct / n
+        mean_correct = self.correct_score_sum[question_id] / n_correct
+        return (mean_correct - mean) / math.sqrt(variance) * math.sqrt(p / (1 - p))
+
+
+def quiz_responses(question_ids, correct_mask):
+    """(question_id, is_correct) pairs for a quiz's answered questions, in order."""
+    return [(question_id, bool(correct_mask >> position & 1)) for position, question_id in enumerate(question_ids)]
+
+
+class AnswerLog:
+    """Append-only JSON Lines log of answers and finished quizzes, feeding an ItemStatistics.
+
+    Events update the statistics as they happen and are buffered; flush() appends them off
+    the event loop. The log itself is never rewritten. snapshot() folds the events logged since
+    the last snapshot into it and saves it next to the log together with the byte offset it
+    covers, so replay() at startup loads the snapshot and reads only the events after that
+    offset. Snapshots are built from the file rather than from this process's statistics, so
+    several workers can append to one log and any of them can take snapshots. Events recorded
+    against another version of the question bank are skipped.
+
+    Practice and adaptive answers are not recorded: practice only revisits missed questions,
+    and adaptive quizzes pick items near each user's ability, which skews p-values and makes
+    their scores useless for discrimination (and would pull ItemCalibration's fit along).
+    """
+
+    def __init__(self, path, stats):
+        self.path = path
+        self.snapshot_path = f"{path}.snapshot" if path else None
+        self.stats = stats
+        self._buffer = []
+        self._flush_lock = asyncio.Lock()
+
+    def _event(self, **fields):
+        if self.path:
+            fields['t'] = round(time.time(), 3)
+            fields['b'] = QUESTION_BANK.version
+            self._buffer.append(json.dumps(fields, separators=(',', ':')))
+
+    def answer(self, user_id, session, is_correct):
+        """Records the answer to the session's current question; call before the session advances."""
+        if session.practice or session.adaptive:
+            return
+        question_id = session.current_question_id
+        latency = time.time() - session.shown_at if session.shown_at is not None else None
+        self.stats.add_answer(question_id, is_correct, latency)
+        self._event(e="a", u=user_id, s=session.session_id, q=question_id, c=int(is_correct),
+                    ms=None if latency is None else int(latency * 1000))
+
+    def quiz(self, user_id, session):
+        """Records a finished quiz, adding its responses to the discrimination statistics."""
+        answered = session.answered_count
+        if not answered or session.practice or session.adaptive:
+            return
+        question_ids = session.question_ids[:answered]
+        self.stats.add_quiz(quiz_responses(question_ids, session.correct_mask), session.score / answered)
+        # The responses go into the event itself, so replay() needs no answer events from before a snapshot
+        self._event(e="q", u=user_id, s=session.session_id, score=session.score, n=answered,
+                    r=question_ids.tolist(), m=session.correct_mask)
+
+    async def flush(self, context=None):
+        """Appends buffered events to the log. Also usable as a JobQueue callback."""
+        async with self._flush_lock:
+            lines, self._buffer = self._buffer, []
+            if lines:
+                await asyncio.to_thread(self._append, lines)
+
+    def _append(self, lines):
+        # One O_APPEND write per flush, so lines from several workers sharing the log never interleave
+        descriptor = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(descriptor, ('\n'.join(lines) + '\n').encode('utf-8'))
+        finally:
+            os.close(descriptor)
+
+    async def snapshot(self, context=None):
+        """Flushes, then folds the new log events into the saved snapshot. Also usable as a JobQueue callback."""
+        if not self.path:
+            return
+        await self.flush()
+        await asyncio.to_thread(self._update_snapshot)
+
+    def _update_snapshot(self):
+        stats = ItemStatistics(len(QUESTION_BANK))
+        offset = self._load_snapshot(stats)
+        _, offset = self._fold(stats, offset)
+        temporary_path = f"{self.snapshot_path}.{os.getpid()}.tmp"  # Workers may snapshot at the same time
+        with open(temporary_path, 'wb') as f:
+            pickle.dump({'bank_version': QUESTION_BANK.version, 'offset': offset, 'stats': vars(stats)}, f,
+                        pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, self.snapshot_path)
+
+    def _load_snapshot(self, stats):
+        """Loads the saved statistics into stats if they match the question bank. Returns the log offset they cover."""
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"Ignoring unreadable answer log snapshot {self.snapshot_path}: {e}")
+            return 0
+        log_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if snapshot['bank_version'] != QUESTION_BANK.version or snapshot['offset'] > log_size:
+            return 0  # Taken before a bank update, or of a log that has since been replaced
+        vars(stats).update(snapshot['stats'])
+        return snapshot['offset']
+
+    def _fold(self, stats, offset):
+        """Applies the complete log lines from offset on to stats. Returns (events applied, offset after them)."""
+        if not os.path.exists(self.path):
+            return 0, 0
+        applied = 0
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Still being appended, or cut short by a crash; read again next time
+                offset += len(line)
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event.get('b') != QUESTION_BANK.version:
+                    continue
+                if event['e'] == "a":
+                    latency = event['ms'] / 1000 if event.get('ms') is not None else None
+                    stats.add_answer(event['q'], bool(event['c']), latency)
+                elif event['e'] == "q":
+                    stats.add_quiz(quiz_responses(event['r'], event['m']), event['score'] / event['n'])
+                applied += 1
+        return applied, offset
+
+    def replay(self):
+        """Rebuilds the statistics from the snapshot and the log. Returns the number of log events applied."""
+        if not self.path:
+            return 0
+        applied, _ = self._fold(self.stats, self._load_snapshot(self.stats))
+        return applied
+
+
+ITEM_STATS = ItemStatistics(len(QUESTION_BANK))
+ANSWER_LOG = AnswerLog(ANSWER_LOG_PATH, ITEM_STATS)
+
+
+# --- Adaptive Testing ---
+# Rasch (1PL) model: an examinee of ability θ answers an item of difficulty b correctly with
+# probability 1 / (1 + exp(b - θ)), both in logits.
+DIFFICULTY_PRIORS = {"easy": -1.0, "medium": 0.0, "hard": 1.0}
+ABILITY_GRID = [step / 10 for step in range(-40, 41)]
+ABILITY_PRIOR = [math.exp(-theta * theta / 2) for theta in ABILITY_GRID]  # Standard normal, unnormalized
+
+
+def rasch_probability(ability, difficulty):
+    return 1 / (1 + math.exp(difficulty - ability))
+
+
+def estimate_ability(responses):
+    """EAP estimate of ability and its posterior standard deviation from (difficulty, is_correct) pairs."""
+    weights = list(ABILITY_PRIOR)
+    for difficulty, is_correct in responses:
+        for i, theta in enumerate(ABILITY_GRID):
+            p = rasch_probability(theta, difficulty)
+            weights[i] *= p if is_correct else 1 - p
+    total = sum(weights)
+    mean = sum(w * theta for w, theta in zip(weights, ABILITY_GRID)) / total
+    variance = sum(w * (theta - mean) ** 2 for w, theta in zip(weights, ABILITY_GRID)) / total
+    return mean, math.sqrt(variance)
+
+
+class ItemCalibration:
+    """Rasch difficulty of every question, fitted from the answer counts in an ItemStatistics.
+
+    Each item's share of correct answers is shrunk towards its tagged difficulty's prior
+    (PRIOR_WEIGHT pseudo-answers), and its difficulty is the b at which an examinee of
+    ability 0 has that chance of success. Items are kept sorted by difficulty so the most
+    informative item for an ability, the one with the nearest b, is found by bisection.
+
+    The fit is a snapshot: refresh() recomputes it (O(N log N), run off the event loop every
+    ITEM_CALIBRATION_INTERVAL seconds), and lookups between refreshes cost no refitting.
+    """
+
+    PRIOR_WEIGHT = 10
+    CANDIDATES = 3  # The next item is drawn from this many nearest ones, so not everyone sees the same quiz
+    HISTOGRAM_STEP = 0.02  # Logits per bin of the difficulty histogram behind expected_percentage
+
+    def __init__(self, bank, stats):
+        self.priors = array('d', [0.0]) * len(bank)
+        for difficulty, question_ids in bank.by_difficulty.items():
+            for question_id in question_ids:
+                self.priors[question_id] = DIFFICULTY_PRIORS.get(difficulty, 0.0)
+        self.stats = stats
+        self.refresh()
+
+    def fit(self, question_id):
+        prior_p = rasch_probability(0.0, self.priors[question_id])
+        p = ((self.stats.correct[question_id] + self.PRIOR_WEIGHT * prior_p)
+             / (self.stats.attempts[question_id] + self.PRIOR_WEIGHT))
+        return math.log((1 - p) / p)
+
+    def refresh(self):
+        """Refits every difficulty from the current statistics and swaps the new snapshot in."""
+        difficulties = array('d', map(self.fit, range(len(self.priors))))
+        order = sorted(range(len(difficulties)), key=difficulties.__getitem__)
+        histogram = collections.Counter(round(difficulty / self.HISTOGRAM_STEP) for difficulty in difficulties)
+        # One attribute, so readers on the event loop never see a half-built snapshot
+        self._snapshot = (difficulties, [difficulties[question_id] for question_id in order], order,
+                          [(step * self.HISTOGRAM_STEP, count) for step, count in histogram.items()])
+
+    async def refresh_job(self, context):
+        """JobQueue callback running refresh() in a worker thread."""
+        await asyncio.to_thread(self.refresh)
+
+    def difficulty(self, question_id):
+        return self._snapshot[0][question_id]
+
+    def pick(self, ability, exclude):
+        """Returns one of the unseen items with difficulty nearest to ability, or None if all were seen."""
+        _, difficulties, order, _ = self._snapshot
+
+        candidates = []
+        right = bisect.bisect_left(difficulties, ability)
+        left = right - 1
+        while len(candidates) < self.CANDIDATES and (left >= 0 or right < len(order)):
+            if right >= len(order) or (left >= 0 and ability - difficulties[left] <= difficulties[right] - ability):
+                question_id = order[left]
+                left -= 1
+            else:
+                question_id = order[right]
+                right += 1
+            if question_id not in exclude:
+                candidates.append(question_id)
+        return random.choice(candidates) if candidates else None
+
+    def expected_percentage(self, ability):
+        """Share of the whole bank an examinee of this ability is expected to answer correctly."""
+        histogram = self._snapshot[3]
+        return 100 * sum(count * rasch_probability(ability, difficulty)
+                         for difficulty, count in histogram) / len(self.priors)
+
+
+ITEM_CALIBRATION = ItemCalibration(QUESTION_BANK, ITEM_STATS)
+
+
+class AdaptiveSession(QuizSession):
+    """A quiz that picks each next question from the running ability estimate.
+
+    It ends once the estimate is precise enough (see ADAPTIVE_TARGET_SE) or after QUIZ_LENGTH
+    questions. The question arrays grow by one as each answer comes in.
+    """
+
+    __slots__ = ()
+    adaptive = True
+    question_total = QUIZ_LENGTH  # The most it can take; it usually stops earlier
+
+    def __init__(self):
+        super().__init__([], [])
+
+    @classmethod
+    def start(cls):
+        session = cls()
+        session.add_question(ITEM_CALIBRATION.pick(0.0, ()))
+        return session
+
+    def add_question(self, question_id):
+        self.question_ids.append(question_id)
+        self.permutations.extend(draw_permutations([question_id]))
+        self.answers.append(UNANSWERED)
+
+    def ability(self):
+        """(estimate, standard error) from every answer recorded so far."""
+        responses = [(ITEM_CALIBRATION.difficulty(question_id), self.is_correct_at(position))
+                     for position, question_id in enumerate(self.question_ids)
+                     if self.answers[position] != UNANSWERED]
+        return estimate_ability(responses)
+
+    def advance(self):
+        if self.question_index + 1 < QUIZ_LENGTH:
+            ability, error = self.ability()
+            if self.question_index + 1 < ADAPTIVE_MIN_QUESTIONS or error > ADAPTIVE_TARGET_SE:
+                question_id = ITEM_CALIBRATION.pick(ability, set(self.question_ids))
+                if question_id is not None:
+                    self.add_question(question_id)
+        return super().advance()
+
+    def proficiency_percentage(self):
+        return ITEM_CALIBRATION.expected_percentage(self.ability()[0])
+
+
+# --- Spaced Repetition ---
+DECK_KEY = "practice_deck"  # Kept in user_data across quizzes, /start and /cancel
+KEPT_USER_DATA_KEYS = (DECK_KEY, SEEN_KEY)
+# Leitner boxes: minutes until a question in each box is due again. A question missed anywhere goes
+# back to box 0; answering one in the last box correctly retires it from the deck.
+LEITNER_INTERVALS = (10, 24 * 60, 3 * 24 * 60, 7 * 24 * 60, 14 * 24 * 60, 30 * 24 * 60)
+
+
+def current_minute():
+    return int(time.time() // 60)
+
+
+def format_wait(minutes):
+    if minutes < 60:
+        return f"{minutes} min"
+    if minutes < 24 * 60:
+        return f"{minutes // 60} h"
+    return f"{minutes // (24 * 60)} days"
+
+
+def deck_key(due_minute, box, question_id):
+    return due_minute << 36 | box << 32 | question_id
+
+
+def deck_key_question(key):
+    return key & 0xFFFFFFFF
+
+
+def deck_key_box(key):
+    return key >> 32 & 0xF
+
+
+def deck_key_due(key):
+    return key >> 36
+
+
+class PracticeDeck:
+    """One user's spaced-repetition queue, as a min-heap of 64-bit keys in an array('Q').
+
+    Each key packs due minute << 36 | Leitner box << 32 | question ID (28, 4 and 32 bits), so
+    the smallest key is the question due soonest: 8 bytes per question, at most one entry per
+    question. KEY_LAYOUT changes whenever this packing does.
+    Pushing and popping are O(log n); re-queuing a question that is already in the deck
+    needs a linear search first, which is bounded by the bank size. Like SeenQuestions, a deck
+    is only valid for the bank version it was built on (see practice_deck).
+    """
+
+    __slots__ = ('bank_version', 'key_layout', 'keys')
+    KEY_LAYOUT = 2
+
+    def __init__(self):
+        self.bank_version = QUESTION_BANK.version
+        self.key_layout = self.KEY_LAYOUT
+        self.keys = array('Q')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _sift_up(self, position):
+        keys = self.keys
+        key = keys[position]
+        while position:
+            parent = (position - 1) >> 1
+            if keys[parent] <= key:
+                break
+            keys[position] = keys[parent]
+            position = parent
+        keys[position] = key
+
+    def _sift_down(self, position):
+        keys = self.keys
+        size = len(keys)
+        key = keys[position]
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and keys[child + 1] < keys[child]:
+                child += 1
+            if keys[child] >= key:
+                break
+            keys[position] = keys[child]
+            position = child
+        keys[position] = key
+
+    def push(self, key):
+        self.keys.append(key)
+        self._sift_up(len(self.keys) - 1)
+
+    def pop(self):
+        last = self.keys.pop()
+        if not self.keys:
+            return last
+        top = self.keys[0]
+        self.keys[0] = last
+        self._sift_down(0)
+        return top
+
+    def _remove_at(self, position):
+        last = self.keys.pop()
+        if position < len(self.keys):
+            self.keys[position] = last
+            self._sift_down(position)
+            self._sift_up(position)
+
+    def next_due(self):
+        """Minute the next question falls due, or None if the deck is empty."""
+        return deck_key_due(self.keys[0]) if self.keys else None
+
+    def due_count(self, now):
+        """Number of questions due by minute now, visiting only the due part of the heap."""
+        limit = deck_key(now + 1, 0, 0)
+        count = 0
+        stack = [0] if self.keys else []
+        while stack:
+            position = stack.pop()
+            if self.keys[position] < limit:
+                count += 1
+                stack.extend(child for child in (2 * position + 1, 2 * position + 2) if child < len(self.keys))
+        return count
+
+    def pop_due(self, limit, now):
+        """Removes and returns the keys of up to limit questions due by minute now, soonest first."""
+        due = []
+        threshold = deck_key(now + 1, 0, 0)
+        while self.keys and len(due) < limit and self.keys[0] < threshold:
+            due.append(self.pop())
+        return due
+
+    def add_missed(self, question_id, now):
+        """Queues a question answered wrongly in a quiz, moving it back to box 0 if already queued."""
+        for position, key in enumerate(self.keys):
+            if deck_key_question(key) == question_id:
+                self._remove_at(position)
+                break
+        self.push(deck_key(now + LEITNER_INTERVALS[0], 0, question_id))
+
+    def reschedule(self, key, is_correct, now):
+        """Puts a practiced question (popped as key) back in its next box, or retires it."""
+        question_id = deck_key_question(key)
+        box = min(deck_key_box(key) + 1, len(LEITNER_INTERVALS)) if is_correct else 0
+        if box < len(LEITNER_INTERVALS):
+            self.push(deck_key(now + LEITNER_INTERVALS[box], box, question_id))
+
+
+class PracticeSession(QuizSession):
+    """A practice round over questions popped from the user's deck, in due order.
+
+    deck_keys holds the popped keys; unanswered ones go back to the deck if the round is abandoned.
+    """
+
+    __slots__ = ('deck_keys',)
+    persisted_slots = QuizSession.persisted_slots + __slots__
+    practice = True
+
+    def __init__(self, keys):
+        question_ids = [deck_key_question(key) for key in keys]
+        super().__init__(question_ids, draw_permutations(question_ids))
+        self.deck_keys = array('Q', keys)
+
+    def drop_questions(self):
+        super().drop_questions()
+        self.deck_keys = array('Q')
+
+
+def practice_deck(user_data, create=True):
+    """Returns the user's PracticeDeck, dropping one built on another bank version or key layout.
+
+    Starts a new deck if there is none, or returns None then if create is False.
+    """
+    deck = user_data.get(DECK_KEY)
+    if deck is not None and (getattr(deck, 'bank_version', None) != QUESTION_BANK.version
+                             or getattr(deck, 'key_layout', 1) != PracticeDeck.KEY_LAYOUT):
+        del user_data[DECK_KEY]
+        deck = None
+    if deck is None and create:
+        deck = user_data[DECK_KEY] = PracticeDeck()
+    return deck
+
+
+def update_practice_deck(user_data, session, is_correct):
+    """Reschedules a practiced question, or queues a question missed in a quiz for practice.
+
+    Call before the session advances past the answered question.
+    """
+    if session.practice:
+        practice_deck(user_data).reschedule(session.deck_keys[session.question_index], is_correct, current_minute())
+    elif not is_correct:
+        practice_deck(user_data).add_missed(session.current_question_id, current_minute())
+
+
+def discard_session(user_data):
+    """Drops the current quiz; questions of an unfinished practice round go back to the deck."""
+    session = user_data.pop(SESSION_KEY, None)
+    if session is not None and session.practice:
+        deck = practice_deck(user_data)
+        for key in session.deck_keys[session.answered_count:]:
+            deck.push(key)
+
+
+def clear_quiz_data(user_data):
+    """Clears user_data for a fresh start, keeping what outlives a quiz (KEPT_USER_DATA_KEYS)."""
+    discard_session(user_data)
+    kept = {key: user_data[key] for key in KEPT_USER_DATA_KEYS if key in user_data}
+    user_data.clear()
+    user_data.update(kept)
+
+
+# --- Outbound Rate Limiting ---
+# Queued Bot API requests are sent lowest value first. Callback query answers always go first;
+# other requests take the priority of the handler that made them (see outbound_priority).
+PRIORITY_FEEDBACK, PRIORITY_QUIZ, PRIORITY_REVIEW = range(3)
+OUTBOUND_PRIORITY = contextvars.ContextVar("outbound_priority", default=PRIORITY_QUIZ)
+
+
+def outbound_priority(priority):
+    """Decorator that queues a handler's outbound Bot API requests at the given priority."""
+    def decorator(callback):
+        @functools.wraps(callback)
+        async def wrapper(*args, **kwargs):
+            token = OUTBOUND_PRIORITY.set(priority)
+            try:
+                return await callback(*args, **kwargs)
+            finally:
+                OUTBOUND_PRIORITY.reset(token)
+        return wrapper
+    return decorator
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def delay(self, now):
+        """Seconds until a token is available (0 if one is available now)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class PriorityRateLimiter(BaseRateLimiter):
+    """Throttles outbound Bot API requests to Telegram's global and per-chat limits.
+
+    Waiting requests are released in priority order whenever the global bucket and
+    their chat's bucket both have a token, so a busy chat never blocks other chats.
+    A RetryAfter from Telegram pauses all sending for the requested time, after which
+    the request is queued again (up to max_retries times).
+    """
+
+    def __init__(self, overall_rate=30, chat_rate=1, group_rate=20 / 60, max_retries=3, chat_burst=3):
+        self._overall = TokenBucket(overall_rate, overall_rate)
+        self._chat_rate = chat_rate
+        self._group_rate = group_rate
+        self._chat_burst = chat_burst
+        self._max_retries = max_retries
+        self._chat_buckets = {}
+        self._waiting = []  # Heap of (priority, sequence, chat_id, future)
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._timer = None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        for _, _, _, future in self._waiting:
+            future.cancel()
+        self._waiting.clear()
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > 4096:
+                # Drop buckets that have refilled completely; they hold no state worth keeping.
+                now = time.monotonic()
+                for key, idle_bucket in list(self._chat_buckets.items()):
+                    idle_bucket.delay(now)
+                    if idle_bucket.tokens >= idle_bucket.capacity:
+                        del self._chat_buckets[key]
+            if chat_id < 0:  # Groups, supergroups and channels
+                bucket = TokenBucket(self._group_rate, max(1, self._group_rate * 60))
+            else:
+                bucket = TokenBucket(self._chat_rate, self._chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _release_waiting(self):
+        """Hands tokens to waiting requests in priority order and re-arms the timer if any are left."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        retry_in = self._paused_until - now
+        if retry_in <= 0:
+            retry_in = None
+            blocked = []
+            while self._waiting:
+                entry = heapq.heappop(self._waiting)
+                _, _, chat_id, future = entry
+                if future.done():  # The caller gave up waiting
+                    continue
+                overall_delay = self._overall.delay(now)
+                if overall_delay:
+                    blocked.append(entry)
+                    retry_in = overall_delay if retry_in is None else min(retry_in, overall_delay)
+                    break
+                chat_bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+                chat_delay = chat_bucket.delay(now) if chat_bucket else 0.0
+                if chat_delay:
+                    # Only this chat is over its limit; keep serving lower-priority requests for other chats.
+                    blocked.append(entry)
+                    retry_in = chat_delay if retry_in is None else min(retry_in, chat_delay)
+                    continue
+                self._overall.take()
+                if chat_bucket:
+                    chat_bucket.take()
+                future.set_result(None)
+            for entry in blocked:
+                heapq.heappush(self._waiting, entry)
+
+        if self._waiting:
+            self._timer = asyncio.get_running_loop().call_later(max(retry_in, 0.01), self._release_waiting)
+
+    async def _wait_turn(self, priority, chat_id):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._sequence), chat_id, future))
+        self._release_waiting()
+        await future
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        chat_id = data.get("chat_id")
+        try:
+            chat_id = int(chat_id) if chat_id is not None else None
+        except (TypeError, ValueError):
+            chat_id = -1  # @channelusername: treat as a group
+
+        if endpoint == "answerCallbackQuery":
+            priority = PRIORITY_FEEDBACK
+        else:
+            priority = rate_limit_args if rate_limit_args is not None else OUTBOUND_PRIORITY.get()
+
+        for attempt in range(self._max_retries + 1):
+            # Callback answers are not throttled by Telegram's message limits, only by flood waits.
+            if chat_id is not None or time.monotonic() < self._paused_until:
+                await self._wait_turn(priority, chat_id)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == self._max_retries:
+                    logger.error(f"Rate limit hit on {endpoint} after {self._max_retries} retries.")
+                    raise
+                retry_after = e.retry_after
+                if isinstance(retry_after, datetime.timedelta):
+                    retry_after = retry_after.total_seconds()
+                logger.warning(f"Rate limit hit on {endpoint}. Pausing outbound requests for {retry_after}s.")
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after + 0.1)
+
+
+# --- Update Processing ---
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates concurrently, but strictly one at a time and in arrival order per (chat, user).
+
+    Different users' updates run in parallel up to max_concurrent_updates, while the
+    ConversationHandler state and QuizSession of any one user only ever see a single
+    update at a time, so two quick taps cannot both score against the same question.
+    An update takes one of the max_concurrent_updates slots only once its user's lock is
+    held, so a user's queued taps never hold slots other users are waiting for.
+    """
+
+    def __init__(self, max_concurrent_updates, max_pending_per_user=MAX_PENDING_UPDATES_PER_USER):
+        super().__init__(max_concurrent_updates)
+        self._max_pending_per_user = max_pending_per_user
+        self._user_queues = {}  # (chat_id, user_id) -> [asyncio.Lock, number of updates holding or waiting]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def process_update(self, update, coroutine) -> None:
+        key = None
+        if isinstance(update, Update) and update.effective_user:
+            key = (update.effective_chat.id if update.effective_chat else None, update.effective_user.id)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+
+        queue = self._user_queues.get(key)
+        if queue is None:
+            queue = self._user_queues[key] = [asyncio.Lock(), 0]
+        if queue[1] >= self._max_pending_per_user:
+            # Someone hammering buttons; drop the excess rather than queue it without bound.
+            logger.warning(f"Dropping update {update.update_id}: {queue[1]} updates already pending for {key}.")
+            coroutine.close()
+            return
+
+        queue[1] += 1
+        try:
+            async with queue[0]:  # asyncio.Lock wakes waiters in FIFO order
+                await super().process_update(update, coroutine)  # Takes a concurrency slot
+        finally:
+            queue[1] -= 1
+            if not queue[1]:
+                del self._user_queues[key]
+
+    async def do_process_update(self, update, coroutine) -> None:
+        await coroutine
+
+
+# --- Session Persistence ---
+# Stores are plain key/value maps grouped by namespace ("user_data", "conversation:<name>") holding
+# pickled values. Their methods are blocking and are run in a worker thread by BatchedPersistence.
+class SqliteSessionStore:
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS session_data ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+            "version INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (namespace, key))"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(session_data)")]
+        if 'version' not in columns:  # Databases created before versioned records
+            self._db.execute("ALTER TABLE session_data ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._db.commit()
+
+    def load_all(self, namespace):
+        with self._lock:
+            rows = self._db.execute("SELECT key, value FROM session_data WHERE namespace = ?", (namespace,))
+            return dict(rows.fetchall())
+
+    def write_batch(self, items):
+        """Applies {(namespace, key): value or None} in a single transaction; None deletes the key."""
+        upserts = [(namespace, key, value) for (namespace, key), value in items.items() if value is not None]
+        deletes = [(namespace, key) for (namespace, key), value in items.items() if value is None]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO session_data (namespace, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value", upserts)
+            self._db.executemany("DELETE FROM session_data WHERE namespace = ? AND key = ?", deletes)
+
+    def load_versioned(self, namespace, key):
+        """Returns (version, value) for one record, or (0, None) if it does not exist."""
+        with self._lock:
+            row = self._db.execute("SELECT version, value FROM session_data WHERE namespace = ? AND key = ?",
+                                   (namespace, key)).fetchone()
+        return row if row else (0, None)
+
+    def take(self, namespace, key):
+        """Deletes one record and returns its value (None if it did not exist), atomically across processes."""
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")  # Holds the write lock from the read to the delete
+            row = self._db.execute("SELECT value FROM session_data WHERE namespace = ? AND key = ?",
+                                   (namespace, key)).fetchone()
+            if row is not None:
+                self._db.execute("DELETE FROM session_data WHERE namespace = ? AND key = ?", (namespace, key))
+        return row[0] if row else None
+
+    def compare_and_set(self, namespace, key, expected_version, value):
+        """Writes value only if the record is still at expected_version. Returns False on a conflict."""
+        with self._lock, self._db:
+            if expected_version == 0:
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO session_data (namespace, key, value, version) VALUES (?, ?, ?, 1)",
+                    (namespace, key, value))
+            else:
+                cursor = self._db.execute(
+                    "UPDATE session_data SET value = ?, version = version + 1 "
+                    "WHERE namespace = ? AND key = ? AND version = ?",
+                    (value, namespace, key, expected_version))
+            return cursor.rowcount == 1
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class RedisSessionStore:
+    """Same interface as SqliteSessionStore, one Redis hash per namespace. Works with any Redis-compatible server."""
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("SESSION_STORE=redis needs the 'redis' package: pip install redis")
+        self._client = redis.Redis.from_url(url)
+        self._prefix = "gmp_quiz:"
+        # Record versions live in a sibling hash "<namespace>:version"; the check and write are one atomic script.
+        self._compare_and_set = self._client.register_script("""
+            if (redis.call('HGET', KEYS[2], ARGV[1]) or '0') ~= ARGV[2] then return 0 end
+            redis.call('HSET', KEYS[1], ARGV[1], ARGV[3])
+            redis.call('HINCRBY', KEYS[2], ARGV[1], 1)
+            return 1
+        """)
+
+    def load_all(self, namespace):
+        return {key.decode(): value for key, value in self._client.hgetall(self._prefix + namespace).items()}
+
+    def write_batch(self, items):
+        pipeline = self._client.pipeline(transaction=True)
+        for (namespace, key), value in items.items():
+            if value is None:
+                pipeline.hdel(self._prefix + namespace, key)
+            else:
+                pipeline.hset(self._prefix + namespace, key, value)
+        pipeline.execute()
+
+    def load_versioned(self, namespace, key):
+        pipeline = self._client.pipeline(transaction=True)
+        pipeline.hget(self._prefix + namespace, key)
+        pipeline.hget(f"{self._prefix}{namespace}:version", key)
+        value, version = pipeline.execute()
+        return int(version or 0), value
+
+    def take(self, namespace, key):
+        pipeline = self._client.pipeline(transaction=True)
+        pipeline.hget(self._prefix + namespace, key)
+        pipeline.hdel(self._prefix + namespace, key)
+        value, deleted = pipeline.execute()
+        return value if deleted else None
+
+    def compare_and_set(self, namespace, key, expected_version, value):
+        keys = [self._prefix + namespace, f"{self._prefix}{namespace}:version"]
+        return self._compare_and_set(keys=keys, args=[key, expected_version, value]) == 1
+
+    def close(self):
+        self._client.close()
+
+
+class BatchedPersistence(BasePersistence):
+    """Write-behind persistence for user_data and conversation states.
+
+    The Application already hands over changed data only every update_interval seconds.
+    Changes are pickled into a pending map keyed by (namespace, key), so repeated changes
+    to the same user collapse into one write, and the whole batch is written in a single
+    transaction off the event loop. handle_answer itself never touches the disk.
+    """
+
+    def __init__(self, store, update_interval=PERSISTENCE_FLUSH_INTERVAL):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self._store = store
+        self._pending = {}
+        self._write_task = None
+        self._parked = set()  # Users evicted from memory whose stored data must survive drop_user_data
+
+    def _queue_write(self, namespace, key, value):
+        self._pending[(namespace, key)] = None if value is None else pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if self._write_task is None or self._write_task.done():
+            # Runs once the current round of update_* calls has yielded, so they share one transaction.
+            self._write_task = asyncio.get_running_loop().create_task(self._write_pending())
+
+    async def _write_pending(self):
+        while self._pending:
+            batch, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(self._store.write_batch, batch)
+            except Exception as e:
+                logger.error(f"Error writing {len(batch)} session records: {e}")
+                # Keep the failed batch for the next attempt unless newer values arrived meanwhile.
+                self._pending = {**batch, **self._pending}
+                return
+
+    async def get_user_data(self):
+        rows = await asyncio.to_thread(self._store.load_all, "user_data")
+        return {int(user_id): pickle.loads(value) for user_id, value in rows.items()}
+
+    async def get_chat_data(self):
+        return {}
+
+    async def get_bot_data(self):
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name):
+        rows = await asyncio.to_thread(self._store.load_all, f"conversation:{name}")
+        return {tuple(json.loads(key)): pickle.loads(value) for key, value in rows.items()}
+
+    async def update_conversation(self, name, key, new_state):
+        self._queue_write(f"conversation:{name}", json.dumps(list(key)), new_state)
+
+    async def update_user_data(self, user_id, data):
+        self._queue_write("user_data", str(user_id), data)
+
+    async def drop_user_data(self, user_id):
+        if user_id in self._parked:
+            self._parked.discard(user_id)  # Evicted from memory, not deleted
+            return
+        self._queue_write("user_data", str(user_id), None)
+
+    async def park(self, user_id, data):
+        """Spill interface for SessionEvictor: writes data and keeps it when the user is dropped from memory."""
+        self._parked.add(user_id)
+        self._queue_write("user_data", str(user_id), data)
+
+    async def unpark(self, user_id):
+        key = str(user_id)
+        if ("user_data", key) in self._pending:
+            value = self._pending[("user_data", key)]
+        else:
+            _, value = await asyncio.to_thread(self._store.load_versioned, "user_data", key)
+        return pickle.loads(value) if value is not None else None
+
+    async def update_chat_data(self, chat_id, data):
+        pass
+
+    async def update_bot_data(self, data):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def drop_chat_data(self, chat_id):
+        pass
+
+    async def refresh_user_data(self, user_id, user_data):
+        pass
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    async def flush(self):
+        if self._write_task is not None:
+            await self._write_task
+        await self._write_pending()
+        await asyncio.to_thread(self._store.close)
+
+
+def build_session_store():
+    if SESSION_STORE == "redis":
+        return RedisSessionStore(REDIS_URL)
+    return SqliteSessionStore(SESSION_DB_PATH)
+
+
+def build_persistence():
+    """Returns the persistence selected by SESSION_STORE, or None to keep sessions in memory only.
+
+    Shared sessions are read and written per update by SharedSessionSync instead.
+    """
+    if SESSION_STORE == "memory" or SESSION_SHARED:
+        return None
+    return BatchedPersistence(build_session_store())
+
+
+class SpillStore:
+    """Spill interface for SessionEvictor over a session store, for when sessions are not otherwise persisted."""
+
+    namespace = "evicted_user_data"
+
+    def __init__(self, store):
+        self._store = store
+
+    async def park(self, user_id, data):
+        value = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        await asyncio.to_thread(self._store.write_batch, {(self.namespace, str(user_id)): value})
+
+    async def unpark(self, user_id):
+        value = await asyncio.to_thread(self._store.take, self.namespace, str(user_id))
+        return pickle.loads(value) if value is not None else None
+
+
+def estimate_user_data_size(user_data):
+    """Approximate bytes held by one user's user_data (shallow, plus each value's own buffers)."""
+    size = sys.getsizeof(user_data)
+    for key, value in user_data.items():
+        size += sys.getsizeof(key) + (value.nbytes() if hasattr(value, 'nbytes') else sys.getsizeof(value))
+    return size
+
+
+class SessionEvictor:
+    """Bounds the memory held by user_data across all users.
+
+    Users are kept in least-recently-used order with the approximate size of their data.
+    A periodic sweep drops users idle for longer than idle_timeout, and any update that
+    pushes the total over the byte budget evicts the least recently used users (leaving
+    alone anyone active in the last few seconds, whose update may still be running).
+    With a spill store, evicted data is parked there and restored on the user's next update.
+    """
+
+    min_idle = 30  # Seconds; users active more recently than this are never evicted for the budget
+
+    def __init__(self, application, idle_timeout, byte_budget, spill=None):
+        self._application = application
+        self._idle_timeout = idle_timeout
+        self._byte_budget = byte_budget
+        self._spill = spill
+        self._sessions = collections.OrderedDict()  # user_id -> (last seen, approximate bytes), oldest first
+        self._total_bytes = 0
+
+    async def restore(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Group -2 handler: brings back parked data for a user returning after eviction."""
+        if self._spill is None or update.effective_user is None or context.user_data:
+            return
+        data = await self._spill.unpark(update.effective_user.id)
+        if data:
+            context.user_data.update(data)
+
+    async def touch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Late-group handler: records the user's activity and size after their update was handled."""
+        user = update.effective_user
+        if user is None:
+            return
+        previous = self._sessions.pop(user.id, None)
+        if previous:
+            self._total_bytes -= previous[1]
+        if context.user_data:
+            size = estimate_user_data_size(context.user_data)
+            self._sessions[user.id] = (time.monotonic(), size)
+            self._total_bytes += size
+        if self._total_bytes > self._byte_budget:
+            await self._evict(time.monotonic() - self.min_idle)
+
+    async def sweep(self, context: ContextTypes.DEFAULT_TYPE):
+        """JobQueue callback evicting idle users and then enforcing the byte budget."""
+        now = time.monotonic()
+        while self._sessions:
+            user_id, (last_seen, _) = next(iter(self._sessions.items()))
+            if now - last_seen < self._idle_timeout:
+                break
+            await self._evict_user(user_id)
+        if self._total_bytes > self._byte_budget:
+            await self._evict(now - self.min_idle)
+
+    async def _evict(self, active_since):
+        while self._sessions and self._total_bytes > self._byte_budget:
+            user_id, (last_seen, _) = next(iter(self._sessions.items()))
+            if last_seen >= active_since:
+                break
+            await self._evict_user(user_id)
+
+    async def _evict_user(self, user_id):
+        _, size = self._sessions.pop(user_id)
+        self._total_bytes -= size
+        data = self._application.user_data.get(user_id)
+        if data and self._spill is not None:
+            await self._spill.park(user_id, dict(data))
+        self._application.drop_user_data(user_id)
+        logger.debug(f"Evicted session of user {user_id} ({size} bytes).")
+
+
+# --- Shared Sessions (multiple workers) ---
+class SharedConversationHandler(ConversationHandler):
+    """ConversationHandler whose per-key state can be loaded from and read back for a shared store.
+
+    Relies on ConversationHandler internals (_get_key, _conversations), checked at construction;
+    requirements.txt pins the python-telegram-bot versions they are known to match.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not (callable(getattr(self, "_get_key", None)) and isinstance(getattr(self, "_conversations", None), dict)):
+            raise RuntimeError("SESSION_SHARED needs a python-telegram-bot version with ConversationHandler._get_key "
+                               "and ._conversations; see requirements.txt.")
+
+    def conversation_key(self, update):
+        return self._get_key(update)
+
+    def load_state(self, key, state):
+        if state is None:
+            self._conversations.pop(key, None)
+        else:
+            self._conversations[key] = state
+
+    def current_state(self, key):
+        state = self._conversations.get(key)
+        return state if isinstance(state, int) else None  # A non-blocking handler's pending state is not shared
+
+
+class SharedSessionSync:
+    """Keeps each (chat, user) conversation state and user_data in a shared store, one versioned record each.
+
+    load() runs before the conversation handler and replaces the worker's copy with the stored
+    record; save() runs after it and writes the result back only if no other worker has written
+    the record in between (optimistic concurrency). A conflicting write is discarded and the next
+    update starts again from the winning version.
+    """
+
+    namespace = "shared_session"
+
+    def __init__(self, store, conversation_handler):
+        self._store = store
+        self._conversation_handler = conversation_handler
+        self._loaded = {}  # conversation key -> (version, record bytes) as read by load()
+
+    @staticmethod
+    def _record_key(key):
+        return ":".join(str(part) for part in key)
+
+    def _apply(self, key, record, user_data):
+        state, stored_user_data = pickle.loads(record) if record is not None else (None, {})
+        self._conversation_handler.load_state(key, state)
+        user_data.clear()
+        user_data.update(stored_user_data)
+
+    async def load(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not (update.effective_user and update.effective_chat):
+            return
+        key = self._conversation_handler.conversation_key(update)
+        version, record = await asyncio.to_thread(self._store.load_versioned, self.namespace, self._record_key(key))
+        self._loaded[key] = (version, record)
+        self._apply(key, record, context.user_data)
+
+    async def save(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not (update.effective_user and update.effective_chat):
+            return
+        key = self._conversation_handler.conversation_key(update)
+        version, loaded_record = self._loaded.pop(key, (0, None))
+        state = self._conversation_handler.current_state(key)
+        record = pickle.dumps((state, dict(context.user_data)), pickle.HIGHEST_PROTOCOL)
+        if record == loaded_record:
+            return  # Nothing changed, e.g. a rejected tap
+        written = await asyncio.to_thread(self._store.compare_and_set, self.namespace, self._record_key(key),
+                                          version, record)
+        if not written:
+            logger.warning(f"Session {key} was changed by another worker; discarding this update's changes.")
+
+    async def refresh(self, chat_id, user_id, user_data):
+        """Reloads user_data for code running outside an update, such as JobQueue callbacks."""
+        key = (chat_id, user_id)
+        _, record = await asyncio.to_thread(self._store.load_versioned, self.namespace, self._record_key(key))
+        self._apply(key, record, user_data)
+
+
+SHARED_SESSIONS = None  # SharedSessionSync when SESSION_SHARED is on; set up in main()
+
+
+# --- Callback Dispatch ---
+# Callback data is "<action>" or "<action>:<fields>". Each conversation state has a single
+# CallbackQueryHandler whose pattern looks the action up in a dict. PTB hands the route it
+# returns to the handler as context.matches[0], so a tap is parsed once and needs no regex.
+CallbackRoute = collections.namedtuple('CallbackRoute', ['callback', 'fields'])
+
+
+class CallbackRouter:
+    def __init__(self, routes):
+        self.routes = routes  # action -> handler callback
+
+    def match(self, data):
+        action, _, fields = data.partition(":")
+        callback = self.routes.get(action)
+        return CallbackRoute(callback, fields) if callback is not None else None
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        return await context.matches[0].callback(update, context)
+
+
+def callback_router(routes):
+    """Returns one CallbackQueryHandler serving every action in routes."""
+    router = CallbackRouter(routes)
+    return CallbackQueryHandler(router.dispatch, pattern=router.match)
+
+
 async def post_init(application: Application):
     await application.bot.set_my_commands([
         BotCommand("start", "🚀 Begin/Restart GMP Assessment"),
@@ -1420,60 +2030,147 @@ async def post_init(application: Application):
     logger.info("Bot commands set successfully.")
 
 
-def store_quiz_entry(context: ContextTypes.DEFAULT_TYPE, question_data, user_answer_text, is_correct):
-    """Stores the details of the answered question for later review."""
-    if 'quiz_history' not in context.user_data:
-        context.user_data['quiz_history'] = []
+async def post_shutdown(application: Application):
+    await ANSWER_LOG.snapshot()
 
-    context.user_data['quiz_history'].append({
-        'question_text': question_data['question'],
-        'options': question_data['options'],
-        'user_answer_text': user_answer_text,
-        'correct_answer_text': question_data['answer'],
-        'is_correct': is_correct,
-        'explanation': question_data.get('explanation', 'No explanation available for this question.'),
-        'difficulty': question_data['difficulty']
-    })
 
+# Everything on a question screen that depends only on the question and its option order, rendered once.
+# Markdown is escaped here; the wrong_* strings are the ❌ feedback for the three feedback modes.
+# options holds (button label, original option index) pairs; the buttons themselves carry
+# session-specific callback data and are built per screen by answer_keyboard.
+RenderedQuestion = collections.namedtuple(
+    'RenderedQuestion', ['body', 'options', 'wrong_feedback', 'wrong_verdict', 'wrong_toast'])
 
-async def ask_question(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    question_index = context.user_data.get("question_index", 0)
-    quiz_questions = context.user_data.get("quiz_questions", [])
+# Answer buttons carry "a:<session id in base 36>:<question position>:<original option index>",
+# so taps on an earlier question or an earlier quiz can be told apart without any lookups.
+ANSWER_ACTION = "a"
+BASE36_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
 
-    if not quiz_questions or question_index >= len(quiz_questions):
-        logger.warning("ask_question: No questions or index out of bounds. Attempting to show results.")
-        await show_results_message(update, context)
-        return ConversationHandler.END
 
-    question_data = quiz_questions[question_index]
-    question_text = (
-        f"🎓 *Question {question_index + 1}/{QUIZ_LENGTH}* "
-        f"(Difficulty: {question_data['difficulty'].capitalize()})\n\n"
-        f"{question_data['question']}"
-    )
-    options_text = question_data["options"]
+def to_base36(number):
+    digits = []
+    while True:
+        number, remainder = divmod(number, 36)
+        digits.append(BASE36_DIGITS[remainder])
+        if not number:
+            return "".join(reversed(digits))
 
-    shuffled_options_with_original_indices = list(enumerate(options_text))
-    random.shuffle(shuffled_options_with_original_indices)
 
-    context.user_data["current_original_options"] = options_text
-    context.user_data["current_shuffled_options_display_map"] = {
-        str(original_idx): opt_text for original_idx, opt_text in shuffled_options_with_original_indices
-    }
+def parse_answer_payload(fields):
+    """Returns (session_id, position, option_index) from an answer route's fields, or None if malformed."""
+    try:
+        session_id, position, option_index = fields.split(":")
+        return int(session_id, 36), int(position), int(option_index)
+    except ValueError:
+        return None
+
+
+@functools.lru_cache(maxsize=QUESTION_RENDER_CACHE_SIZE)
+def render_question(question_id, permutation):
+    question_data = QUESTION_BANK[question_id]
+    options_text = question_data["options"]
 
-    keyboard = []
-    for original_idx, option_text_val in shuffled_options_with_original_indices:
+    options = []
+    for original_idx in unpack_permutation(permutation, len(options_text)):
+        option_text_val = options_text[original_idx]
         display_option_text = (option_text_val[:60] + '...') if len(option_text_val) > 63 else option_text_val
-        keyboard.append([InlineKeyboardButton(display_option_text, callback_data=str(original_idx))])
+        options.append((display_option_text, str(original_idx)))
+
+    answer = escape_markdown(question_data['answer'])
+    return RenderedQuestion(
+        body=f"(Difficulty: {question_data['difficulty'].capitalize()})\n\n{escape_markdown(question_data['question'])}",
+        options=tuple(options),
+        wrong_feedback=f"❌ Incorrect. The correct answer was: *{answer}*",
+        wrong_verdict=f"❌ _Previous answer: incorrect._ Correct answer: *{answer}*",
+        wrong_toast=f"❌ Incorrect. The correct answer was: {question_data['answer']}"[:200],  # Telegram's toast limit
+    )
 
-    reply_markup = InlineKeyboardMarkup(keyboard)
+
+def question_heading(session, question_index, rendered):
+    return f"🎓 *Question {question_index + 1}/{session.question_total}* {rendered.body}"
+
+
+def answer_keyboard(session, rendered):
+    prefix = f"{ANSWER_ACTION}:{to_base36(session.session_id)}:{session.question_index}:"
+    return InlineKeyboardMarkup(
+        [[InlineKeyboardButton(label, callback_data=prefix + option_index)] for label, option_index in rendered.options])
+
+
+def build_question_message(session):
+    """Returns (text, reply_markup) for the session's current question, starting its answer timer."""
+    session.shown_at = time.time()
+    rendered = render_question(session.current_question_id, session.permutations[session.question_index])
+    return question_heading(session, session.question_index, rendered), answer_keyboard(session, rendered)
+
+
+TOPICS_KEY = "topics"  # (bank version, bitmask over QUESTION_BANK.topics) of the topics picked at /start
+PICKER_TOPICS = tuple(topic_id for topic_id, tag in enumerate(QUESTION_BANK.topics)
+                      if len(QUESTION_BANK.by_topic[tag]) >= TOPIC_MIN_QUESTIONS)
+
+
+def selected_topics(user_data):
+    """Returns the bitmask of picked topics, or 0 if they were picked on another bank version."""
+    bank_version, selected = user_data.get(TOPICS_KEY, (None, 0))
+    return selected if bank_version == QUESTION_BANK.version else 0
+
+
+@functools.lru_cache(maxsize=256)
+def render_topic_picker(selected):
+    """Returns (text, reply_markup) for the topic picker with the selected bitmask ticked."""
+    rows = []
+    for topic_id in PICKER_TOPICS:
+        tag = QUESTION_BANK.topics[topic_id]
+        mark = "✅ " if selected >> topic_id & 1 else ""
+        button = InlineKeyboardButton(f"{mark}{tag} ({len(QUESTION_BANK.by_topic[tag])})", callback_data=f"t:{topic_id}")
+        if rows and len(rows[-1]) < 2:
+            rows[-1].append(button)
+        else:
+            rows.append([button])
+    if selected:
+        rows.append([InlineKeyboardButton("🚀 Start Topic Quiz", callback_data="topic_quiz")])
+
+    picked = [escape_markdown(QUESTION_BANK.topics[topic_id]) for topic_id in PICKER_TOPICS if selected >> topic_id & 1]
+    text = (f"📚 *Quiz by Topic*\n\nTap topics to select them, then start a quiz of up to {QUIZ_LENGTH} questions "
+            f"drawn from all of them.\n\n*Selected:* {', '.join(picked) or 'none yet'}")
+    return text, InlineKeyboardMarkup(rows)
+
+
+async def edit_if_changed(query, session, text, reply_markup):
+    """Edits the query's message unless the session last put this exact content there.
+
+    Returns False when the edit was skipped. Telegram's "message is not modified"
+    error is treated the same way instead of being raised.
+    """
+    rendered = (query.message.message_id, hash((text, reply_markup)))
+    if session is not None and session.last_rendered == rendered:
+        return False
+    try:
+        await query.edit_message_text(text=text, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN)
+    except BadRequest as e:
+        if "message is not modified" not in str(e).lower():
+            raise
+        edited = False
+    else:
+        edited = True
+    if session is not None:
+        session.last_rendered = rendered
+    return edited
+
+
+async def ask_question(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    session = context.user_data.get(SESSION_KEY)
+
+    if session is None or session.is_finished:
+        logger.warning("ask_question: No questions or index out of bounds. Attempting to show results.")
+        await show_results_message(update, context)
+        return ConversationHandler.END
+
+    question_text, reply_markup = build_question_message(session)
 
     try:
         target_message = update.callback_query.message if update.callback_query else update.message
         if update.callback_query:
-            await update.callback_query.edit_message_text(
-                text=question_text, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN
-            )
+            await edit_if_changed(update.callback_query, session, question_text, reply_markup)
         elif update.message:
             await update.message.reply_text(
                 text=question_text, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN
@@ -1486,14 +2183,41 @@ async def ask_question(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await context.bot.send_message(chat_id=update.effective_chat.id, text=error_message_text)
 
 
-async def show_results_message(update: Update, context: ContextTypes.DEFAULT_TYPE, from_review=False):
-    user_data = context.user_data
-    score = user_data.get("score", 0)
+RESULTS_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔍 Review Answers", callback_data="review_start")],
+    [InlineKeyboardButton("🚀 New Quiz", callback_data="new_quiz_from_results")],
+    [InlineKeyboardButton("🏁 End Session", callback_data="end_session")]
+])
+
+
+def build_results_message(session):
+    """Returns (text, reply_markup) for the results card, rendered once per finished session."""
+    if session is None:
+        return render_results(None)
+    return session.cached_render('results', render_results)
 
-    if QUIZ_LENGTH == 0:
-        percentage = 0.0
-    else:
-        percentage = (score / QUIZ_LENGTH) * 100
+
+def render_practice_results(session):
+    result_message = f"""
+🔁 *Practice Complete* 🔁
+
+✅ *Correct Answers:* {session.score}/{len(session)}
+
+Questions you got right move up a box and come back after a longer break; the ones you missed return in {LEITNER_INTERVALS[0]} minutes.
+
+What would you like to do next?
+"""
+    return result_message, RESULTS_KEYBOARD
+
+
+def render_results(session):
+    if session is not None and session.practice:
+        return render_practice_results(session)
+    score = session.score if session is not None else 0
+    question_count = len(session) if session is not None else QUIZ_LENGTH
+    percentage = session.proficiency_percentage() if session is not None else 0.0
+    # Adaptive quizzes report the score expected on the whole bank at the estimated ability
+    percentage_label = "Estimated Percentage" if session is not None and session.adaptive else "Percentage"
 
     if percentage >= 90:
         level = "🌟 *Expert*"
@@ -1511,13 +2235,14 @@ async def show_results_message(update: Update, context: ContextTypes.DEFAULT_TYP
         level = "🔴 *Beginner*"
         comment = "Consider foundational GMP training to improve your knowledge."
 
-    encouragement = random.choice(ENCOURAGING_PHRASES)
+    encouragement = ENCOURAGING_PHRASES[session.session_id % len(ENCOURAGING_PHRASES)] if session else \
+        ENCOURAGING_PHRASES[0]
 
     result_message = f"""
 📊 *Assessment Complete* 📊
 
-✅ *Correct Answers:* {score}/{QUIZ_LENGTH}
-📈 *Percentage:* {percentage:.1f}%
+✅ *Correct Answers:* {score}/{question_count}
+📈 *{percentage_label}:* {percentage:.1f}%
 🏆 *Proficiency Level:* {level}
 
 💡 *Recommendation:* {comment}
@@ -1526,18 +2251,17 @@ async def show_results_message(update: Update, context: ContextTypes.DEFAULT_TYP
 
 What would you like to do next?
 """
-    keyboard = [
-        [InlineKeyboardButton("🔍 Review Answers", callback_data="review_start")],
-        [InlineKeyboardButton("🚀 New Quiz", callback_data="new_quiz_from_results")],
-        [InlineKeyboardButton("🏁 End Session", callback_data="end_session")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    return result_message, RESULTS_KEYBOARD
+
+
+async def show_results_message(update: Update, context: ContextTypes.DEFAULT_TYPE, from_review=False):
+    session = context.user_data.get(SESSION_KEY)
+    result_message, reply_markup = build_results_message(session)
 
     target_message = update.callback_query.message if update.callback_query else update.message
     try:
         if update.callback_query:
-            await update.callback_query.edit_message_text(text=result_message, reply_markup=reply_markup,
-                                                          parse_mode=ParseMode.MARKDOWN)
+            await edit_if_changed(update.callback_query, session, result_message, reply_markup)
         elif update.message:
             await update.message.reply_text(text=result_message, reply_markup=reply_markup,
                                             parse_mode=ParseMode.MARKDOWN)
@@ -1551,7 +2275,7 @@ What would you like to do next?
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    context.user_data.clear()
+    clear_quiz_data(context.user_data)
 
     welcome_message = """
 🌟 *Welcome to the GMP Proficiency Assessment Bot!* 🌟
@@ -1563,10 +2287,22 @@ The quiz includes questions from three difficulty levels:
 • *Medium:* 7 questions
 • *Hard:* 6 questions
 
+Prefer a shorter test? The *Adaptive Assessment* picks each question based on your answers so far and finishes as soon as your level is clear (at most 20 questions).
+Or focus on specific regulations with *Quiz by Topic*.
+
 Ready to challenge your GMP knowledge? Click 'Start Assessment' below!
 You can type /cancel at any point to stop the current assessment.
 """
-    keyboard = [[InlineKeyboardButton("Start Assessment ✅", callback_data="initiate_quiz_setup")]]
+    keyboard = [
+        [InlineKeyboardButton("Start Assessment ✅", callback_data="initiate_quiz_setup")],
+        [InlineKeyboardButton("🎯 Adaptive Assessment", callback_data="initiate_adaptive_quiz")],
+        [InlineKeyboardButton("📚 Quiz by Topic", callback_data="pick_topics")],
+    ]
+    deck = practice_deck(context.user_data, create=False)
+    if deck:
+        # Questions missed in earlier quizzes, resurfacing on a Leitner schedule
+        due = deck.due_count(current_minute())
+        keyboard.append([InlineKeyboardButton(f"🔁 Practice ({due} due)", callback_data="initiate_practice")])
     reply_markup = InlineKeyboardMarkup(keyboard)
 
     if update.message:
@@ -1584,36 +2320,17 @@ async def initiate_quiz_setup(update: Update, context: ContextTypes.DEFAULT_TYPE
         await query.answer()
 
     try:
-        easy_q = [q for q in ALL_QUESTIONS if q['difficulty'] == 'easy']
-        medium_q = [q for q in ALL_QUESTIONS if q['difficulty'] == 'medium']
-        hard_q = [q for q in ALL_QUESTIONS if q['difficulty'] == 'hard']
-
-        if len(easy_q) < QUIZ_COMPOSITION['easy'] or \
-                len(medium_q) < QUIZ_COMPOSITION['medium'] or \
-                len(hard_q) < QUIZ_COMPOSITION['hard']:
-            logger.error("Not enough questions in one or more difficulty categories.")
-            error_text = "❌ *Error:* Insufficient questions. Please contact admin."
-            if query:
-                await query.edit_message_text(text=error_text, parse_mode=ParseMode.MARKDOWN)
-            elif target_message:
-                await target_message.reply_text(text=error_text, parse_mode=ParseMode.MARKDOWN)
-            return ConversationHandler.END
-
-        quiz_questions = (
-                random.sample(easy_q, QUIZ_COMPOSITION['easy']) +
-                random.sample(medium_q, QUIZ_COMPOSITION['medium']) +
-                random.sample(hard_q, QUIZ_COMPOSITION['hard'])
-        )
-        random.shuffle(quiz_questions)
+        session = await COHORT_ROSTER.claim(update.effective_user.id)
+        if session is None or session.is_finished:
+            # No cohort quiz, or one emptied because the question bank changed since /cohort.
+            # Composition sizes are validated once when QUESTION_BANK is built.
+            session = QuizSession.from_seed(seen=seen_questions(context.user_data))
 
-        context.user_data.clear()
-        context.user_data["quiz_questions"] = quiz_questions
-        context.user_data["question_index"] = 0
-        context.user_data["score"] = 0
-        context.user_data["quiz_history"] = []
+        clear_quiz_data(context.user_data)
+        context.user_data[SESSION_KEY] = session
 
-        await ask_question(update, context)
-        return IN_QUIZ
+        state = await ask_question(update, context)
+        return IN_QUIZ if state is None else state
 
     except ValueError as e:
         logger.error(f"ValueError during question sampling: {e}")
@@ -1633,50 +2350,130 @@ async def initiate_quiz_setup(update: Update, context: ContextTypes.DEFAULT_TYPE
         return ConversationHandler.END
 
 
-async def handle_answer(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+async def initiate_adaptive_quiz(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    query = update.callback_query
+    await query.answer()
+
+    clear_quiz_data(context.user_data)
+    context.user_data[SESSION_KEY] = AdaptiveSession.start()
+    await ask_question(update, context)
+    return IN_QUIZ
+
+
+async def show_topic_picker(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    text, reply_markup = render_topic_picker(selected_topics(context.user_data))
+    await edit_if_changed(query, None, text, reply_markup)
+    return None
+
+
+async def toggle_topic(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    fields = context.matches[0].fields
+    topic_id = int(fields) if fields.isdigit() else -1
+    if topic_id not in PICKER_TOPICS:
+        return None
+    selected = selected_topics(context.user_data) ^ (1 << topic_id)
+    context.user_data[TOPICS_KEY] = (QUESTION_BANK.version, selected)
+    text, reply_markup = render_topic_picker(selected)
+    await edit_if_changed(query, None, text, reply_markup)
+    return None
+
+
+async def initiate_topic_quiz(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    selected = selected_topics(context.user_data)
+    topics = [QUESTION_BANK.topics[topic_id] for topic_id in PICKER_TOPICS if selected >> topic_id & 1]
+    if not topics:
+        await query.answer(text="Select at least one topic first.")
+        return None
+    await query.answer()
+
+    clear_quiz_data(context.user_data)
+    question_ids = QUESTION_BANK.sample_topics(topics, QUIZ_LENGTH, seen=seen_questions(context.user_data))
+    context.user_data[SESSION_KEY] = QuizSession(question_ids, draw_permutations(question_ids))
+    await ask_question(update, context)
+    return IN_QUIZ
+
+
+async def initiate_practice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
+    clear_quiz_data(context.user_data)
+    deck = practice_deck(context.user_data, create=False)
+    now = current_minute()
+    keys = deck.pop_due(PRACTICE_LENGTH, now) if deck else []
+    if not keys:
+        if deck:
+            wait = format_wait(deck.next_due() - now)
+            await query.answer(text=f"Nothing is due yet. Your next practice question is due in {wait}.")
+        else:
+            await query.answer(text="Nothing to practice: questions you miss in a quiz are added here.")
+        return None
+
     await query.answer()
+    context.user_data[SESSION_KEY] = PracticeSession(keys)
+    await ask_question(update, context)
+    return IN_QUIZ
 
+
+async def handle_answer(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    query = update.callback_query
     user_data = context.user_data
-    question_index = user_data.get("question_index", 0)
-    quiz_questions = user_data.get("quiz_questions", [])
-    original_options = user_data.get("current_original_options", [])
+    session = user_data.get(SESSION_KEY)
+    payload = parse_answer_payload(context.matches[0].fields)
 
-    if not quiz_questions or question_index >= len(quiz_questions) or not original_options:
+    if session is None or session.is_finished:
+        # Lost or emptied (e.g. by a question bank update) while the quiz was running
+        await query.answer()
         logger.warning(f"handle_answer called with incomplete quiz data for user {update.effective_user.id}.")
         await query.edit_message_text(text="Error: Quiz data is incomplete. Please /start again.",
                                       parse_mode=ParseMode.MARKDOWN)
-        user_data.clear()
+        clear_quiz_data(user_data)
         return ConversationHandler.END
 
-    current_question_data = quiz_questions[question_index]
+    if payload is None or payload[:2] != (session.session_id, session.question_index):
+        # A repeated tap, or a tap on an earlier question's or quiz's keyboard: nothing to score
+        await query.answer()
+        return None
+
+    merged_feedback = FEEDBACK_MODE == "merged"
+    if not merged_feedback:  # In merged mode the verdict goes into the answer toast instead
+        await query.answer()
+
+    question_index = session.question_index
+    current_question_data = QUESTION_BANK[session.current_question_id]
+    original_options = current_question_data["options"]
     correct_answer_text = current_question_data["answer"]
 
     try:
-        user_answer_original_index = int(query.data)
+        user_answer_original_index = payload[2]
+        if not 0 <= user_answer_original_index < len(original_options):
+            raise IndexError("option index out of range")
         user_selected_option_text = original_options[user_answer_original_index]
-    except (ValueError, IndexError, TypeError) as e:  # Added TypeError for safety
+    except (IndexError, TypeError) as e:  # TypeError: no payload
+        if merged_feedback:
+            await query.answer()
         logger.error(
             f"Error processing user answer index: {e}. query.data: {query.data}, original_options length: {len(original_options)}")
         await query.edit_message_text(text="Error processing your answer. Please try /start again.",
                                       parse_mode=ParseMode.MARKDOWN)
-        user_data.clear()
+        clear_quiz_data(user_data)
         return ConversationHandler.END
 
     is_correct = user_selected_option_text == correct_answer_text
-    if is_correct:
-        user_data["score"] = user_data.get("score", 0) + 1
-        feedback = "✅ Correct!"
-    else:
-        feedback = f"❌ Incorrect. The correct answer was: *{correct_answer_text}*"
+    rendered = render_question(session.current_question_id, session.permutations[question_index])
+    ANSWER_LOG.answer(update.effective_user.id, session, is_correct)
+    update_practice_deck(user_data, session, is_correct)
+    seen_questions(user_data).add(session.current_question_id)
+    session.record_answer(user_answer_original_index, is_correct)
 
-    store_quiz_entry(context, current_question_data, user_selected_option_text, is_correct)
+    if merged_feedback:
+        return await show_next_with_verdict(update, context, is_correct, rendered)
 
-    question_text_header = (
-        f"🎓 *Question {question_index + 1}/{QUIZ_LENGTH}* "
-        f"(Difficulty: {current_question_data['difficulty'].capitalize()})\n\n"
-        f"{current_question_data['question']}"
-    )
+    feedback = "✅ Correct!" if is_correct else rendered.wrong_feedback
+    question_text_header = question_heading(session, question_index, rendered)
     try:
         await query.edit_message_text(
             text=f"{question_text_header}\n\n{feedback}", parse_mode=ParseMode.MARKDOWN
@@ -1684,95 +2481,197 @@ async def handle_answer(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     except Exception as e:
         logger.error(f"Error editing message for feedback: {e}")
 
-    await asyncio.sleep(1.5)  # Reduced sleep time
+    has_next_question = advance_quiz(update, session)
+
+    if FEEDBACK_MODE == "scheduled" and context.job_queue is not None:
+        # Leave the verdict up and let the JobQueue swap in the next screen, so this handler
+        # (and the user's conversation slot) is released straight away.
+        context.job_queue.run_once(
+            show_next_after_feedback,
+            FEEDBACK_DELAY,
+            data=(query.message.message_id, session.session_id, session.question_index),
+            chat_id=update.effective_chat.id,
+            user_id=update.effective_user.id,
+        )
+        return IN_QUIZ if has_next_question else RESULTS_DISPLAYED
 
-    user_data["question_index"] = question_index + 1
+    await asyncio.sleep(FEEDBACK_DELAY)
 
-    if user_data["question_index"] < QUIZ_LENGTH and user_data["question_index"] < len(quiz_questions):
+    if has_next_question:
         await ask_question(update, context)
         return IN_QUIZ
     else:
         return await show_results_message(update, context)
 
 
+async def dismiss_answer_tap(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Answer taps outside IN_QUIZ come from an old quiz message: acknowledge them and change nothing."""
+    await update.callback_query.answer()
+    return None
+
+
+def advance_quiz(update: Update, session):
+    """Moves the session past the answered question. Returns False, after logging the quiz, once it is over."""
+    if session.advance() and session.question_index < QUIZ_LENGTH:
+        return True
+    ANSWER_LOG.quiz(update.effective_user.id, session)
+    return False
+
+
+async def show_next_with_verdict(update: Update, context: ContextTypes.DEFAULT_TYPE, is_correct,
+                                 rendered) -> int:
+    """Merged feedback: the verdict goes into the answer toast and a header line above the next screen.
+
+    Costs one answerCallbackQuery and one edit per answer instead of an answer and two edits.
+    """
+    query = update.callback_query
+    session = context.user_data[SESSION_KEY]
+
+    if is_correct:
+        toast = "✅ Correct!"
+        verdict = "✅ _Previous answer: correct_"
+    else:
+        toast = rendered.wrong_toast
+        verdict = rendered.wrong_verdict
+    await query.answer(text=toast)
+
+    if advance_quiz(update, session):
+        text, reply_markup = build_question_message(session)
+        next_state = IN_QUIZ
+    else:
+        text, reply_markup = build_results_message(session)
+        next_state = RESULTS_DISPLAYED
+
+    await replace_message(context, update.effective_chat.id, query.message.message_id,
+                          f"{verdict}\n\n{text.lstrip()}", reply_markup)
+    return next_state
+
+
+async def replace_message(context: ContextTypes.DEFAULT_TYPE, chat_id, message_id, text, reply_markup):
+    """Edits a message in place, falling back to sending a new one if the edit fails."""
+    try:
+        await context.bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text,
+                                            reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN)
+    except Exception as e:
+        logger.error(f"Error editing message {message_id}: {e}. Chat ID: {chat_id}")
+        await context.bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup,
+                                       parse_mode=ParseMode.MARKDOWN)
+
+
+async def show_next_after_feedback(context: ContextTypes.DEFAULT_TYPE):
+    """JobQueue callback replacing the answer feedback with the next question or the results."""
+    job = context.job
+    message_id, session_id, question_index = job.data
+    if SHARED_SESSIONS is not None:
+        await SHARED_SESSIONS.refresh(job.chat_id, job.user_id, context.user_data)
+    session = context.user_data.get(SESSION_KEY)
+    if session is None or session.session_id != session_id or session.question_index != question_index:
+        return  # The quiz was restarted or cancelled while the feedback was showing
+
+    if session.is_finished or session.question_index >= QUIZ_LENGTH:
+        text, reply_markup = build_results_message(session)
+    else:
+        text, reply_markup = build_question_message(session)
+
+    await replace_message(context, job.chat_id, message_id, text, reply_markup)
+
+
+@outbound_priority(PRIORITY_REVIEW)
 async def review_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
 
-    quiz_history = context.user_data.get('quiz_history', [])
-    if not quiz_history:
+    session = context.user_data.get(SESSION_KEY)
+    if session is None or not session.answered_count:
         await query.edit_message_text("No quiz history found to review. Try a new quiz with /start!",
                                       parse_mode=ParseMode.MARKDOWN)
         return RESULTS_DISPLAYED  # Or ConversationHandler.END if preferred
 
-    context.user_data['review_index'] = 0
+    session.review_index = 0
     await display_review_question(update, context)
     return REVIEW_QUESTIONS
 
 
-async def display_review_question(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    review_index = context.user_data.get('review_index', 0)
-    quiz_history = context.user_data.get('quiz_history', [])
-    query = update.callback_query  # Should always be a query here
+@functools.lru_cache(maxsize=None)
+def review_keyboard(has_previous, has_next):
+    nav_row = []
+    if has_previous:
+        nav_row.append(InlineKeyboardButton("⬅️ Previous", callback_data="review_prev"))
 
-    if not quiz_history or not (0 <= review_index < len(quiz_history)):
-        logger.warning(f"display_review_question: Invalid review_index {review_index} or empty history.")
-        await query.edit_message_text("Review ended or history is unavailable.", parse_mode=ParseMode.MARKDOWN)
-        return await show_results_message(update, context, from_review=True)
+    nav_row.append(InlineKeyboardButton("🏁 End Review", callback_data="review_end"))
 
-    item = quiz_history[review_index]
+    if has_next:
+        nav_row.append(InlineKeyboardButton("➡️ Next", callback_data="review_next"))
+    return InlineKeyboardMarkup([nav_row])
+
+
+def build_review_message(session):
+    """Returns (text, reply_markup) for the review page at session.review_index."""
+    review_index = session.review_index
+    return session.cached_render(('review', review_index), lambda s: render_review_page(s, review_index))
 
-    result_icon = "✅" if item['is_correct'] else "❌"
+
+def render_review_page(session, review_index):
+    answered_count = session.answered_count
+    question_id, chosen_index = session.answer_at(review_index)
+    question_data = QUESTION_BANK[question_id]
+    user_answer_text = question_data['options'][chosen_index]
+    is_correct = user_answer_text == question_data['answer']
+
+    result_icon = "✅" if is_correct else "❌"
     review_text = (
-        f"🔍 *Review: Question {review_index + 1}/{len(quiz_history)}*\n"
-        f"*(Difficulty: {item['difficulty'].capitalize()})*\n\n"
-        f"*{item['question_text']}*\n\n"
-        f"Your Answer: {item['user_answer_text']} {result_icon}\n"
+        f"🔍 *Review: Question {review_index + 1}/{answered_count}*\n"
+        f"*(Difficulty: {question_data['difficulty'].capitalize()})*\n\n"
+        f"*{escape_markdown(question_data['question'])}*\n\n"
+        f"Your Answer: {escape_markdown(user_answer_text)} {result_icon}\n"
     )
-    if not item['is_correct']:
-        review_text += f"Correct Answer: *{item['correct_answer_text']}*\n"
+    if not is_correct:
+        review_text += f"Correct Answer: *{escape_markdown(question_data['answer'])}*\n"
 
-    explanation = item.get('explanation', 'No explanation available.')
-    if explanation:  # Ensure explanation is not None or empty before adding title
-        review_text += f"\n*Explanation:*\n_{explanation}_"
+    explanation = question_data.get('explanation') or 'No explanation available.'
+    review_text += f"\n*Explanation:*\n_{escape_markdown(explanation)}_"
 
-    keyboard_buttons = []
-    nav_row = []
-    if review_index > 0:
-        nav_row.append(InlineKeyboardButton("⬅️ Previous", callback_data="review_prev"))
+    return review_text, review_keyboard(review_index > 0, review_index < answered_count - 1)
 
-    nav_row.append(InlineKeyboardButton("🏁 End Review", callback_data="review_end"))
 
-    if review_index < len(quiz_history) - 1:
-        nav_row.append(InlineKeyboardButton("➡️ Next", callback_data="review_next"))
+async def display_review_question(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    session = context.user_data.get(SESSION_KEY)
+    review_index = session.review_index if session else 0
+    answered_count = session.answered_count if session else 0
+    query = update.callback_query  # Should always be a query here
 
-    keyboard_buttons.append(nav_row)
-    reply_markup = InlineKeyboardMarkup(keyboard_buttons)
+    if not answered_count or not (0 <= review_index < answered_count):
+        logger.warning(f"display_review_question: Invalid review_index {review_index} or empty history.")
+        await query.edit_message_text("Review ended or history is unavailable.", parse_mode=ParseMode.MARKDOWN)
+        return await show_results_message(update, context, from_review=True)
+
+    review_text, reply_markup = build_review_message(session)
 
     try:
-        await query.edit_message_text(text=review_text, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN)
+        await edit_if_changed(query, session, review_text, reply_markup)
     except Exception as e:
         logger.error(f"Error displaying review question: {e}")
         await query.message.reply_text("Error displaying review. Try /start.", parse_mode=ParseMode.MARKDOWN)
 
 
+@outbound_priority(PRIORITY_REVIEW)
 async def navigate_review(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
     action = query.data
 
-    review_index = context.user_data.get('review_index', 0)
-    quiz_history_length = len(context.user_data.get('quiz_history', []))
-
-    if action == "review_next" and review_index < quiz_history_length - 1:
-        context.user_data['review_index'] += 1
-    elif action == "review_prev" and review_index > 0:
-        context.user_data['review_index'] -= 1
+    session = context.user_data.get(SESSION_KEY)
+    if session is not None:
+        if action == "review_next":
+            session.move_review(1)
+        elif action == "review_prev":
+            session.move_review(-1)
 
     await display_review_question(update, context)
     return REVIEW_QUESTIONS
 
 
+@outbound_priority(PRIORITY_REVIEW)
 async def end_review(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
@@ -1782,16 +2681,18 @@ async def end_review(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         "Ready for another round or want to explore more? "
         "Type /start to begin a new GMP assessment anytime. Keep learning and growing! 🌟"
     )
+    session = context.user_data.get(SESSION_KEY)
     try:
         # Edit the current review message to the final message, without navigation buttons
-        await query.edit_message_text(text=final_message, reply_markup=None, parse_mode=ParseMode.MARKDOWN)
+        await edit_if_changed(query, session, final_message, None)
     except Exception as e:
         logger.error(f"Error editing message on end_review: {e}")
         # Fallback: send a new message if edit fails
         await query.message.reply_text(text=final_message, parse_mode=ParseMode.MARKDOWN)
 
-    # Clear only review-specific data, keep score and history for potential re-display
-    context.user_data.pop('review_index', None)
+    # Reset only the review cursor, keep score and answers for potential re-display
+    if session is not None:
+        session.review_index = 0
     # Do not clear user_data entirely here, as they might want to go back to score screen
     # or start a new quiz which would then clear it.
     # Transition back to results display state to show score and options again.
@@ -1808,10 +2709,17 @@ async def end_session_callback(update: Update, context: ContextTypes.DEFAULT_TYP
         logger.error(f"Error editing message on end_session_callback: {e}")
         await query.message.reply_text(text=end_message, parse_mode=ParseMode.MARKDOWN)
 
-    context.user_data.clear()
+    clear_quiz_data(context.user_data)
     return ConversationHandler.END
 
 
+async def conversation_timed_out(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Runs once a conversation has been idle for CONVERSATION_TIMEOUT; drops the abandoned quiz."""
+    discard_session(context.user_data)
+    if update.effective_user:
+        logger.info(f"Quiz of user {update.effective_user.id} timed out.")
+
+
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     message_text = "❌ Assessment cancelled. Type /start to begin again."
 
@@ -1833,45 +2741,213 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         await update.callback_query.answer()
 
     logger.info(f"User {update.effective_user.id} cancelled the action.")
-    context.user_data.clear()
+    clear_quiz_data(context.user_data)
     return ConversationHandler.END
 
 
+def format_item_report(limit):
+    """Plain-text /itemstats report: the questions most in need of review first."""
+    flagged = []
+    for question_id in range(len(ITEM_STATS)):
+        attempts = ITEM_STATS.attempts[question_id]
+        if attempts < ITEM_STATS_MIN_ANSWERS:
+            continue
+        p_value = ITEM_STATS.p_value(question_id)
+        discrimination = ITEM_STATS.discrimination(question_id)
+        flags = []
+        if discrimination is not None and discrimination < 0:
+            flags.append("negative discrimination")
+        elif discrimination is not None and discrimination < 0.15:
+            flags.append("low discrimination")
+        if p_value > 0.95:
+            flags.append("too easy")
+        elif p_value < 0.25:
+            flags.append("too hard")
+        sort_key = discrimination if discrimination is not None else 1.0
+        flagged.append((bool(flags), -sort_key, question_id, p_value, discrimination, flags))
+    flagged.sort(reverse=True)
+
+    lines = [f"Item statistics: {ITEM_STATS.answer_count} answers, {ITEM_STATS.quiz_count} finished quizzes, "
+             f"{len(flagged)} questions with at least {ITEM_STATS_MIN_ANSWERS} answers."]
+    length = len(lines[0])
+    shown = flagged[:limit]
+    for index, (_, _, question_id, p_value, discrimination, flags) in enumerate(shown):
+        latency = ITEM_STATS.mean_latency(question_id)
+        question_data = QUESTION_BANK[question_id]
+        line = (f"#{question_id} ({question_data['difficulty']}) n={ITEM_STATS.attempts[question_id]} p={p_value:.2f} "
+                f"r={'-' if discrimination is None else f'{discrimination:+.2f}'} "
+                f"t={'-' if latency is None else f'{latency:.0f}s'}"
+                f"{' ⚠️ ' + ', '.join(flags) if flags else ''}\n    {question_data['question'][:70]}")
+        length += 1 + len(line)
+        if length > MessageLimit.MAX_TEXT_LENGTH - 64:  # Room for the line below
+            lines.append(f"... {len(shown) - index} more not shown (Telegram message length limit).")
+            break
+        lines.append(line)
+    return "\n".join(lines)
+
+
+async def itemstats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/itemstats [count]: per-question p-value, discrimination and answer time, worst first."""
+    if update.effective_user.id not in ADMIN_USER_IDS:
+        return
+    limit = int(context.args[0]) if context.args and context.args[0].isdigit() else 15
+    await update.message.reply_text(format_item_report(min(limit, 30)))
+
+
+async def cohort_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/cohort <seed> <user_id> ...: pre-generates one quiz per trainee, delivered on their next quiz."""
+    if update.effective_user.id not in ADMIN_USER_IDS:
+        return
+    try:
+        seed = int(context.args[0])
+        user_ids = [int(user_id) for user_id in context.args[1:]]
+    except (IndexError, ValueError):
+        user_ids = None
+    if not user_ids or seed < 0:
+        await update.message.reply_text("Usage: /cohort <seed> <user_id> [<user_id> ...] (seed: a whole number ≥ 0)")
+        return
+
+    sessions = await asyncio.to_thread(generate_cohort, len(user_ids), QUIZ_COMPOSITION, seed)
+    await COHORT_ROSTER.assign(dict(zip(user_ids, sessions)))
+    logger.info(f"Admin {update.effective_user.id} assigned {len(sessions)} cohort quizzes (seed {seed}).")
+    await update.message.reply_text(f"✅ Assigned {len(sessions)} quizzes (seed {seed}). "
+                                    f"Each trainee gets theirs on their next quiz.")
+
+
 def main() -> None:
+    global SHARED_SESSIONS, COHORT_ROSTER
     if not BOT_TOKEN:
         logger.error("BOT_TOKEN not found. Please check your .env file or environment variables.")
         return
 
-    application = Application.builder().token(BOT_TOKEN).post_init(post_init).build()
-
-    quiz_conv = ConversationHandler(
+    replayed = ANSWER_LOG.replay()
+    logger.info(f"Item statistics rebuilt from {replayed} logged events.")
+    ITEM_CALIBRATION.refresh()
+
+    builder = Application.builder().token(BOT_TOKEN).post_init(post_init).post_shutdown(post_shutdown)
+    if RATE_LIMIT_GLOBAL > 0:
+        builder.rate_limiter(PriorityRateLimiter(
+            overall_rate=RATE_LIMIT_GLOBAL,
+            chat_rate=RATE_LIMIT_PER_CHAT,
+            group_rate=RATE_LIMIT_PER_GROUP,
+            max_retries=RATE_LIMIT_MAX_RETRIES,
+        ))
+    if UPDATE_CONCURRENCY > 1:
+        builder.concurrent_updates(PerUserUpdateProcessor(UPDATE_CONCURRENCY))
+    persistence = build_persistence()
+    if persistence is not None:
+        builder.persistence(persistence)
+    application = builder.build()
+
+    conversation_handler_class = SharedConversationHandler if SESSION_SHARED else ConversationHandler
+    quiz_conv = conversation_handler_class(
         entry_points=[CommandHandler("start", start)],
         states={
             WELCOME: [
-                CallbackQueryHandler(initiate_quiz_setup, pattern="^initiate_quiz_setup$")
+                callback_router({
+                    "initiate_quiz_setup": initiate_quiz_setup,
+                    "initiate_adaptive_quiz": initiate_adaptive_quiz,
+                    "initiate_practice": initiate_practice,
+                    "pick_topics": show_topic_picker,
+                    "t": toggle_topic,
+                    "topic_quiz": initiate_topic_quiz,
+                })
             ],
             IN_QUIZ: [
-                CallbackQueryHandler(handle_answer),
+                callback_router({ANSWER_ACTION: handle_answer}),
             ],
             RESULTS_DISPLAYED: [
-                CallbackQueryHandler(review_start, pattern="^review_start$"),
-                CallbackQueryHandler(initiate_quiz_setup, pattern="^new_quiz_from_results$"),  # Re-initiate quiz
-                CallbackQueryHandler(end_session_callback, pattern="^end_session$")
+                callback_router({
+                    "review_start": review_start,
+                    "new_quiz_from_results": initiate_quiz_setup,  # Re-initiate quiz
+                    "end_session": end_session_callback,
+                })
             ],
             REVIEW_QUESTIONS: [
-                CallbackQueryHandler(navigate_review, pattern="^review_next$|^review_prev$"),
-                CallbackQueryHandler(end_review, pattern="^review_end$")
+                callback_router({
+                    "review_next": navigate_review,
+                    "review_prev": navigate_review,
+                    "review_end": end_review,
+                })
+            ],
+            ConversationHandler.TIMEOUT: [
+                TypeHandler(Update, conversation_timed_out)
             ]
         },
-        fallbacks=[CommandHandler("cancel", cancel)],
+        fallbacks=[
+            CommandHandler("cancel", cancel),
+            # Answer taps on old quiz messages outside IN_QUIZ
+            callback_router({ANSWER_ACTION: dismiss_answer_tap}),
+        ],
         per_user=True,
         per_chat=True,
+        # Timeout jobs only see this worker's copy of the state, so shared sessions rely on eviction instead.
+        conversation_timeout=CONVERSATION_TIMEOUT if CONVERSATION_TIMEOUT > 0 and not SESSION_SHARED else None,
+        name="gmp_quiz",
+        persistent=persistence is not None,
     )
 
     application.add_handler(quiz_conv)
+    application.add_handler(CommandHandler("cohort", cohort_command))
+    application.add_handler(CommandHandler("itemstats", itemstats_command))
+    if SESSION_STORE != "memory":
+        COHORT_ROSTER = CohortRoster(build_session_store())
+
+    if SESSION_SHARED:
+        if BOT_MODE != "webhook":
+            logger.warning("SESSION_SHARED is on but only one worker can poll a token; use BOT_MODE=webhook.")
+        SHARED_SESSIONS = SharedSessionSync(build_session_store(), quiz_conv)
+        application.add_handler(TypeHandler(Update, SHARED_SESSIONS.load), group=-1)
+        application.add_handler(TypeHandler(Update, SHARED_SESSIONS.save), group=1)
+
+    if application.job_queue is not None:
+        if SESSION_SHARED:
+            spill = None  # The shared store already holds every session
+        elif isinstance(persistence, BatchedPersistence):
+            spill = persistence
+        elif SESSION_SPILL_PATH:
+            spill = SpillStore(SqliteSessionStore(SESSION_SPILL_PATH))
+        else:
+            spill = None
+        evictor = SessionEvictor(application, SESSION_IDLE_TIMEOUT, SESSION_MEMORY_BUDGET, spill)
+        application.add_handler(TypeHandler(Update, evictor.restore), group=-2)
+        application.add_handler(TypeHandler(Update, evictor.touch), group=2)
+        application.job_queue.run_repeating(evictor.sweep, interval=60, first=60)
+        if ANSWER_LOG_PATH:
+            application.job_queue.run_repeating(ANSWER_LOG.flush, interval=ANSWER_LOG_FLUSH_INTERVAL)
+            application.job_queue.run_repeating(ANSWER_LOG.snapshot, interval=ANSWER_LOG_SNAPSHOT_INTERVAL,
+                                                first=ANSWER_LOG_SNAPSHOT_INTERVAL)
+        application.job_queue.run_repeating(ITEM_CALIBRATION.refresh_job, interval=ITEM_CALIBRATION_INTERVAL,
+                                            first=ITEM_CALIBRATION_INTERVAL)
+
+    if BOT_MODE == "webhook":
+        if not WEBHOOK_URL:
+            logger.error("BOT_MODE=webhook requires WEBHOOK_URL.")
+            return
+        # Telegram echoes the secret in X-Telegram-Bot-Api-Secret-Token; requests without it get a 403.
+        if not WEBHOOK_SECRET_TOKEN or not re.fullmatch(r"[A-Za-z0-9_-]{1,256}", WEBHOOK_SECRET_TOKEN):
+            logger.error("BOT_MODE=webhook requires WEBHOOK_SECRET_TOKEN (1-256 characters: A-Z, a-z, 0-9, _ and -).")
+            return
+        if not 1 <= WEBHOOK_MAX_CONNECTIONS <= 100:
+            logger.error("WEBHOOK_MAX_CONNECTIONS must be between 1 and 100.")
+            return
+
+        logger.info(f"GMP Assessment Bot is starting in webhook mode on {WEBHOOK_LISTEN}:{WEBHOOK_PORT}...")
+        application.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH.lstrip('/')}",
+            secret_token=WEBHOOK_SECRET_TOKEN,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=persistence is None,
+        )
+        return
 
     logger.info("GMP Assessment Bot is starting...")
-    application.run_polling(allowed_updates=Update.ALL_TYPES, drop_pending_updates=True)
+    # With persisted sessions, answers sent while the bot was restarting can still be applied.
+    application.run_polling(allowed_updates=Update.ALL_TYPES, drop_pending_updates=persistence is None)
 
 
 if __name__ == "__main__":